@@ -35,6 +35,8 @@ def create_app(config_name=None):
     
     # 导入模型以确保Flask-Migrate能检测到
     from app import models
+    # 注册统计表/图片索引/变更日志维护监听器
+    from app.services import stats, image_index, change_log  # noqa: F401
     
     # 配置CORS
     CORS(app, resources={
@@ -46,7 +48,7 @@ def create_app(config_name=None):
     })
     
     # 注册蓝图
-    from app.routes import auth, items, collections, upload, analytics, answer, tags
+    from app.routes import auth, items, collections, upload, analytics, answer, tags, sync, export, imports
     app.register_blueprint(auth.bp)
     app.register_blueprint(items.bp)
     app.register_blueprint(collections.bp)
@@ -54,6 +56,27 @@ def create_app(config_name=None):
     app.register_blueprint(analytics.bp)
     app.register_blueprint(answer.bp)
     app.register_blueprint(tags.bp)
+    app.register_blueprint(sync.bp)
+    app.register_blueprint(export.bp)
+    app.register_blueprint(imports.bp)
+    
+    # 注册CLI命令
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # 进程内定时清理过期上传（多worker通过数据库租约互斥）
+    if app.config.get('PENDING_UPLOAD_SWEEP_INTERVAL') and not app.testing:
+        from app.services.upload_sweeper import start_background_sweeper
+        start_background_sweeper(
+            app,
+            app.config['PENDING_UPLOAD_SWEEP_INTERVAL'],
+            hours=app.config['PENDING_UPLOAD_TTL_HOURS']
+        )
+    
+    # 进程内定时处理图片删除发件箱
+    if app.config.get('DELETION_OUTBOX_INTERVAL') and not app.testing:
+        from app.services.deletion_outbox import start_background_drainer
+        start_background_drainer(app, app.config['DELETION_OUTBOX_INTERVAL'])
     
     # 健康检查路由
     @app.route('/health')
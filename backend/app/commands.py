@@ -0,0 +1,91 @@
+"""
+Flask CLI commands (flask <group> <command>)
+"""
+import click
+from flask.cli import AppGroup
+
+stats_cli = AppGroup('stats', help='Maintain the incremental statistics tables.')
+uploads_cli = AppGroup('uploads', help='Housekeeping for uploaded images.')
+
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user (default: everyone).')
+def rebuild_stats(user_id):
+    """Recompute user_stats/collection_stats from items."""
+    from app.services import stats
+    stats.rebuild(user_id)
+    click.echo(f"Rebuilt stats for {'user %d' % user_id if user_id else 'all users'}")
+
+
+@stats_cli.command('repair-answers')
+@click.option('--item-id', type=int, default=None, help='Only repair this item (default: all items).')
+def repair_answer_stats(item_id):
+    """Recompute attempts/correct_count/success_rate from answers."""
+    from app.services import answer_stats
+    count = answer_stats.recompute_answer_stats(item_id)
+    click.echo(f"Recomputed answer stats for {count} item(s)")
+
+
+@uploads_cli.command('sweep')
+@click.option('--hours', type=int, default=None, help='Age after which pending uploads expire (default: PENDING_UPLOAD_TTL_HOURS).')
+@click.option('--batch-size', type=int, default=33, help='Uploads per bulk delete call (each with its variants; max 33).')
+def sweep_uploads(hours, batch_size):
+    """Delete expired pending uploads from storage and the database."""
+    from flask import current_app
+    from app.services.upload_sweeper import sweep_pending_uploads
+    if hours is None:
+        hours = current_app.config['PENDING_UPLOAD_TTL_HOURS']
+    report = sweep_pending_uploads(hours=hours, batch_size=batch_size)
+    if not report['acquired']:
+        click.echo('Another worker is already sweeping; nothing done')
+        return
+    click.echo(
+        f"Deleted {report['deleted']} expired upload(s), {report['failed']} failed, "
+        f"{report['batches']} batch(es) in {report['duration_ms']} ms"
+    )
+
+
+@uploads_cli.command('drain-deletions')
+@click.option('--batch-size', type=int, default=100, help='public_ids per bulk delete call (max 100).')
+def drain_deletions(batch_size):
+    """Delete queued images from storage (the deletion outbox)."""
+    from flask import current_app
+    from app.services.deletion_outbox import drain
+    report = drain(batch_size=batch_size, max_attempts=current_app.config['DELETION_OUTBOX_MAX_ATTEMPTS'])
+    if not report['acquired']:
+        click.echo('Another worker is already draining; nothing done')
+        return
+    click.echo(
+        f"Deleted {report['deleted']} queued image(s), {report['failed']} failed, "
+        f"{report['batches']} batch(es) in {report['duration_ms']} ms"
+    )
+
+
+@uploads_cli.command('reconcile')
+@click.option('--apply', 'apply_changes', is_flag=True, help='Delete orphans (default is a dry run).')
+@click.option('--grace-hours', type=int, default=24, help='Leave assets younger than this alone.')
+@click.option('--prefix', default='selective-questions/', help='Storage folder to scan.')
+def reconcile_uploads(apply_changes, grace_hours, prefix):
+    """Find stored images no item, pending upload or outbox row refers to."""
+    from app.services.orphan_reconciler import reconcile
+    report = reconcile(prefix=prefix, grace_hours=grace_hours, dry_run=not apply_changes)
+    if not report['acquired']:
+        click.echo('Another worker is already reconciling; nothing done')
+        return
+    if report['resumed_from']:
+        click.echo(f"Resumed after {report['resumed_from']}")
+    click.echo(
+        f"Scanned {report['scanned']} asset(s): {report['orphans']} orphan(s) "
+        f"({report['orphan_bytes']} bytes), {report['too_recent']} within the grace period"
+    )
+    for public_id in report['sample']:
+        click.echo(f"  {public_id}")
+    if apply_changes:
+        click.echo(f"Deleted {report['deleted']}, {report['failed']} failed in {report['duration_ms']} ms")
+    else:
+        click.echo('Dry run; re-run with --apply to delete')
+
+
+def register_commands(app):
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(uploads_cli)
@@ -4,3 +4,10 @@ from app.models.collection import Collection
 from app.models.pending_upload import PendingUpload
 from app.models.answer import Answer
 from app.models.tag import Tag
+from app.models.stats import UserStats, CollectionStats
+from app.models.item_image import ItemImage
+from app.models.job_lease import JobLease
+from app.models.image_hash import ImageHash
+from app.models.storage_deletion import StorageDeletion
+from app.models.change_log import ChangeLog, ChangeSeq
+from app.models.import_job import ImportJob
@@ -20,6 +20,11 @@ class Answer(db.Model):
     duration_seconds = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_answers_item_correct', 'item_id', 'is_correct'),
+        db.Index('idx_answers_user_created', 'user_id', 'created_at'),
+    )
+    
     # Backrefs are usually defined on the "One" side (User, Question), 
     # but we can define them here if needed, or rely on the other side.
     # Let's keep it simple for now.
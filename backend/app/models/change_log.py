@@ -0,0 +1,34 @@
+from app import db
+from datetime import datetime
+
+
+class ChangeLog(db.Model):
+    """
+    Append-only log of item, collection and tag changes per user.
+
+    ``seq`` is the per-user change-sequence that sync clients pass back as
+    their ``since`` token; a poll is one range probe on the (user_id, seq)
+    primary key. Seqs come from the user's ChangeSeq row, so they become
+    visible in commit order. Written by app.services.change_log.
+    """
+    __tablename__ = 'change_log'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    entity = db.Column(db.String(20), nullable=False)  # item, collection, tag
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ChangeSeq(db.Model):
+    """
+    Last change_log seq handed out per user.
+
+    Bumping the row locks it until the writing transaction ends, which
+    serializes each user's log writes.
+    """
+    __tablename__ = 'change_seqs'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
@@ -17,6 +17,10 @@ class Collection(db.Model):
     is_deleted = db.Column(db.Boolean, default=False, index=True)
     deleted_at = db.Column(db.DateTime, nullable=True)
     
+    # Counter cache, kept in sync by app.services.stats on every item write
+    item_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    need_review_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
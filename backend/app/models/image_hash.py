@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+
+
+class ImageHash(db.Model):
+    """
+    Per-user content hashes of uploaded images, used to spot re-uploads.
+
+    sha256 identifies byte-identical files; phash is a 64-bit difference
+    hash (16 hex chars) compared by Hamming distance for near duplicates.
+    Rows may outlive their asset; app.services.image_dedup checks that the
+    asset is still pending or attached before trusting a match.
+    """
+    __tablename__ = 'image_hashes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    public_id = db.Column(db.String(255), nullable=False, index=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    phash = db.Column(db.String(16), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    variants = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_image_hashes_user_sha256', 'user_id', 'sha256'),
+    )
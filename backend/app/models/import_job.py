@@ -0,0 +1,44 @@
+from app import db
+from datetime import datetime
+
+
+class ImportJob(db.Model):
+    """
+    One bulk import of an uploaded NDJSON file or ZIP archive.
+
+    ``processed`` is the number of input records consumed by committed
+    batches; it is updated in the same transaction as the batch's inserts,
+    so a failed or interrupted import resumes right after the last
+    committed batch. Run by app.services.importer.
+    """
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='QUEUED')  # QUEUED, RUNNING, FAILED, COMPLETED
+    source_format = db.Column(db.String(10), nullable=False)  # ndjson, zip
+    source_path = db.Column(db.String(500), nullable=False)
+    filename = db.Column(db.String(255))
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.JSON)  # first MAX_REPORTED_ERRORS row errors
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'filename': self.filename,
+            'processed': self.processed,
+            'created': self.created_count,
+            'failed': self.error_count,
+            'errors': self.errors or [],
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
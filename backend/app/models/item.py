@@ -30,12 +30,24 @@ class Item(db.Model):
     
     # Statistics
     attempts = db.Column(db.Integer, default=0)
+    correct_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
     success_rate = db.Column(db.Float, default=0.0)
     
+    # Spaced repetition (SM-2), see app.services.scheduler
+    review_interval = db.Column(db.Integer, default=0, nullable=False, server_default='0')  # days
+    ease_factor = db.Column(db.Float, default=2.5, nullable=False, server_default='2.5')
+    repetitions = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    due_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)  # NULL = not scheduled
+    
     # Constraints
     __table_args__ = (
         db.CheckConstraint('difficulty >= 1 AND difficulty <= 5', name='check_difficulty_range'),
         db.CheckConstraint("status IN ('UNANSWERED', 'ANSWERED', 'MASTERED')", name='check_status_valid'),
+        # Per-user access paths (every hot query filters on author_id first)
+        db.Index('idx_items_author_collection_created', 'author_id', 'collection_id', 'created_at'),
+        db.Index('idx_items_author_status', 'author_id', 'status'),
+        db.Index('idx_items_author_needs_review', 'author_id', 'needs_review'),
+        db.Index('idx_items_author_due', 'author_id', 'due_at'),
     )
     
     # Relationships
@@ -62,7 +74,9 @@ class Item(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'attempts': self.attempts,
             'tags': [tag.to_dict() for tag in self.tags],
-            'needs_review': self.needs_review
+            'needs_review': self.needs_review,
+            'due_at': self.due_at.isoformat() if self.due_at else None,
+            'review_interval': self.review_interval
         }
 
 # Association Table
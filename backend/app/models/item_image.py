@@ -0,0 +1,31 @@
+from app import db
+
+
+class ItemImage(db.Model):
+    """
+    Index of images attached to items, mirroring Item.images.
+
+    Item.images (JSON) stays the source of truth for rendering; this table
+    lets us find an image's owner by public_id with one indexed lookup.
+    Kept in sync by app.services.image_index.
+    """
+    __tablename__ = 'item_images'
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    public_id = db.Column(db.String(255), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    rotation = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('idx_item_images_public_id', 'public_id', unique=True),
+    )
+
+    def to_dict(self):
+        return {
+            'item_id': self.item_id,
+            'public_id': self.public_id,
+            'position': self.position,
+            'rotation': self.rotation
+        }
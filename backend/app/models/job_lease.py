@@ -0,0 +1,67 @@
+from app import db
+from datetime import datetime, timedelta
+from sqlalchemy import update, insert, or_
+from sqlalchemy.exc import IntegrityError
+
+
+class JobLease(db.Model):
+    """DB-level lease so only one worker/process runs a background job at a time"""
+    __tablename__ = 'job_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    # Where a resumable job got to; survives release so the next run continues
+    checkpoint = db.Column(db.String(255))
+
+    @staticmethod
+    def acquire(name, owner, ttl_seconds):
+        """Take (or extend) the lease; False if another owner holds a live one. Commits."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        result = db.session.execute(
+            update(JobLease).where(
+                JobLease.name == name,
+                or_(JobLease.expires_at < now, JobLease.owner == owner)
+            ).values(owner=owner, expires_at=expires_at)
+        )
+        if result.rowcount:
+            db.session.commit()
+            return True
+
+        # No row yet (or a live lease held by someone else)
+        try:
+            db.session.execute(insert(JobLease).values(name=name, owner=owner, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    @staticmethod
+    def release(name, owner):
+        """Expire the lease now if we still hold it. Commits."""
+        db.session.execute(
+            update(JobLease).where(
+                JobLease.name == name,
+                JobLease.owner == owner
+            ).values(expires_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+    @staticmethod
+    def get_checkpoint(name):
+        return db.session.execute(
+            db.select(JobLease.checkpoint).where(JobLease.name == name)
+        ).scalar()
+
+    @staticmethod
+    def save_checkpoint(name, owner, checkpoint):
+        """Record progress while holding the lease (no commit)"""
+        db.session.execute(
+            update(JobLease).where(
+                JobLease.name == name,
+                JobLease.owner == owner
+            ).values(checkpoint=checkpoint)
+        )
@@ -0,0 +1,51 @@
+from app import db
+
+
+class UserStats(db.Model):
+    """
+    Per-user item counters, maintained incrementally by app.services.stats.
+
+    One row per (user, dimension, bucket):
+      ('all', '')              overall totals
+      ('subject', <subject>)   legacy subject breakdown
+      ('difficulty', '1'..'5') difficulty breakdown
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(100), primary_key=True)
+
+    total = db.Column(db.Integer, default=0, nullable=False)
+    answered = db.Column(db.Integer, default=0, nullable=False)  # ANSWERED + MASTERED
+    mastered = db.Column(db.Integer, default=0, nullable=False)
+    need_review = db.Column(db.Integer, default=0, nullable=False)  # needs_review flag
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'answered': self.answered,
+            'mastered': self.mastered,
+            'need_review': self.need_review
+        }
+
+
+class CollectionStats(db.Model):
+    """Per-collection item counters, maintained alongside UserStats"""
+    __tablename__ = 'collection_stats'
+
+    collection_id = db.Column(db.Integer, db.ForeignKey('collections.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    total = db.Column(db.Integer, default=0, nullable=False)
+    answered = db.Column(db.Integer, default=0, nullable=False)
+    mastered = db.Column(db.Integer, default=0, nullable=False)
+    need_review = db.Column(db.Integer, default=0, nullable=False)
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'answered': self.answered,
+            'mastered': self.mastered,
+            'need_review': self.need_review
+        }
@@ -0,0 +1,24 @@
+from app import db
+from datetime import datetime
+
+
+class StorageDeletion(db.Model):
+    """
+    Outbox of stored assets to delete.
+
+    Rows are written in the same transaction that drops the last reference
+    to an asset (e.g. deleting an item), and removed once storage confirms
+    the delete. Drained by app.services.deletion_outbox.
+    """
+    __tablename__ = 'storage_deletions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(255), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_storage_deletions_due', 'attempts', 'next_attempt_at'),
+    )
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.item import Item
-from sqlalchemy import func, case
+from app.models.stats import UserStats, CollectionStats
 from app import db
 
 bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
@@ -10,82 +10,55 @@ bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_stats():
+    """Dashboard stats, served from the incrementally maintained stats tables"""
     user_id = get_jwt_identity()
 
-    # Status counts in one query
-    status_counts = {k: 0 for k in ['UNANSWERED', 'ANSWERED', 'MASTERED', 'NEED_REVIEW']}
-    status_rows = db.session.query(
-        Item.status,
-        func.count(Item.id)
-    ).filter(
-        Item.author_id == user_id
-    ).group_by(Item.status).all()
-    for status, count in status_rows:
-        status_counts[status] = count
-    total = sum(status_counts.values())
-    answered = status_counts['ANSWERED'] + status_counts['MASTERED']
-    mastered = status_counts['MASTERED']
-    need_review = status_counts['NEED_REVIEW']
-
-    # Subject breakdown (single grouped query)
+    rows = {
+        (row.dimension, row.bucket): row
+        for row in UserStats.query.filter_by(user_id=user_id).all()
+    }
+
+    overall = rows.get(('all', ''))
+    total = overall.total if overall else 0
+    answered = overall.answered if overall else 0
+    mastered = overall.mastered if overall else 0
+    need_review = overall.need_review if overall else 0
+
+    # Subject breakdown
     subjects = ['READING', 'WRITING', 'MATHS', 'THINKING_SKILLS']
-    by_subject = {s: {'total': 0, 'answered': 0, 'mastered': 0} for s in subjects}
-    subject_rows = db.session.query(
-        Item.subject,
-        func.count(Item.id).label('total'),
-        func.sum(case((Item.status.in_(['ANSWERED', 'MASTERED']), 1), else_=0)).label('answered'),
-        func.sum(case((Item.status == 'MASTERED', 1), else_=0)).label('mastered')
-    ).filter(
-        Item.author_id == user_id,
-        Item.subject.in_(subjects)
-    ).group_by(Item.subject).all()
-    for row in subject_rows:
-        by_subject[row.subject] = {
-            'total': row.total,
-            'answered': int(row.answered or 0),
-            'mastered': int(row.mastered or 0)
+    by_subject = {}
+    for s in subjects:
+        row = rows.get(('subject', s))
+        by_subject[s] = {
+            'total': row.total if row else 0,
+            'answered': row.answered if row else 0,
+            'mastered': row.mastered if row else 0
         }
 
-    # Collection breakdown (single grouped query)
+    # Collection breakdown (active collections only)
     from app.models.collection import Collection
-    collections = Collection.query.filter_by(user_id=user_id, is_deleted=False).all()
-    collection_map = {c.id: c for c in collections}
+    collection_rows = db.session.query(Collection, CollectionStats).outerjoin(
+        CollectionStats, CollectionStats.collection_id == Collection.id
+    ).filter(
+        Collection.user_id == user_id,
+        Collection.is_deleted == False
+    ).all()
     by_collection = {
         c.id: {
             'name': c.name,
-            'total': 0,
-            'answered': 0,
-            'mastered': 0,
+            'total': cs.total if cs else 0,
+            'answered': cs.answered if cs else 0,
+            'mastered': cs.mastered if cs else 0,
             'color': c.color,
             'icon': c.icon
-        } for c in collections
+        } for c, cs in collection_rows
     }
-    if collection_map:
-        col_rows = db.session.query(
-            Item.collection_id,
-            func.count(Item.id).label('total'),
-            func.sum(case((Item.status.in_(['ANSWERED', 'MASTERED']), 1), else_=0)).label('answered'),
-            func.sum(case((Item.status == 'MASTERED', 1), else_=0)).label('mastered')
-        ).filter(
-            Item.author_id == user_id,
-            Item.collection_id.in_(collection_map.keys())
-        ).group_by(Item.collection_id).all()
-        for row in col_rows:
-            if row.collection_id in by_collection:
-                by_collection[row.collection_id]['total'] = row.total
-                by_collection[row.collection_id]['answered'] = int(row.answered or 0)
-                by_collection[row.collection_id]['mastered'] = int(row.mastered or 0)
-
-    # Difficulty breakdown (single grouped query)
-    by_difficulty = {str(i): 0 for i in range(1, 6)}
-    diff_rows = db.session.query(
-        Item.difficulty,
-        func.count(Item.id)
-    ).filter(
-        Item.author_id == user_id
-    ).group_by(Item.difficulty).all()
-    for diff, count in diff_rows:
-        by_difficulty[str(diff)] = count
+
+    # Difficulty breakdown
+    by_difficulty = {}
+    for i in range(1, 6):
+        row = rows.get(('difficulty', str(i)))
+        by_difficulty[str(i)] = row.total if row else 0
 
     return jsonify({
         'total_questions': total,
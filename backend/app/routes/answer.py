@@ -4,7 +4,9 @@ from app import db
 from app.models.item import Item
 from app.models.answer import Answer
 from app.models.user import User
-from sqlalchemy import func
+from app.services import answer_stats, sampling, scheduler
+from app.utils.loaders import prime_item_tags
+from datetime import datetime
 
 bp = Blueprint('answers', __name__, url_prefix='/api')
 
@@ -26,6 +28,13 @@ def submit_answer(item_id):
         return jsonify({'error': 'is_correct is required'}), 400
         
     is_correct = data['is_correct']
+    
+    # Optional SM-2 recall grade (0-5); derived from is_correct when absent
+    quality = data.get('quality')
+    if quality is None:
+        quality = scheduler.default_quality(is_correct)
+    elif not isinstance(quality, int) or isinstance(quality, bool) or not 0 <= quality <= 5:
+        return jsonify({'error': 'quality must be an integer between 0 and 5'}), 400
     content = data.get('content', '')
     duration_seconds = data.get('duration_seconds', 0)
     
@@ -39,17 +48,8 @@ def submit_answer(item_id):
     )
     db.session.add(answer)
     
-    # Update Item stats
-    db.session.flush() # Ensure the new answer is counted
-    
-    total_attempts = Answer.query.filter_by(item_id=item_id).count()
-    total_correct = Answer.query.filter_by(item_id=item_id, is_correct=True).count()
-    
-    item.attempts = total_attempts
-    if total_attempts > 0:
-        item.success_rate = round((total_correct / total_attempts) * 100.0, 1)
-    else:
-        item.success_rate = 0.0
+    # Update Item stats (single atomic UPDATE, no recount of answer history)
+    answer_stats.record_answer(item_id, is_correct)
     
     # Update Item status logic
     if is_correct:
@@ -59,12 +59,16 @@ def submit_answer(item_id):
         item.status = 'ANSWERED'  # Still counts as answered
         item.needs_review = True  # Mark for review on wrong answer
     
+    # Schedule the next review
+    scheduler.schedule_review(item, quality)
+    
     db.session.commit()
     
     return jsonify({
         'message': 'Answer submitted successfully',
         'answer': answer.to_dict(),
-        'item_status': item.status
+        'item_status': item.status,
+        'due_at': item.due_at.isoformat()
     }), 201
 
 @bp.route('/items/<int:item_id>/answers', methods=['GET'])
@@ -88,21 +92,45 @@ def get_answer_history(item_id):
 @bp.route('/items/review-session', methods=['GET'])
 @jwt_required()
 def get_review_session():
+    """
+    Random flagged items for a review session.
+
+    ``limit`` defaults to 10 and is clamped to 1..100, the same bounds as
+    /api/items/due.
+    """
     current_user_id = get_jwt_identity()
     
-    # Get limit from query params, default 10
     limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, 100))
     subject = request.args.get('subject')
-    
-    query = Item.query.filter_by(
-        author_id=current_user_id,
-        needs_review=True
+    collection_id = request.args.get('collection_id', type=int)
+    tags = request.args.getlist('tag')
+    
+    # Uniform sample over an id-only index scan (no ORDER BY RANDOM())
+    items = sampling.sample_review_items(
+        current_user_id, limit,
+        subject=subject,
+        collection_id=collection_id,
+        tag_names=tags
     )
-    
-    if subject:
-        query = query.filter_by(subject=subject)
-        
-    # Randomize and limit
-    items = query.order_by(func.random()).limit(limit).all()
+    prime_item_tags(items)
     
     return jsonify([q.to_dict() for q in items]), 200
+
+@bp.route('/items/due', methods=['GET'])
+@jwt_required()
+def get_due_items():
+    """Next items due for spaced-repetition review, earliest first"""
+    current_user_id = get_jwt_identity()
+    
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, 100))
+    
+    # Bounded range scan on idx_items_author_due
+    items = Item.query.filter(
+        Item.author_id == current_user_id,
+        Item.due_at <= datetime.utcnow()
+    ).order_by(Item.due_at.asc(), Item.id.asc()).limit(limit).all()
+    prime_item_tags(items)
+    
+    return jsonify([item.to_dict() for item in items]), 200
@@ -3,8 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.collection import Collection
 from app.models.item import Item
+from app.services import stats, image_index, change_log
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, case
 from datetime import datetime
 
 bp = Blueprint('collections', __name__, url_prefix='/api/collections')
@@ -14,32 +14,17 @@ bp = Blueprint('collections', __name__, url_prefix='/api/collections')
 def get_collections():
     current_user_id = get_jwt_identity()
     
-    # Subquery: count items by collection where author matches current user
-    item_counts = db.session.query(
-        Item.collection_id,
-        func.count(Item.id).label('total_count'),
-        func.sum(case((Item.needs_review == True, 1), else_=0)).label('need_review_count')
-    ).filter(
-        Item.author_id == current_user_id
-    ).group_by(Item.collection_id).subquery()
-    
-    # Join collections with counts
-    collections = db.session.query(
-        Collection, 
-        func.coalesce(item_counts.c.total_count, 0).label('total_count'),
-        func.coalesce(item_counts.c.need_review_count, 0).label('need_review_count')
-    ).outerjoin(
-        item_counts, Collection.id == item_counts.c.collection_id
-    ).filter(
-        Collection.user_id == current_user_id,
-        Collection.is_deleted == False
+    # Counts come from the counter cache columns (no scan over items)
+    collections = Collection.query.filter_by(
+        user_id=current_user_id,
+        is_deleted=False
     ).order_by(Collection.created_at.desc()).all()
     
     result = []
-    for c, total, need_review in collections:
+    for c in collections:
         data = c.to_dict()
-        data['total_count'] = total
-        data['need_review_count'] = need_review
+        data['total_count'] = c.item_count
+        data['need_review_count'] = c.need_review_count
         result.append(data)
     
     return jsonify(result), 200
@@ -124,7 +109,12 @@ def delete_collection(id):
 
     try:
         # Cascade delete items (DB only)
-        # Note: We skip Cloudinary deletion for performance as per design
+        # Note: We skip Cloudinary deletion for performance as per design;
+        # `flask uploads reconcile` removes the orphaned images later
+        # Bulk delete skips ORM events, so update the derived tables first
+        stats.discount_items(Item.collection_id == id)
+        image_index.discard_items(Item.collection_id == id)
+        change_log.record_items(Item.collection_id == id, op=change_log.DELETE)
         Item.query.filter_by(collection_id=id).delete()
         
         db.session.delete(collection)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from flask import Blueprint, Response, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services import exporter
+
+bp = Blueprint('export', __name__, url_prefix='/api/export')
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+def export_data():
+    """Stream the current user's collections, tags, items and answers as NDJSON (?gzip=true to compress)"""
+    current_user_id = int(get_jwt_identity())
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+    
+    filename = f"selective-export-{datetime.utcnow():%Y%m%d}.ndjson" + ('.gz' if compress else '')
+    body = exporter.ndjson_chunks(exporter.export_records(current_user_id), compress=compress)
+    
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            # Keep proxies from buffering the whole stream
+            'X-Accel-Buffering': 'no',
+            'Cache-Control': 'no-store'
+        }
+    )
@@ -0,0 +1,82 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+import os
+import uuid
+from app import db
+from app.models.import_job import ImportJob
+from app.services import importer
+
+bp = Blueprint('imports', __name__, url_prefix='/api/import')
+
+# Upload extension -> source format
+SOURCE_FORMATS = {'ndjson': 'ndjson', 'jsonl': 'ndjson', 'zip': 'zip'}
+
+def _get_own_job(id):
+    return ImportJob.query.filter_by(id=id, user_id=int(get_jwt_identity())).first()
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def start_import():
+    """
+    Import items from an uploaded NDJSON file or ZIP (manifest.ndjson + images),
+    field name ``file``. Returns the job; poll GET /api/import/<id> for progress.
+    """
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    source_format = SOURCE_FORMATS.get(extension)
+    if not source_format:
+        return jsonify({'error': 'File must be .ndjson, .jsonl or .zip'}), 400
+    
+    # Keep the upload on disk: the job reads it incrementally and again on resume
+    folder = current_app.config['IMPORT_STORAGE_PATH']
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{uuid.uuid4().hex}.{source_format}")
+    file.save(path)
+    
+    try:
+        importer.check_source(path, source_format)
+    except importer.InvalidSource as e:
+        os.remove(path)
+        return jsonify({'error': str(e)}), 400
+    
+    job = ImportJob(
+        user_id=int(get_jwt_identity()),
+        source_format=source_format,
+        source_path=path,
+        filename=file.filename
+    )
+    db.session.add(job)
+    db.session.commit()
+    
+    importer.start(job.id)
+    return jsonify(job.to_dict()), 202
+
+@bp.route('/<int:id>', methods=['GET'])
+@jwt_required()
+def get_import(id):
+    job = _get_own_job(id)
+    if not job:
+        return jsonify({'error': 'Import not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+@bp.route('/<int:id>/resume', methods=['POST'])
+@jwt_required()
+def resume_import(id):
+    """Continue a failed (or abandoned) import after its last committed batch"""
+    job = _get_own_job(id)
+    if not job:
+        return jsonify({'error': 'Import not found'}), 404
+    
+    # A RUNNING job whose worker died stops updating; its lease expires with it
+    stale = job.updated_at and job.updated_at < datetime.utcnow() - timedelta(seconds=importer.LEASE_SECONDS)
+    if job.status == 'COMPLETED' or (job.status in ('QUEUED', 'RUNNING') and not stale):
+        return jsonify({'error': f'Import is {job.status.lower()}'}), 409
+    if not os.path.exists(job.source_path):
+        return jsonify({'error': 'Import source file is gone; upload it again'}), 410
+    
+    importer.start(job.id)
+    return jsonify(job.to_dict()), 202
@@ -1,15 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app import db
 from datetime import datetime
 from app.models.item import Item
 from app.models.collection import Collection
-from app.models.tag import Tag
 from app.schemas.item import ItemSchema
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
 from marshmallow import ValidationError
-import cloudinary.uploader
 from sqlalchemy.orm.attributes import flag_modified
+from app.services import deletion_outbox, image_index, item_bulk, tags as tag_service
+from app.services.item_filters import filter_by_tags
+from app.utils.loaders import prime_item_tags
+from app.utils.pagination import (
+    MAX_CURSOR_PER_PAGE, InvalidCursor, apply_keyset, decode_cursor, encode_cursor
+)
 
 bp = Blueprint('items', __name__, url_prefix='/api/items')
 
@@ -23,17 +26,47 @@ def get_items():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    # Filters
-    subject = request.args.get('subject')
-    collection_id = request.args.get('collection_id', type=int)
-    difficulty = request.args.get('difficulty', type=int)
-    status = request.args.get('status')
-    tags = request.args.getlist('tag')  # Multiple tag filters
-    
     sort_by = request.args.get('sort_by', 'created_at')
     sort_direction = request.args.get('sort_direction', 'desc')
     
     current_user_id = get_jwt_identity()
+    query = _filtered_items_query(request.args, current_user_id)
+    
+    # Sorting
+    allowed_sort_fields = ['created_at', 'difficulty', 'updated_at']
+    if sort_by not in allowed_sort_fields:
+        sort_by = 'created_at'
+    
+    # Cursor mode (opt-in): seek via the index instead of OFFSET + COUNT(*)
+    if 'cursor' in request.args:
+        return _get_items_page_by_cursor(query, sort_by, sort_direction, per_page)
+    
+    if sort_direction == 'asc':
+        query = query.order_by(getattr(Item, sort_by).asc())
+    else:
+        query = query.order_by(getattr(Item, sort_by).desc())
+    
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    prime_item_tags(pagination.items)
+    
+    # Use to_dict() to ensure tags are included (ItemSchema has tags as load_only)
+    return jsonify({
+        'items': [item.to_dict() for item in pagination.items],
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    }), 200
+
+# Query parameters understood by _filtered_items_query
+ITEM_FILTER_ARGS = ('subject', 'collection_id', 'difficulty', 'status', 'needs_review', 'tag')
+
+def _filtered_items_query(args, current_user_id):
+    """The user's items narrowed by get_items-style filter parameters"""
+    subject = args.get('subject')
+    collection_id = args.get('collection_id', type=int)
+    difficulty = args.get('difficulty', type=int)
+    status = args.get('status')
+    tags = args.getlist('tag')  # Multiple tag filters
     
     # Scope to current user's items only
     query = Item.query.filter_by(author_id=current_user_id)
@@ -50,32 +83,45 @@ def get_items():
         query = query.filter_by(status=status)
     
     # Needs review filter
-    needs_review = request.args.get('needs_review')
+    needs_review = args.get('needs_review')
     if needs_review and needs_review.lower() == 'true':
         query = query.filter_by(needs_review=True)
     
     # Tag filtering (AND logic)
-    for tag_name in tags:
-        query = query.filter(Item.tags.any(func.lower(Tag.name) == tag_name.lower()))
-    
-    # Sorting
-    allowed_sort_fields = ['created_at', 'difficulty', 'updated_at']
-    if sort_by not in allowed_sort_fields:
-        sort_by = 'created_at'
-    
-    if sort_direction == 'asc':
-        query = query.order_by(getattr(Item, sort_by).asc())
-    else:
-        query = query.order_by(getattr(Item, sort_by).desc())
-    
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    if tags:
+        query = filter_by_tags(query, tags, current_user_id)
+    return query
+
+def _get_items_page_by_cursor(query, sort_by, sort_direction, per_page):
+    """Keyset page for get_items: no OFFSET scan and no total count"""
+    direction = 'asc' if sort_direction == 'asc' else 'desc'
+    per_page = max(1, min(per_page, MAX_CURSOR_PER_PAGE))
+    
+    cursor_value = cursor_id = None
+    token = request.args.get('cursor')
+    if token:
+        try:
+            cursor_value, cursor_id = decode_cursor(token, sort_by, direction)
+        except InvalidCursor as e:
+            return jsonify({'error': f'Invalid cursor: {e}'}), 400
+    
+    query = apply_keyset(query, getattr(Item, sort_by), Item.id, direction, cursor_value, cursor_id)
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = prime_item_tags(rows[:per_page])
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, direction, getattr(last, sort_by), last.id)
     
-    # Use to_dict() to ensure tags are included (ItemSchema has tags as load_only)
     return jsonify({
-        'items': [item.to_dict() for item in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        'items': [item.to_dict() for item in rows],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'per_page': per_page
     }), 200
 
 @bp.route('', methods=['POST'])
@@ -99,11 +145,20 @@ def create_item():
         if str(collection.user_id) != str(current_user_id):
             return jsonify({'error': 'Invalid collection_id: Access denied'}), 403
 
+    # An image can belong to one item only (idx_item_images_public_id)
+    if image_index.attached_elsewhere(data.get('images', [])):
+        return jsonify({'error': 'Image is already attached to another item'}), 409
+    
     # Derive subject from collection if not provided (keeps analytics compatible during migration)
     subject_value = data.get('subject')
     if not subject_value and collection and collection.type == 'SUBJECT':
         subject_value = collection.name
         
+    try:
+        tag_names = tag_service.clean_names(data.get('tags', []))
+    except tag_service.InvalidTagName as e:
+        return jsonify({'error': str(e)}), 400
+        
     try:
         item = Item(
             title=data.get('title'),
@@ -115,30 +170,13 @@ def create_item():
             author_id=current_user_id
         )
         item.set_images(data.get('images', []))
+        db.session.add(item)
+        db.session.flush()  # Get ID
         
-        # Handle tags
-        tag_names = data.get('tags', [])
-        for tag_name in tag_names:
-            tag_name = tag_name.strip()
-            
-            # Validation
-            if not tag_name:
-                return jsonify({'error': 'Tag name cannot be empty'}), 400
-            if len(tag_name) > 30:
-                return jsonify({'error': 'Tag name cannot exceed 30 characters'}), 400
-            
-            # Find or create tag (case-insensitive)
-            tag = Tag.query.filter(
-                Tag.user_id == current_user_id,
-                func.lower(Tag.name) == tag_name.lower()
-            ).first()
-            
-            if not tag:
-                tag = Tag(user_id=current_user_id, name=tag_name)
-                db.session.add(tag)
-                db.session.flush()  # Get ID
-            
-            item.tags.append(tag)
+        # Handle tags: one lookup, one bulk insert of missing tags, one insert of links
+        if tag_names:
+            tag_ids = tag_service.resolve(current_user_id, tag_names)
+            tag_service.set_item_tags(item.id, tag_ids.values(), current=())
         
         # Promote pending uploads
         from app.models.pending_upload import PendingUpload
@@ -146,7 +184,6 @@ def create_item():
             if 'public_id' in img:
                 PendingUpload.query.filter_by(public_id=img['public_id']).delete()
         
-        db.session.add(item)
         db.session.commit()
         
         return jsonify(item.to_dict()), 201
@@ -156,6 +193,109 @@ def create_item():
         print(f"Create item error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def create_items_bulk():
+    """Create many items in one transaction; invalid rows are reported, not fatal"""
+    data = request.get_json(silent=True) or {}
+    rows = data.get('items') if isinstance(data, dict) else None
+    current_user_id = get_jwt_identity()
+    
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    max_rows = current_app.config.get('ITEMS_BULK_MAX_ROWS', 500)
+    if len(rows) > max_rows:
+        return jsonify({'error': f'Too many items (max {max_rows})'}), 400
+    
+    try:
+        created, errors = item_bulk.create_items(current_user_id, rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk create items error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    return jsonify({'created': created, 'errors': errors}), 201 if created else 400
+
+@bp.route('/bulk', methods=['PATCH'])
+@jwt_required()
+def update_items_bulk():
+    """
+    Apply one change to many items: explicit ``ids`` in the body, or the
+    get_items filter parameters in the query string.
+    
+    Body: any of status, needs_review, difficulty, collection_id,
+    add_tags, remove_tags.
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body required'}), 400
+    
+    values = {}
+    if 'status' in data:
+        # Match DB CHECK constraint - no NEED_REVIEW
+        if data['status'] not in item_bulk.ITEM_STATUSES:
+            return jsonify({'error': f'Invalid status. Allowed: {list(item_bulk.ITEM_STATUSES)}'}), 400
+        values['status'] = data['status']
+    if 'needs_review' in data:
+        if not isinstance(data['needs_review'], bool):
+            return jsonify({'error': 'needs_review must be a boolean'}), 400
+        values['needs_review'] = data['needs_review']
+    if 'difficulty' in data:
+        difficulty = data['difficulty']
+        if isinstance(difficulty, bool) or not isinstance(difficulty, int) or not 1 <= difficulty <= 5:
+            return jsonify({'error': 'difficulty must be an integer between 1 and 5'}), 400
+        values['difficulty'] = difficulty
+    if 'collection_id' in data:
+        collection_id = data['collection_id']
+        # Security: Validate collection ownership
+        if collection_id:
+            collection = Collection.query.get(collection_id) if isinstance(collection_id, int) else None
+            if not collection:
+                return jsonify({'error': 'Invalid collection_id: Collection not found'}), 404
+            if str(collection.user_id) != str(current_user_id):
+                return jsonify({'error': 'Invalid collection_id: Access denied'}), 403
+            # Same subject derivation as update_item
+            if collection.type == 'SUBJECT':
+                values['subject'] = collection.name
+        values['collection_id'] = collection_id or None
+    
+    for key in ('add_tags', 'remove_tags'):
+        names = data.get(key, [])
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            return jsonify({'error': f'{key} must be a list of tag names'}), 400
+    try:
+        add_tags = tag_service.clean_names(data.get('add_tags'))
+        remove_tags = tag_service.clean_names(data.get('remove_tags'))
+    except tag_service.InvalidTagName as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not values and not add_tags and not remove_tags:
+        return jsonify({'error': 'No changes requested'}), 400
+    
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'ids must be a list of integers'}), 400
+    elif any(name in request.args for name in ITEM_FILTER_ARGS):
+        ids = [item_id for (item_id,) in _filtered_items_query(
+            request.args, current_user_id
+        ).with_entities(Item.id)]
+    else:
+        # Refuse to touch every item by accident
+        return jsonify({'error': 'Provide ids or at least one filter'}), 400
+    
+    try:
+        counts = item_bulk.update_items(current_user_id, ids, values, add_tags, remove_tags)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Bulk update items error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    return jsonify(counts), 200
+
 @bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
 def get_item(id):
@@ -183,6 +323,11 @@ def update_item(id):
         data = item_schema_partial.load(data)
     except ValidationError as e:
         return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
+    
+    try:
+        tag_names = tag_service.clean_names(data.get('tags', []))
+    except tag_service.InvalidTagName as e:
+        return jsonify({'error': str(e)}), 400
         
     try:
         # Track subject to allow derivation when only collection changes
@@ -214,6 +359,8 @@ def update_item(id):
         if 'content_text' in data:
             item.content_text = data['content_text']
         if 'images' in data:
+            if image_index.attached_elsewhere(data['images'], item_id=item.id):
+                return jsonify({'error': 'Image is already attached to another item'}), 409
             item.set_images(data['images'])
             # Promote pending uploads
             from app.models.pending_upload import PendingUpload
@@ -223,33 +370,14 @@ def update_item(id):
         
         # Handle tags update
         # NOTE: Tags are replaced entirely, not merged. Send full list to update.
+        # Only the item_tags rows that differ are written.
         if 'tags' in data:
-            # Clear existing tags
-            item.tags = []
-            
-            # Add new tags
-            tag_names = data.get('tags', [])
-            for tag_name in tag_names:
-                tag_name = tag_name.strip()
-                
-                # Validation
-                if not tag_name:
-                    return jsonify({'error': 'Tag name cannot be empty'}), 400
-                if len(tag_name) > 30:
-                    return jsonify({'error': 'Tag name cannot exceed 30 characters'}), 400
-                
-                # Find or create tag (case-insensitive)
-                tag = Tag.query.filter(
-                    Tag.user_id == current_user_id,
-                    func.lower(Tag.name) == tag_name.lower()
-                ).first()
-                
-                if not tag:
-                    tag = Tag(user_id=current_user_id, name=tag_name)
-                    db.session.add(tag)
-                    db.session.flush()  # Get ID
-                
-                item.tags.append(tag)
+            tag_ids = tag_service.resolve(current_user_id, tag_names)
+            if tag_service.set_item_tags(item.id, tag_ids.values()):
+                # The loaded collection no longer matches the rows
+                db.session.expire(item, ['tags'])
+                # Tag edits are item edits for updated_at and delta sync
+                item.updated_at = datetime.utcnow()
 
         # Apply subject updates after derivation logic
         if subject_value != item.subject:
@@ -278,13 +406,13 @@ def rotate_image(id):
     if data is None:
         return jsonify({'error': 'Invalid or missing JSON body'}), 400
         
-    image_index = data.get('image_index')
-    if image_index is None:
-        image_index = 0
+    position = data.get('image_index')
+    if position is None:
+        position = 0
     
     # Ensure image_index is an integer
     try:
-        image_index = int(image_index)
+        position = int(position)
     except (TypeError, ValueError):
         return jsonify({'error': 'image_index must be an integer'}), 400
         
@@ -295,17 +423,17 @@ def rotate_image(id):
         return jsonify({'error': 'Invalid rotation'}), 400
     
     # Update JSON
-    if not item.images or image_index >= len(item.images):
+    if not item.images or position >= len(item.images):
         return jsonify({'error': 'Invalid image index'}), 400
         
     # Copy list to trigger SQLAlchemy change detection
     images = list(item.images)
     
     # Ensure image object is dict
-    if not isinstance(images[image_index], dict):
-        images[image_index] = {'url': images[image_index]}
+    if not isinstance(images[position], dict):
+        images[position] = {'url': images[position]}
     
-    images[image_index]['rotation'] = rotation
+    images[position]['rotation'] = rotation
     item.images = images
     flag_modified(item, 'images')
     
@@ -316,7 +444,7 @@ def rotate_image(id):
     
     return jsonify({
         'rotation': rotation,
-        'image_index': image_index,
+        'image_index': position,
         'updated_at': item.updated_at.isoformat()
     })
 
@@ -331,12 +459,8 @@ def delete_item(id):
         return jsonify({'error': 'Unauthorized'}), 403
         
     try:
-        # Cleanup Cloudinary images
-        images = item.get_images()
-        for img in images:
-            if 'public_id' in img:
-                cloudinary.uploader.destroy(img['public_id'])
-                
+        # Stored images are removed by the deletion outbox after commit
+        deletion_outbox.enqueue_item_images(item.get_images())
         db.session.delete(item)
         db.session.commit()
         return jsonify({'message': 'Item deleted successfully'}), 200
@@ -0,0 +1,25 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services import change_log
+
+bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+@bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """
+    Items, collections and tags changed after ``since`` (a token from a
+    previous response; omit it for a full sync), with tombstones for deletes.
+    Keep polling with ``next_since`` while ``has_more`` is true.
+    """
+    current_user_id = get_jwt_identity()
+    
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'error': 'Invalid since token'}), 400
+    
+    max_limit = current_app.config.get('SYNC_PAGE_SIZE', 500)
+    limit = request.args.get('limit', max_limit, type=int)
+    limit = max(1, min(limit, max_limit))
+    
+    return jsonify(change_log.changes_since(int(current_user_id), int(since), limit)), 200
@@ -1,10 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file, abort, copy_current_request_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import cloudinary.uploader
-import cloudinary.api
+from sqlalchemy import insert
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import uuid
+from datetime import datetime
 from app import db
 from app.models.pending_upload import PendingUpload
-from app.models.item import Item
+from app.models.image_hash import ImageHash
+from app.services import image_dedup, image_index, image_variants
+from app.services import storage as storage_service
+from app.services.storage import LocalStorage, NotFound, StorageUnavailable, get_storage, sniff_format
 
 bp = Blueprint('upload', __name__, url_prefix='/api/upload')
 
@@ -12,6 +18,8 @@ bp = Blueprint('upload', __name__, url_prefix='/api/upload')
 print("--- UPLOAD BLUEPRINT LOADED (15MB Fix v2) ---", flush=True)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+UPLOAD_FOLDER = 'selective-questions'
+MAX_UPLOAD_BYTES = 15 * 1024 * 1024  # 15MB
 
 import inspect
 import os
@@ -58,37 +66,50 @@ def upload_image():
             
             print(f"File upload: {file.filename}, Size: {size} bytes", flush=True)
             
-            if size > 15 * 1024 * 1024: # 15MB
+            if size > MAX_UPLOAD_BYTES:
                 return jsonify({'error': f'File too large (max 15MB), got {size/1024/1024:.2f}MB'}), 400
             
             current_user_id = get_jwt_identity()
+            user_id = int(current_user_id)
             
-            upload_result = cloudinary.uploader.upload(
-                file,
-                folder="selective-questions",
-                resource_type="image"
-            )
+            # Same bytes already uploaded and not yet attached: hand the asset back.
+            # (Attached assets can't be shared between items; those surface below
+            # as near duplicates at distance 0.)
+            sha256 = image_dedup.sha256_stream(file.stream)
+            reused = _reuse_pending(user_id, sha256)
+            if reused:
+                db.session.commit()
+                return jsonify(reused), 200
+            
+            # Normalize orientation/size and build variants off the request thread
+            try:
+                rendered, phash = image_variants.process_upload(file.read(), current_app.config)
+            except image_variants.InvalidImage:
+                return jsonify({'error': 'File is not a readable image'}), 400
+            
+            near_duplicates = image_dedup.find_similar(user_id, phash)
+            stored = _store_rendered(get_storage(), rendered)
             
             # Track this upload in database (multi-worker safe)
-            public_id = upload_result['public_id']
             pending_upload = PendingUpload(
-                public_id=public_id,
-                user_id=int(current_user_id)
+                public_id=stored['public_id'],
+                user_id=user_id
             )
             db.session.add(pending_upload)
+            db.session.add(ImageHash(user_id=user_id, sha256=sha256, phash=phash, **stored))
             db.session.commit()
             
-            # Cleanup expired uploads periodically (async in production)
-            try:
-                PendingUpload.cleanup_expired()
-            except Exception as e:
-                print(f"Cleanup warning: {e}")
+            # Expired uploads are cleaned up by the background sweeper
+            # (flask uploads sweep / PENDING_UPLOAD_SWEEP_INTERVAL)
             
-            return jsonify({
-                'url': upload_result['secure_url'],
-                'public_id': public_id
-            }), 201
+            response = dict(stored)
+            if near_duplicates:
+                response['near_duplicates'] = near_duplicates
+            return jsonify(response), 201
             
+        except StorageUnavailable:
+            db.session.rollback()
+            return jsonify({'error': 'Image storage is temporarily unavailable'}), 503
         except Exception as e:
             db.session.rollback()
             print(f"Upload error: {str(e)}")
@@ -96,6 +117,254 @@ def upload_image():
             
     return jsonify({'error': 'Invalid file type'}), 400
 
+def _reuse_pending(user_id, sha256):
+    """
+    Response for an identical upload that is still pending, else None.
+
+    Refreshes the pending row's timestamp so the sweeper leaves it alone;
+    the caller commits.
+    """
+    existing = image_dedup.find_exact(user_id, sha256)
+    if not existing:
+        return None
+    pending_upload = db.session.get(PendingUpload, existing.public_id)
+    if not pending_upload:
+        return None
+    pending_upload.created_at = datetime.utcnow()
+    return {
+        'url': existing.url,
+        'public_id': existing.public_id,
+        'variants': existing.variants,
+        'duplicate': True
+    }
+
+
+def _store_rendered(storage, rendered):
+    """Put the full rendition and its variants; returns {'url', 'public_id', 'variants'}"""
+    return image_variants.store_rendered(storage, rendered, UPLOAD_FOLDER)
+
+
+def _render_and_store(data, storage):
+    """Pipeline for one batch file; runs on a pool thread"""
+    rendered, phash = image_variants.process_upload(data, current_app.config)
+    return _store_rendered(storage, rendered), phash
+
+
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+def upload_batch():
+    """
+    Upload several images in one multipart request (field name ``files``).
+
+    Rendering and storage run concurrently on a bounded thread pool; all
+    PendingUpload/ImageHash rows are then written with one bulk insert each.
+    Returns per-file results in request order, each with its own status.
+    """
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+
+    max_files = current_app.config['UPLOAD_BATCH_MAX_FILES']
+    if len(files) > max_files:
+        return jsonify({'error': f'Too many files (max {max_files})'}), 400
+
+    user_id = int(get_jwt_identity())
+    results = []
+    jobs = {}           # result index -> (data, sha256)
+    same_as = {}        # result index -> index of an identical file earlier in the batch
+    first_by_sha = {}
+
+    try:
+        for index, file in enumerate(files):
+            result = {'filename': file.filename}
+            results.append(result)
+
+            if not file.filename or not allowed_file(file.filename):
+                result.update(status=400, error='Invalid file type')
+                continue
+            file.seek(0, 2)
+            size = file.tell()
+            file.seek(0)
+            if size > MAX_UPLOAD_BYTES:
+                result.update(status=400, error=f'File too large (max 15MB), got {size/1024/1024:.2f}MB')
+                continue
+
+            sha256 = image_dedup.sha256_stream(file.stream)
+            if sha256 in first_by_sha:
+                same_as[index] = first_by_sha[sha256]
+                continue
+            first_by_sha[sha256] = index
+
+            reused = _reuse_pending(user_id, sha256)
+            if reused:
+                result.update(status=200, **reused)
+                continue
+            jobs[index] = (file.read(), sha256)
+
+        storage = get_storage()
+        pending_rows, hash_rows = [], []
+        if jobs:
+            workers = min(current_app.config['UPLOAD_BATCH_WORKERS'], len(jobs))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Each task gets its own copy of the request context (config, url_for)
+                futures = {
+                    index: pool.submit(copy_current_request_context(_render_and_store), data, storage)
+                    for index, (data, _) in jobs.items()
+                }
+                for index, future in futures.items():
+                    try:
+                        stored, phash = future.result()
+                    except image_variants.InvalidImage:
+                        results[index].update(status=400, error='File is not a readable image')
+                        continue
+                    except StorageUnavailable:
+                        results[index].update(status=503, error='Image storage is temporarily unavailable')
+                        continue
+                    except Exception as e:
+                        print(f"Batch upload error ({results[index]['filename']}): {str(e)}")
+                        results[index].update(status=500, error='Upload failed')
+                        continue
+
+                    results[index].update(status=201, **stored)
+                    near_duplicates = image_dedup.find_similar(user_id, phash)
+                    if near_duplicates:
+                        results[index]['near_duplicates'] = near_duplicates
+                    pending_rows.append({'public_id': stored['public_id'], 'user_id': user_id})
+                    hash_rows.append({'user_id': user_id, 'sha256': jobs[index][1], 'phash': phash, **stored})
+
+        if pending_rows:
+            db.session.execute(insert(PendingUpload), pending_rows)
+            db.session.execute(insert(ImageHash), hash_rows)
+        db.session.commit()
+
+    except StorageUnavailable:
+        db.session.rollback()
+        return jsonify({'error': 'Image storage is temporarily unavailable'}), 503
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch upload error: {str(e)}")
+        return jsonify({'error': 'Upload failed'}), 500
+
+    for index, first in same_as.items():
+        results[index].update(results[first], filename=results[index]['filename'])
+        if results[index]['status'] in (200, 201):
+            results[index].update(status=200, duplicate=True)
+            results[index].pop('near_duplicates', None)
+
+    return jsonify({
+        'results': results,
+        'uploaded': sum(1 for r in results if r['status'] in (200, 201)),
+        'failed': sum(1 for r in results if r['status'] >= 400)
+    }), 200
+
+
+def _destroy_variants(storage, public_id):
+    try:
+        storage.delete_many(image_variants.variant_public_ids(public_id))
+    except Exception as e:
+        print(f"Variant cleanup warning for {public_id}: {e}")
+
+
+def _direct_upload_prefix(user_id):
+    """public_ids handed out by /signature are namespaced per user"""
+    return f"{UPLOAD_FOLDER}/u{user_id}-"
+
+
+@bp.route('/signature', methods=['POST'])
+@jwt_required()
+def upload_signature():
+    """
+    Signed parameters for uploading straight from the browser to storage.
+
+    The client POSTs the file plus these fields to upload_url, then calls
+    /confirm with the resulting public_id. The signed params make storage
+    normalize the file and render the variants like /api/upload does.
+    Cloudinary rejects signatures whose timestamp is more than an hour old.
+    """
+    current_user_id = get_jwt_identity()
+    payload = get_storage().signed_upload(
+        UPLOAD_FOLDER,
+        # Cloudinary prefixes the folder, giving selective-questions/u<id>-<hex>
+        f"u{current_user_id}-{uuid.uuid4().hex}",
+        sorted(ALLOWED_EXTENSIONS)
+    )
+    if payload is None:
+        return jsonify({'error': 'Direct uploads are not configured'}), 503
+
+    return jsonify({'max_file_size': MAX_UPLOAD_BYTES, **payload}), 200
+
+
+@bp.route('/confirm', methods=['POST'])
+@jwt_required()
+def confirm_upload():
+    """Register a direct upload as a PendingUpload once it has landed in storage"""
+    data = request.get_json() or {}
+    public_id = data.get('public_id')
+
+    if not public_id:
+        return jsonify({'error': 'public_id is required'}), 400
+
+    current_user_id = get_jwt_identity()
+    if not public_id.startswith(_direct_upload_prefix(current_user_id)):
+        return jsonify({'error': 'Unauthorized: Invalid public_id'}), 403
+
+    try:
+        existing = PendingUpload.query.filter_by(public_id=public_id).first()
+        if existing or image_index.find_owner(public_id) is not None:
+            return jsonify({'error': 'Upload already confirmed'}), 409
+
+        # Don't trust client-reported size/format; ask storage
+        storage = get_storage()
+        try:
+            resource = storage.info(public_id)
+        except NotFound:
+            return jsonify({'error': 'Upload not found in storage'}), 404
+
+        if resource['format'] not in ALLOWED_EXTENSIONS or resource['bytes'] > MAX_UPLOAD_BYTES:
+            storage.delete(public_id)
+            return jsonify({'error': 'Uploaded file exceeds size or format limits'}), 400
+
+        # Storage already normalized the file (signed incoming transformation);
+        # hash what was stored so re-uploads are caught like on /api/upload
+        data = storage.read(public_id)
+        try:
+            phash = image_variants.stored_image_hash(data)
+        except image_variants.InvalidImage:
+            storage.delete(public_id)
+            return jsonify({'error': 'File is not a readable image'}), 400
+
+        user_id = int(current_user_id)
+        sha256 = hashlib.sha256(data).hexdigest()
+        reused = _reuse_pending(user_id, sha256)
+        if reused:
+            db.session.commit()
+            storage.delete(public_id)
+            return jsonify(reused), 200
+
+        near_duplicates = image_dedup.find_similar(user_id, phash)
+        stored = {
+            'url': resource['url'],
+            'public_id': public_id,
+            'variants': storage.direct_upload_variants(public_id)
+        }
+        db.session.add(PendingUpload(public_id=public_id, user_id=user_id))
+        db.session.add(ImageHash(user_id=user_id, sha256=sha256, phash=phash, **stored))
+        db.session.commit()
+
+        response = dict(stored)
+        if near_duplicates:
+            response['near_duplicates'] = near_duplicates
+        return jsonify(response), 201
+
+    except StorageUnavailable:
+        db.session.rollback()
+        return jsonify({'error': 'Image storage is temporarily unavailable'}), 503
+    except Exception as e:
+        db.session.rollback()
+        print(f"Confirm upload error: {str(e)}")
+        return jsonify({'error': 'Upload confirmation failed'}), 500
+
+
 @bp.route('', methods=['DELETE'])
 @jwt_required()
 def delete_image():
@@ -108,18 +377,8 @@ def delete_image():
     current_user_id = get_jwt_identity()
     
     try:
-        # Check if image belongs to user's items (formerly questions)
-        items = Item.query.filter_by(author_id=current_user_id).all()
-        
-        image_found = False
-        for item in items:
-            images = item.get_images()
-            for img in images:
-                if img.get('public_id') == public_id:
-                    image_found = True
-                    break
-            if image_found:
-                break
+        # Check if image belongs to user's items (one lookup on item_images)
+        image_found = str(image_index.find_owner(public_id)) == str(current_user_id)
         
         # If not in items, check pending uploads (DB-backed, multi-worker safe)
         pending_upload = None
@@ -139,19 +398,47 @@ def delete_image():
                 # Not in items and not in pending uploads - unauthorized
                 return jsonify({'error': 'Unauthorized: Image not found or does not belong to you'}), 403
         
-        # Delete from Cloudinary FIRST
-        result = cloudinary.uploader.destroy(public_id)
-        if result.get('result') == 'ok' or result.get('result') == 'not found':
+        # Delete from storage FIRST (variants are best-effort)
+        storage = get_storage()
+        _destroy_variants(storage, public_id)
+        if storage.delete(public_id):
             # Only now remove from database (if it was a pending upload)
             if not image_found and pending_upload:
                 db.session.delete(pending_upload)
+                image_dedup.forget([public_id])
                 db.session.commit()
             return jsonify({'message': 'Image deleted successfully'}), 200
         else:
             # Cloudinary failed - don't touch database, user can retry
             return jsonify({'error': 'Failed to delete image from storage'}), 400
             
+    except StorageUnavailable:
+        db.session.rollback()
+        return jsonify({'error': 'Image storage is temporarily unavailable'}), 503
     except Exception as e:
         db.session.rollback()
         print(f"Delete image error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
+
+
+@bp.route('/files/<path:public_id>', methods=['GET'])
+def serve_file(public_id):
+    """Serve an image from the local storage backend (Range and conditional GET aware)"""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    try:
+        path = storage.path_for(public_id)
+        with open(path, 'rb') as f:
+            _, mimetype = sniff_format(f.read(16))
+    except (NotFound, FileNotFoundError):
+        abort(404)
+    # Content never changes under a public_id, so let clients cache it for good
+    return send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=31536000)
+
+
+@bp.route('/storage-status', methods=['GET'])
+@jwt_required()
+def storage_status():
+    """Circuit breaker state and storage call latency for this worker process"""
+    return jsonify(storage_service.status()), 200
@@ -6,6 +6,8 @@ class ImageSchema(Schema):
     url = fields.String(required=True)
     public_id = fields.String(required=True)
     rotation = fields.Integer(load_default=0, validate=validate.OneOf([0, 90, 180, 270]))
+    # Resized renditions from the upload pipeline: {'thumb': url, 'medium': url, 'full': url}
+    variants = fields.Dict(keys=fields.String(), values=fields.String())
 
 class ItemSchema(Schema):
     id = fields.Integer(dump_only=True)
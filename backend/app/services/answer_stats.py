@@ -0,0 +1,57 @@
+"""
+Per-item answer statistics (attempts, correct_count, success_rate)
+
+Counters are bumped with a single atomic UPDATE per submission instead of
+recounting the item's answer history, so concurrent submissions can't lose
+updates and cost doesn't grow with the number of answers.
+"""
+from sqlalchemy import update, select, func, case, literal
+
+from app import db
+from app.models.item import Item
+from app.models.answer import Answer
+
+
+def record_answer(item_id, is_correct):
+    """Atomically add one attempt to the item's counters"""
+    table = Item.__table__
+    correct = 1 if is_correct else 0
+    attempts = func.coalesce(table.c.attempts, 0)
+    correct_count = func.coalesce(table.c.correct_count, 0)
+
+    # success_rate goes first: MySQL evaluates SET assignments left to right
+    # against already-updated values, SQLite against the old row. Listing it
+    # first and deriving it from the old values is correct on both.
+    stmt = update(table).where(table.c.id == item_id).ordered_values(
+        (table.c.success_rate, func.round((correct_count + correct) * 100.0 / (attempts + 1), 1)),
+        (table.c.attempts, attempts + 1),
+        (table.c.correct_count, correct_count + correct),
+    )
+    db.session.execute(stmt)
+
+
+def recompute_answer_stats(item_id=None):
+    """Recompute counters from answers for every item (or one) in one statement"""
+    table = Item.__table__
+    total = select(func.count(Answer.id)).where(
+        Answer.item_id == table.c.id
+    ).scalar_subquery()
+    correct = select(func.count(Answer.id)).where(
+        Answer.item_id == table.c.id, Answer.is_correct == True
+    ).scalar_subquery()
+
+    # Each assignment uses the subqueries directly so SET order doesn't matter
+    stmt = update(table).values(
+        attempts=total,
+        correct_count=correct,
+        success_rate=case(
+            (total == 0, literal(0.0)),
+            else_=func.round(correct * 100.0 / total, 1)
+        ),
+        updated_at=table.c.updated_at
+    )
+    if item_id is not None:
+        stmt = stmt.where(table.c.id == item_id)
+    result = db.session.execute(stmt)
+    db.session.commit()
+    return result.rowcount
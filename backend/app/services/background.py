@@ -0,0 +1,38 @@
+"""
+In-process periodic jobs
+
+For deployments without cron: each job runs on a daemon thread inside
+every gunicorn worker, and the job itself takes a JobLease so only one
+worker does the work per tick.
+"""
+import os
+import socket
+import threading
+import time
+
+from app import db
+
+
+def lease_owner():
+    """JobLease owner id for the current process/thread"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def start_periodic_job(app, name, interval_seconds, job):
+    """Call job() every interval_seconds in an app context; job returns a report dict"""
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            with app.app_context():
+                try:
+                    report = job()
+                    if report.get('acquired'):
+                        print(f"{name}: {report}", flush=True)
+                except Exception as e:
+                    print(f"{name} error: {e}", flush=True)
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
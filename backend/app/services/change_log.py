@@ -0,0 +1,180 @@
+"""
+Change log behind delta sync (GET /api/sync/changes)
+
+Mapper events append a change_log row for every ORM insert, update and
+delete of an Item, Collection or Tag inside the same flush, so the log
+commits or rolls back with the change. Writes that bypass mapper events
+log themselves: bulk inserters call ``record()`` with the new ids and bulk
+updaters/deleters call ``record_items()`` with their criteria before the
+statement.
+
+Seqs are taken from the user's change_seqs row rather than an
+autoincrement: bumping that row locks it until the transaction ends, so a
+user's concurrent writers (two devices, an import next to interactive
+edits) commit their log rows in seq order and a poll can never return a
+``since`` past a seq that is still uncommitted.
+
+Clients keep the highest ``seq`` they have seen and ask for what came
+after it; ``changes_since()`` collapses repeated changes to the latest
+state and turns deleted rows (and soft-deleted collections) into
+tombstones.
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.change_log import ChangeLog, ChangeSeq
+from app.models.collection import Collection
+from app.models.item import Item
+from app.models.tag import Tag
+from app.utils.loaders import prime_item_tags
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# entity name -> (model, owner column)
+ENTITIES = {
+    'item': (Item, 'author_id'),
+    'collection': (Collection, 'user_id'),
+    'tag': (Tag, 'user_id'),
+}
+
+_table = ChangeLog.__table__
+_seqs = ChangeSeq.__table__
+
+
+def _next_seqs(connection, user_id, count):
+    """Reserve ``count`` seqs for user_id and return the first; locks the user's row"""
+    bump = update(_seqs).where(_seqs.c.user_id == user_id).values(last_seq=_seqs.c.last_seq + count)
+    if connection.execute(bump).rowcount == 0:
+        # First change for this user; a concurrent first change may insert the row too
+        if connection.dialect.name == 'sqlite':
+            stmt = sqlite_insert(_seqs).on_conflict_do_nothing()
+        else:
+            stmt = insert(_seqs).prefix_with('IGNORE')
+        connection.execute(stmt, {'user_id': user_id, 'last_seq': 0})
+        connection.execute(bump)
+    last_seq = connection.execute(select(_seqs.c.last_seq).where(_seqs.c.user_id == user_id)).scalar()
+    return last_seq - count + 1
+
+
+def _append(connection, user_id, entity, entity_ids, op):
+    first = _next_seqs(connection, user_id, len(entity_ids))
+    connection.execute(insert(_table), [
+        {'user_id': user_id, 'seq': first + i, 'entity': entity, 'entity_id': entity_id, 'op': op}
+        for i, entity_id in enumerate(entity_ids)
+    ])
+
+
+def _log_event(entity, op, only_if_changed=False):
+    owner_column = ENTITIES[entity][1]
+
+    def listener(mapper, connection, target):
+        if only_if_changed and not _has_changes(target):
+            return
+        user_id = getattr(target, owner_column)
+        if user_id is None:
+            return
+        _append(connection, user_id, entity, [target.id], op)
+    return listener
+
+
+def _has_changes(target):
+    """after_update also fires for instances flushed without net column changes"""
+    state = inspect(target)
+    return any(state.attrs[attr.key].history.has_changes() for attr in state.mapper.column_attrs)
+
+
+for _entity, (_model, _) in ENTITIES.items():
+    event.listen(_model, 'after_insert', _log_event(_entity, UPSERT))
+    event.listen(_model, 'after_update', _log_event(_entity, UPSERT, only_if_changed=True))
+    event.listen(_model, 'after_delete', _log_event(_entity, DELETE))
+
+
+def record(user_id, entity, entity_ids, op=UPSERT):
+    """Log changes made without mapper events (no commit)"""
+    entity_ids = list(entity_ids)
+    if entity_ids:
+        _append(db.session.connection(), int(user_id), entity, entity_ids, op)
+
+
+def record_items(*criteria, op=UPSERT):
+    """Log every item matching criteria, before a bulk update/delete"""
+    rows = db.session.execute(
+        select(Item.author_id, Item.id).where(Item.author_id.isnot(None), *criteria)
+        .order_by(Item.author_id, Item.id)
+    )
+    # Ascending user order, so writers touching several users can't deadlock
+    for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+        record(user_id, 'item', [item_id for _, item_id in user_rows], op)
+
+
+def latest_changes(user_id, since, limit):
+    """
+    ({(entity, id): op}, next_since, has_more) for up to ``limit`` log rows
+    after ``since``. Later rows for the same entity win.
+    """
+    rows = db.session.execute(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op).where(
+            ChangeLog.user_id == user_id, ChangeLog.seq > since
+        ).order_by(ChangeLog.seq).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for seq, entity, entity_id, op in rows:
+        latest[(entity, entity_id)] = op
+    return latest, (rows[-1].seq if rows else since), has_more
+
+
+def _load(entity, user_id, ids):
+    model, owner_column = ENTITIES[entity]
+    rows = model.query.filter(model.id.in_(ids), getattr(model, owner_column) == user_id).all()
+    if model is Item:
+        prime_item_tags(rows)
+    return rows
+
+
+def changes_since(user_id, since, limit):
+    """Sync payload: current rows of changed entities plus tombstones"""
+    latest, next_since, has_more = latest_changes(user_id, since, limit)
+
+    changed = {entity: [] for entity in ENTITIES}
+    deleted = {entity: [] for entity in ENTITIES}
+    upserts = {entity: set() for entity in ENTITIES}
+    for (entity, entity_id), op in latest.items():
+        if op == UPSERT:
+            upserts[entity].add(entity_id)
+        else:
+            deleted[entity].append(entity_id)
+
+    for entity, ids in upserts.items():
+        if not ids:
+            continue
+        found = set()
+        for row in _load(entity, user_id, ids):
+            found.add(row.id)
+            # A collection in the trash is gone as far as clients are concerned
+            if entity == 'collection' and row.is_deleted:
+                deleted[entity].append(row.id)
+            else:
+                changed[entity].append(row.to_dict())
+        # Deleted again after this page's window
+        deleted[entity].extend(ids - found)
+
+    return {
+        'items': changed['item'],
+        'collections': changed['collection'],
+        'tags': changed['tag'],
+        'deleted': {
+            'items': sorted(deleted['item']),
+            'collections': sorted(deleted['collection']),
+            'tags': sorted(deleted['tag']),
+        },
+        'next_since': str(next_since),
+        'has_more': has_more,
+    }
@@ -0,0 +1,146 @@
+"""
+Transactional outbox for deleting stored images
+
+Request handlers call ``enqueue()`` inside the transaction that removes the
+DB reference, so the delete costs no remote round trips and a storage
+outage can no longer roll it back. ``drain()`` (``flask uploads
+drain-deletions`` or the DELETION_OUTBOX_INTERVAL timer) sends due rows to
+the storage backend in bulk batches under a JobLease; failed ids are
+retried with exponential backoff up to DELETION_OUTBOX_MAX_ATTEMPTS.
+"""
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.models.job_lease import JobLease
+from app.models.storage_deletion import StorageDeletion
+from app.services.background import lease_owner, start_periodic_job
+from app.services.image_variants import variant_public_ids
+from app.services.storage import StorageUnavailable, get_storage
+
+LEASE_NAME = 'storage_deletion_outbox'
+
+# Bulk delete limit of the storage API
+BATCH_SIZE = 100
+
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+
+def enqueue(public_ids, with_variants=False):
+    """Queue assets for deletion in the current transaction (no commit)"""
+    rows = []
+    for public_id in public_ids:
+        rows.append({'public_id': public_id})
+        if with_variants:
+            rows.extend({'public_id': variant} for variant in variant_public_ids(public_id))
+    if rows:
+        now = datetime.utcnow()
+        for row in rows:
+            row.update(attempts=0, next_attempt_at=now, created_at=now)
+        db.session.execute(insert(StorageDeletion), rows)
+
+
+def enqueue_item_images(images):
+    """Queue every stored image (and its variants) of an Item.images list"""
+    plain, with_variants = [], []
+    for img in images or []:
+        if isinstance(img, dict) and img.get('public_id'):
+            (with_variants if img.get('variants') else plain).append(img['public_id'])
+    enqueue(plain)
+    enqueue(with_variants, with_variants=True)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+def drain(batch_size=BATCH_SIZE, max_attempts=10, lease_seconds=300):
+    """
+    Delete due outbox entries from storage.
+
+    Returns a report dict; ``acquired`` is False when another worker holds
+    the lease and nothing was done.
+    """
+    owner = lease_owner()
+    report = {'acquired': False, 'lease_lost': False, 'deleted': 0, 'failed': 0, 'batches': 0, 'duration_ms': 0.0}
+    if not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+        return report
+
+    report['acquired'] = True
+    started = time.perf_counter()
+    try:
+        _drain(report, owner, max(1, min(batch_size, BATCH_SIZE)), max_attempts, lease_seconds)
+    finally:
+        JobLease.release(LEASE_NAME, owner)
+        report['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def _drain(report, owner, batch_size, max_attempts, lease_seconds):
+    storage = get_storage()
+    now = datetime.utcnow()
+    last_id = 0
+
+    while True:
+        # Renew before each further batch; if another worker took the lease
+        # over it is draining the same rows, so leave them to it
+        if report['batches'] and not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+            print("Deletion outbox drain stopped: lease was taken over", flush=True)
+            report['lease_lost'] = True
+            break
+
+        # Keyset over id: rows that fail now are rescheduled, not re-read this run
+        batch = db.session.execute(
+            db.select(StorageDeletion.id, StorageDeletion.public_id, StorageDeletion.attempts).where(
+                StorageDeletion.attempts < max_attempts,
+                StorageDeletion.next_attempt_at <= now,
+                StorageDeletion.id > last_id
+            ).order_by(StorageDeletion.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        report['batches'] += 1
+
+        try:
+            statuses = storage.delete_many(sorted({row.public_id for row in batch}))
+            error = None
+        except StorageUnavailable as e:
+            _reschedule(batch, str(e))
+            report['failed'] += len(batch)
+            db.session.commit()
+            break
+        except Exception as e:
+            statuses, error = {}, str(e)
+
+        done = [row.id for row in batch if statuses.get(row.public_id) in ('deleted', 'not_found')]
+        failed = [row for row in batch if row.id not in set(done)]
+        if done:
+            db.session.execute(db.delete(StorageDeletion).where(StorageDeletion.id.in_(done)))
+        _reschedule(failed, error or 'storage did not confirm the delete')
+        db.session.commit()
+        report['deleted'] += len(done)
+        report['failed'] += len(failed)
+
+
+def _reschedule(rows, error):
+    now = datetime.utcnow()
+    for row in rows:
+        db.session.execute(
+            update(StorageDeletion).where(StorageDeletion.id == row.id).values(
+                attempts=row.attempts + 1,
+                next_attempt_at=now + _retry_delay(row.attempts + 1),
+                last_error=error[:500]
+            )
+        )
+
+
+def start_background_drainer(app, interval_seconds):
+    """Run drain every interval_seconds on a daemon thread"""
+    return start_periodic_job(
+        app, 'storage-deletion-outbox', interval_seconds,
+        lambda: drain(max_attempts=app.config['DELETION_OUTBOX_MAX_ATTEMPTS'])
+    )
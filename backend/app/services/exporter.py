@@ -0,0 +1,111 @@
+"""
+Streaming NDJSON export of one user's data (GET /api/export)
+
+Every record is one JSON line tagged with ``record`` (export header,
+collection, tag, item, answer). Rows are read through server-side cursors
+(``yield_per``) and written out as they arrive, so memory stays flat and
+the first bytes leave before the big tables are read. Item tags come from
+the same cursor as the items (outer join ordered by item id) because
+MySQL can't run a second query while a streaming cursor is open.
+Output is cut into ~64KB chunks and optionally gzip-compressed on the fly.
+"""
+import json
+import zlib
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import select
+
+from app import db
+from app.models.answer import Answer
+from app.models.collection import Collection
+from app.models.item import Item, item_tags
+from app.models.tag import Tag
+
+FORMAT_VERSION = 1
+
+# Rows fetched per round trip from the server-side cursor
+YIELD_PER = 500
+
+CHUNK_BYTES = 64 * 1024
+
+COLLECTION_FIELDS = ('id', 'name', 'type', 'icon', 'color', 'is_deleted', 'created_at')
+TAG_FIELDS = ('id', 'name', 'created_at')
+ITEM_FIELDS = (
+    'id', 'title', 'subject', 'collection_id', 'difficulty', 'status', 'needs_review',
+    'images', 'content_text', 'created_at', 'updated_at', 'attempts', 'correct_count',
+    'success_rate', 'review_interval', 'ease_factor', 'repetitions', 'due_at',
+)
+ANSWER_FIELDS = ('id', 'item_id', 'content', 'is_correct', 'duration_seconds', 'created_at')
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _stream(query):
+    return db.session.execute(query.execution_options(yield_per=YIELD_PER))
+
+
+def _records_of(kind, model, fields, *criteria):
+    columns = [getattr(model, f) for f in fields]
+    for row in _stream(select(*columns).where(*criteria).order_by(model.id)):
+        record = {'record': kind}
+        record.update((f, _json_value(v)) for f, v in zip(fields, row))
+        yield record
+
+
+def _item_records(user_id):
+    columns = [getattr(Item, f) for f in ITEM_FIELDS]
+    query = select(*columns, Tag.name).outerjoin(
+        item_tags, item_tags.c.item_id == Item.id
+    ).outerjoin(
+        Tag, Tag.id == item_tags.c.tag_id
+    ).where(Item.author_id == user_id).order_by(Item.id, Tag.id)
+
+    # One row per (item, tag): fold consecutive rows of the same item
+    for _, rows in groupby(_stream(query), key=lambda row: row[0]):
+        rows = list(rows)
+        record = {'record': 'item'}
+        record.update((f, _json_value(v)) for f, v in zip(ITEM_FIELDS, rows[0]))
+        record['tags'] = [row[-1] for row in rows if row[-1] is not None]
+        yield record
+
+
+def export_records(user_id):
+    """All of a user's records in dependency order (collections and tags before items)"""
+    yield {'record': 'export', 'version': FORMAT_VERSION, 'exported_at': datetime.utcnow().isoformat()}
+    yield from _records_of('collection', Collection, COLLECTION_FIELDS, Collection.user_id == user_id)
+    yield from _records_of('tag', Tag, TAG_FIELDS, Tag.user_id == user_id)
+    yield from _item_records(user_id)
+    yield from _records_of('answer', Answer, ANSWER_FIELDS, Answer.user_id == user_id)
+
+
+def ndjson_chunks(records, compress=False):
+    """Encode records as NDJSON bytes in ~CHUNK_BYTES pieces; the first record goes out alone"""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+
+    def emit(data, final=False):
+        if compressor is None:
+            return data
+        out = compressor.compress(data)
+        # Sync-flush so every chunk is decodable as soon as it arrives
+        return out + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    buffer = []
+    size = 0
+    first = True
+    for record in records:
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+        buffer.append(line)
+        size += len(line)
+        if first or size >= CHUNK_BYTES:
+            first = False
+            chunk = emit(b''.join(buffer))
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+
+    tail = emit(b''.join(buffer), final=True)
+    if tail:
+        yield tail
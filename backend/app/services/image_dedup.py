@@ -0,0 +1,173 @@
+"""
+Duplicate detection for uploaded images
+
+Exact duplicates are found by SHA-256 of the uploaded bytes, computed
+before any image processing so a re-upload costs one indexed lookup.
+Near duplicates (re-photographed pages) are found by Hamming distance
+between 64-bit difference hashes, searched with a per-user BK-tree.
+
+Trees are cached per process and refreshed from image_hashes when the
+user's row count or max id changes, so rows written by other workers are
+picked up with one cheap aggregate query per upload.
+"""
+import hashlib
+import threading
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models.image_hash import ImageHash
+from app.models.item_image import ItemImage
+from app.models.pending_upload import PendingUpload
+
+# Max differing bits (out of 64) for two images to count as near duplicates
+NEAR_DUPLICATE_DISTANCE = 6
+MAX_NEAR_DUPLICATES = 5
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def sha256_stream(stream):
+    """SHA-256 of a file-like object, read in chunks; rewinds it afterwards"""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance"""
+
+    def __init__(self):
+        self.root = None  # (hash, [payloads], {distance: child})
+
+    def add(self, value, payload):
+        if self.root is None:
+            self.root = (value, [payload], {})
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(payload)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (value, [payload], {})
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """[(distance, payload)] for every stored hash within max_distance"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= max_distance:
+                found.extend((d, payload) for payload in node[1])
+            # Triangle inequality: only children at d±max_distance can match
+            for edge, child in node[2].items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+_trees = {}  # user_id -> (tree, row_count, max_id)
+_trees_lock = threading.Lock()
+
+
+def _refresh_tree(user_id):
+    """Bring the cached tree for user_id up to date; caller holds _trees_lock"""
+    count, max_id = db.session.execute(
+        select(func.count(ImageHash.id), func.max(ImageHash.id)).where(ImageHash.user_id == user_id)
+    ).one()
+    max_id = max_id or 0
+
+    cached = _trees.get(user_id)
+    if cached and cached[1:] == (count, max_id):
+        return cached[0]
+
+    # Rows are only ever appended, except for stale-row cleanup; extend the
+    # cached tree when the new rows account for the whole difference
+    if cached and cached[2] <= max_id:
+        rows = db.session.execute(
+            select(ImageHash.id, ImageHash.phash)
+            .where(ImageHash.user_id == user_id, ImageHash.id > cached[2])
+        ).all()
+        if cached[1] + len(rows) == count:
+            tree = cached[0]
+            for row_id, phash in rows:
+                tree.add(int(phash, 16), row_id)
+            _trees[user_id] = (tree, count, max_id)
+            return tree
+
+    tree = BKTree()
+    for row_id, phash in db.session.execute(
+        select(ImageHash.id, ImageHash.phash).where(ImageHash.user_id == user_id)
+    ):
+        tree.add(int(phash, 16), row_id)
+    _trees[user_id] = (tree, count, max_id)
+    return tree
+
+
+def _live_public_ids(user_id, public_ids):
+    """Subset of public_ids still pending for the user or attached to one of their items"""
+    if not public_ids:
+        return set()
+    pending = db.session.execute(
+        select(PendingUpload.public_id).where(
+            PendingUpload.public_id.in_(public_ids), PendingUpload.user_id == user_id
+        )
+    ).scalars()
+    attached = db.session.execute(
+        select(ItemImage.public_id).where(
+            ItemImage.public_id.in_(public_ids), ItemImage.user_id == user_id
+        )
+    ).scalars()
+    return set(pending) | set(attached)
+
+
+def find_exact(user_id, sha256):
+    """
+    Most recent live ImageHash for these bytes, or None.
+
+    Stale rows (asset swept or deleted) found along the way are removed.
+    """
+    rows = ImageHash.query.filter_by(user_id=user_id, sha256=sha256).order_by(ImageHash.id.desc()).all()
+    live = _live_public_ids(user_id, [row.public_id for row in rows])
+    stale = [row.id for row in rows if row.public_id not in live]
+    if stale:
+        ImageHash.query.filter(ImageHash.id.in_(stale)).delete(synchronize_session=False)
+    return next((row for row in rows if row.public_id in live), None)
+
+
+def find_similar(user_id, phash, max_distance=NEAR_DUPLICATE_DISTANCE, limit=MAX_NEAR_DUPLICATES):
+    """Live near-duplicate images as [{'public_id', 'url', 'distance'}], closest first"""
+    with _trees_lock:
+        matches = sorted(_refresh_tree(user_id).search(int(phash, 16), max_distance))
+    if not matches:
+        return []
+
+    distances = dict((row_id, d) for d, row_id in reversed(matches))
+    rows = ImageHash.query.filter(ImageHash.id.in_(distances)).all()
+    live = _live_public_ids(user_id, [row.public_id for row in rows])
+
+    similar, seen = [], set()
+    for row in sorted(rows, key=lambda r: (distances[r.id], -r.id)):
+        if row.public_id in live and row.public_id not in seen:
+            seen.add(row.public_id)
+            similar.append({'public_id': row.public_id, 'url': row.url, 'distance': distances[row.id]})
+    return similar[:limit]
+
+
+def forget(public_ids):
+    """Drop hash rows for assets that were deleted from storage (no commit)"""
+    if public_ids:
+        ImageHash.query.filter(ImageHash.public_id.in_(public_ids)).delete(synchronize_session=False)
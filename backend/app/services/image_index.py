@@ -0,0 +1,94 @@
+"""
+Keeps item_images in sync with Item.images
+
+Mapper events rewrite an item's rows whenever its images JSON changes
+(create_item, update_item, rotate_image) and remove them before the item
+is deleted. Bulk ``Query.delete()`` skips mapper events, so bulk deleters
+call ``discard_items()`` with the same criteria first; bulk inserters call
+``index_items()`` with the new rows.
+"""
+from sqlalchemy import event, inspect, insert, delete, select
+
+from app import db
+from app.models.item import Item
+from app.models.item_image import ItemImage
+
+
+def image_rows(item_id, user_id, images):
+    """item_images rows for an images JSON list (entries without public_id are skipped)"""
+    rows = []
+    seen = set()
+    for position, img in enumerate(images or []):
+        if not isinstance(img, dict):
+            continue
+        public_id = img.get('public_id')
+        if not public_id or public_id in seen:
+            continue
+        seen.add(public_id)
+        rows.append({
+            'item_id': item_id,
+            'user_id': user_id,
+            'public_id': public_id,
+            'position': position,
+            'rotation': img.get('rotation') or 0
+        })
+    return rows
+
+
+def _write_rows(connection, target):
+    rows = image_rows(target.id, target.author_id, target.images)
+    if rows:
+        connection.execute(insert(ItemImage.__table__), rows)
+
+
+@event.listens_for(Item, 'after_insert')
+def _item_inserted(mapper, connection, target):
+    _write_rows(connection, target)
+
+
+@event.listens_for(Item, 'after_update')
+def _item_updated(mapper, connection, target):
+    if not inspect(target).attrs.images.history.has_changes():
+        return
+    connection.execute(delete(ItemImage.__table__).where(ItemImage.item_id == target.id))
+    _write_rows(connection, target)
+
+
+@event.listens_for(Item, 'before_delete')
+def _item_deleted(mapper, connection, target):
+    connection.execute(delete(ItemImage.__table__).where(ItemImage.item_id == target.id))
+
+
+def index_items(items):
+    """Write index rows for bulk-inserted (item_id, user_id, images) tuples in one statement"""
+    rows = []
+    for item_id, user_id, images in items:
+        rows.extend(image_rows(item_id, user_id, images))
+    if rows:
+        db.session.execute(insert(ItemImage.__table__), rows)
+
+
+def discard_items(*criteria):
+    """Drop index rows for items matching criteria, before a bulk Query.delete()"""
+    db.session.execute(
+        delete(ItemImage).where(ItemImage.item_id.in_(select(Item.id).where(*criteria))),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def find_owner(public_id):
+    """user_id owning an attached image, or None (one lookup on the unique index)"""
+    return db.session.execute(
+        select(ItemImage.user_id).where(ItemImage.public_id == public_id)
+    ).scalar()
+
+
+def attached_elsewhere(images, item_id=None):
+    """True if any public_id in an images list already belongs to another item"""
+    public_ids = [img.get('public_id') for img in images or [] if isinstance(img, dict) and img.get('public_id')]
+    if not public_ids:
+        return False
+    query = select(ItemImage.id).where(ItemImage.public_id.in_(public_ids))
+    if item_id is not None:
+        query = query.where(ItemImage.item_id != item_id)
+    return db.session.execute(query.limit(1)).first() is not None
@@ -0,0 +1,139 @@
+"""
+Server-side image normalization and multi-resolution variants
+
+Uploads are decoded once, rotated according to their EXIF orientation,
+capped at IMAGE_MAX_EDGE and re-encoded (WebP by default), then shrunk
+into the smaller variants. Pillow work runs in a process pool so it
+neither holds the GIL of the serving process nor scales with the number
+of request threads.
+
+The 'full' rendition replaces the original asset; the other variants are
+stored next to it as ``<public_id>_<name>`` so they can be found (and
+deleted) from the public_id alone.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import threading
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# (name, long edge in px); None means IMAGE_MAX_EDGE
+VARIANTS = (('full', None), ('medium', 1024), ('thumb', 320))
+DERIVED_VARIANTS = ('medium', 'thumb')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidImage(ValueError):
+    """Upload could not be decoded as an image"""
+
+
+def variant_public_id(public_id, name):
+    return f"{public_id}_{name}"
+
+
+def variant_public_ids(public_id):
+    """Storage ids of the derived variants stored alongside public_id"""
+    return [variant_public_id(public_id, name) for name in DERIVED_VARIANTS]
+
+
+def base_public_id(public_id):
+    """public_id of the original for a variant id; other ids map to themselves"""
+    for name in DERIVED_VARIANTS:
+        suffix = f"_{name}"
+        if public_id.endswith(suffix):
+            return public_id[:-len(suffix)]
+    return public_id
+
+
+def difference_hash(img):
+    """64-bit dHash as 16 hex chars: brightness gradients of a 9x8 grayscale thumbnail"""
+    small = img.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def render_variants(data, image_format='WEBP', quality=80, max_edge=2048):
+    """Decode ``data`` and return {variant name: encoded bytes}"""
+    return render_upload(data, image_format, quality, max_edge)[0]
+
+
+def render_upload(data, image_format='WEBP', quality=80, max_edge=2048):
+    """
+    Decode ``data`` and return ({variant name: encoded bytes}, phash).
+
+    Pure function of its arguments so it can run in a worker process.
+    """
+    try:
+        img = Image.open(BytesIO(data))
+        # Let the JPEG decoder downscale by a power of two while decoding
+        img.draft('RGB', (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImage(str(e)) from e
+
+    if image_format == 'JPEG':
+        img = img.convert('RGB')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+
+    rendered = {}
+    for name, edge in VARIANTS:
+        # Each variant shrinks the previous, larger one
+        edge = edge or max_edge
+        img.thumbnail((edge, edge), Image.LANCZOS)
+        buf = BytesIO()
+        img.save(buf, format=image_format, quality=quality)
+        rendered[name] = buf.getvalue()
+    # img is the smallest variant by now, plenty for a 9x8 hash
+    return rendered, difference_hash(img)
+
+
+def stored_image_hash(data):
+    """Perceptual hash of an already normalized image (direct uploads)"""
+    try:
+        img = Image.open(BytesIO(data))
+        img.draft('RGB', (320, 320))
+        return difference_hash(img)
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImage(str(e)) from e
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        return _executor
+
+
+def process_upload(data, config):
+    """Render variants and the perceptual hash for an upload using the app config"""
+    args = (
+        data,
+        config.get('IMAGE_FORMAT', 'WEBP').upper(),
+        config.get('IMAGE_QUALITY', 80),
+        config.get('IMAGE_MAX_EDGE', 2048),
+    )
+    workers = config.get('IMAGE_PROCESS_WORKERS', 0)
+    if not workers:
+        return render_upload(*args)
+    return _get_executor(workers).submit(render_upload, *args).result()
+
+
+def store_rendered(storage, rendered, folder):
+    """Put the full rendition and its variants; returns {'url', 'public_id', 'variants'}"""
+    upload_result = storage.put(BytesIO(rendered['full']), folder=folder)
+    public_id = upload_result['public_id']
+
+    variants = {'full': upload_result['url']}
+    for name in DERIVED_VARIANTS:
+        variant_result = storage.put(BytesIO(rendered[name]), public_id=variant_public_id(public_id, name))
+        variants[name] = variant_result['url']
+    return {'url': upload_result['url'], 'public_id': public_id, 'variants': variants}
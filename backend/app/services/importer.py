@@ -0,0 +1,355 @@
+"""
+Streaming bulk import (POST /api/import)
+
+Sources are an NDJSON file or a ZIP holding ``manifest.ndjson`` plus the
+images it names. Records are read line by line (straight out of the ZIP
+member for archives), so memory is bounded by one batch whatever the
+file size. Accepted records:
+
+- item rows shaped like POST /api/items/bulk rows, with ``collection`` as
+  a collection name and ``images`` entries that are either stored image
+  dicts or archive member names to upload;
+- the records of GET /api/export: collections map exported collection ids
+  to names, items are imported, everything else is skipped.
+
+Every IMPORT_BATCH_SIZE items go through ``item_bulk.create_items()`` and
+are committed together with the job's ``processed`` line number, so a
+failed run resumes after the last committed batch. Rows are validated
+before their archive images are rendered and stored on a pool of
+IMPORT_UPLOAD_WORKERS threads; an image that can't be stored is reported
+against its rows and the job carries on. Images of a batch that never
+commits are left to ``flask uploads reconcile``.
+The job holds a JobLease while it runs so a resume can't race the
+original run.
+"""
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import copy_current_request_context, current_app
+from sqlalchemy import insert
+
+from app import db
+from app.models.collection import Collection
+from app.models.image_hash import ImageHash
+from app.models.import_job import ImportJob
+from app.models.job_lease import JobLease
+from app.services import image_variants, item_bulk
+from app.services.background import lease_owner
+from app.services.storage import get_storage
+
+MANIFEST_NAMES = ('manifest.ndjson', 'manifest.jsonl')
+IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'webp')
+MAX_IMAGE_BYTES = 15 * 1024 * 1024
+
+# Same folder as /api/upload
+UPLOAD_FOLDER = 'selective-questions'
+
+# Item record fields handed to the bulk creator; ids, counters and
+# timestamps in exported records are dropped
+ITEM_FIELDS = ('title', 'subject', 'collection_id', 'difficulty', 'status', 'images', 'content_text', 'tags')
+
+MAX_REPORTED_ERRORS = 100
+LEASE_SECONDS = 600
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidSource(ValueError):
+    """Uploaded file can't be imported"""
+
+
+def _manifest_name(archive):
+    names = set(archive.namelist())
+    for name in MANIFEST_NAMES:
+        if name in names:
+            return name
+    raise InvalidSource(f"ZIP archive has no {' or '.join(MANIFEST_NAMES)}")
+
+
+def check_source(path, source_format):
+    """Cheap up-front check so obviously bad uploads fail the request, not the job"""
+    if source_format == 'zip':
+        if not zipfile.is_zipfile(path):
+            raise InvalidSource('Not a ZIP archive')
+        with zipfile.ZipFile(path) as archive:
+            _manifest_name(archive)
+
+
+@contextmanager
+def _open_source(job):
+    """(binary line iterator, ZipFile or None)"""
+    if job.source_format == 'zip':
+        with zipfile.ZipFile(job.source_path) as archive:
+            with archive.open(_manifest_name(archive)) as manifest:
+                yield manifest, archive
+    else:
+        with open(job.source_path, 'rb') as f:
+            yield f, None
+
+
+def _records(lines):
+    """(line number, decoded record or None) for every non-blank line"""
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+class _Collections:
+    """Collection name -> id for one run, created on first use"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.ids = {}
+        self.exported = {}  # collection id in an export -> name
+
+    def remember(self, record):
+        if record.get('id') is not None and record.get('name') and not record.get('is_deleted'):
+            self.exported[record['id']] = record['name']
+
+    def resolve(self, names):
+        missing = {name for name in names if name not in self.ids}
+        if missing:
+            for collection in Collection.query.filter(
+                Collection.user_id == self.user_id,
+                Collection.is_deleted == False,
+                Collection.name.in_(missing)
+            ):
+                self.ids[collection.name] = collection.id
+            for name in missing - set(self.ids):
+                collection = Collection(user_id=self.user_id, name=name)
+                db.session.add(collection)
+                db.session.flush()
+                self.ids[name] = collection.id
+        return self.ids
+
+
+def _render_and_store(data, storage, config):
+    rendered, phash = image_variants.process_upload(data, config)
+    return image_variants.store_rendered(storage, rendered, UPLOAD_FOLDER), phash
+
+
+def _read_image(archive, name):
+    if archive is None:
+        raise InvalidSource('Image file names need a ZIP archive')
+    if name.rsplit('.', 1)[-1].lower() not in IMAGE_EXTENSIONS:
+        raise InvalidSource(f'Invalid image type: {name}')
+    try:
+        info = archive.getinfo(name)
+    except KeyError:
+        raise InvalidSource(f'Image not found in archive: {name}')
+    if info.file_size > MAX_IMAGE_BYTES:
+        raise InvalidSource(f'Image too large (max 15MB): {name}')
+    return archive.read(name)
+
+
+def _upload_images(names, archive):
+    """{member name: (stored, phash, sha256) or error message}, stored with bounded concurrency"""
+    results, pending = {}, {}
+    for name in names:
+        try:
+            pending[name] = _read_image(archive, name)
+        except (InvalidSource, zipfile.BadZipFile) as e:
+            results[name] = str(e)
+    if not pending:
+        return results
+
+    storage = get_storage()
+    config = current_app.config
+    workers = min(config['IMPORT_UPLOAD_WORKERS'], len(pending))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each task gets its own copy of the request context (config, url_for)
+        futures = {
+            name: pool.submit(copy_current_request_context(_render_and_store), data, storage, config)
+            for name, data in pending.items()
+        }
+        for name, future in futures.items():
+            try:
+                stored, phash = future.result()
+            except image_variants.InvalidImage:
+                results[name] = f'Not a readable image: {name}'
+                continue
+            except Exception as e:
+                # Storage errors fail the rows using this image, not the job
+                print(f"Import image upload failed for {name}: {e}", flush=True)
+                results[name] = f'Image upload failed: {name}'
+                continue
+            results[name] = (stored, phash, hashlib.sha256(pending[name]).hexdigest())
+    return results
+
+
+def _item_row(record, collections):
+    row = {key: record[key] for key in ITEM_FIELDS if key in record}
+    if 'collection' in record:
+        name = record['collection']
+        if not isinstance(name, str) or not name.strip() or len(name.strip()) > 100:
+            raise InvalidSource('collection must be a name of 1-100 characters')
+        name = name.strip()
+        row['collection_id'] = collections.resolve([name])[name]
+    elif record.get('record') == 'item' and row.get('collection_id') is not None:
+        # Exported ids belong to the source account; map through the name
+        name = collections.exported.get(row['collection_id'])
+        row['collection_id'] = collections.resolve([name])[name] if name else None
+        # Subject derived from the collection name is derived again on insert
+        if name and row.get('subject') == name:
+            del row['subject']
+    return row
+
+
+def _import_batch(job, batch, collections, archive):
+    rows, lines, errors = [], [], []
+    for line_no, record in batch:
+        if not isinstance(record, dict):
+            errors.append({'line': line_no, 'error': 'Invalid JSON object'})
+            continue
+        try:
+            rows.append(_item_row(record, collections))
+        except InvalidSource as e:
+            errors.append({'line': line_no, 'error': str(e)})
+            continue
+        lines.append(line_no)
+
+    # Check rows before uploading so rejected rows don't store images; the
+    # archive names stand in as placeholder image dicts
+    probes = [
+        {**row, 'images': [{'url': img, 'public_id': ''} if isinstance(img, str) else img for img in row['images']]}
+        if isinstance(row.get('images'), list) else row
+        for row in rows
+    ]
+    valid, row_errors = item_bulk.check_rows(job.user_id, probes)
+    for error in row_errors:
+        error = dict(error)
+        error['line'] = lines[error.pop('index')]
+        errors.append(error)
+    rows, lines = [rows[index] for index in valid], [lines[index] for index in valid]
+
+    names = {
+        img for row in rows if isinstance(row.get('images'), list)
+        for img in row['images'] if isinstance(img, str)
+    }
+    uploads = _upload_images(names, archive) if names else {}
+
+    accepted, accepted_lines, hashes = [], [], []
+    for row, line_no in zip(rows, lines):
+        images = row.get('images')
+        if isinstance(images, list):
+            failed = [uploads[img] for img in images if isinstance(img, str) and isinstance(uploads[img], str)]
+            if failed:
+                errors.append({'line': line_no, 'error': failed[0]})
+                continue
+            row['images'] = [uploads[img][0] if isinstance(img, str) else img for img in images]
+            hashes.append([uploads[img] for img in images if isinstance(img, str)])
+        else:
+            hashes.append([])
+        accepted.append(row)
+        accepted_lines.append(line_no)
+
+    created, row_errors = item_bulk.create_items(job.user_id, accepted)
+    for error in row_errors:
+        error = dict(error)
+        error['line'] = accepted_lines[error.pop('index')]
+        errors.append(error)
+
+    # Dedup index for the images now attached to items
+    hash_rows = [
+        {'user_id': job.user_id, 'sha256': sha256, 'phash': phash, **stored}
+        for entry in created for stored, phash, sha256 in hashes[entry['index']]
+    ]
+    if hash_rows:
+        db.session.execute(insert(ImageHash), hash_rows)
+
+    job.processed = batch[-1][0]
+    job.created_count += len(created)
+    job.error_count += len(errors)
+    reported = job.errors or []
+    if len(reported) < MAX_REPORTED_ERRORS and errors:
+        job.errors = reported + sorted(errors, key=lambda e: e['line'])[:MAX_REPORTED_ERRORS - len(reported)]
+    db.session.commit()
+
+
+def _run(job, lease, owner):
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    collections = _Collections(job.user_id)
+    with _open_source(job) as (lines, archive):
+        batch = []
+        for line_no, record in _records(lines):
+            kind = record.get('record', 'item') if isinstance(record, dict) else 'item'
+            if kind == 'collection':
+                # Re-read on resume too: later items may point at it
+                collections.remember(record)
+                continue
+            if kind != 'item' or line_no <= job.processed:
+                continue
+            batch.append((line_no, record))
+            if len(batch) >= batch_size:
+                _import_batch(job, batch, collections, archive)
+                batch = []
+                if not JobLease.acquire(lease, owner, LEASE_SECONDS):
+                    raise RuntimeError('Import lease was taken over')
+        if batch:
+            _import_batch(job, batch, collections, archive)
+
+
+def run_import(job_id):
+    """
+    Run (or resume) an import job to completion. Needs a request context
+    (image URLs); returns a report dict with an ``acquired`` flag.
+    """
+    lease = f'import:{job_id}'
+    owner = lease_owner()
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.status == 'COMPLETED' or not JobLease.acquire(lease, owner, LEASE_SECONDS):
+        return {'acquired': False}
+
+    try:
+        job.status = 'RUNNING'
+        job.last_error = None
+        db.session.commit()
+
+        _run(job, lease, owner)
+
+        job.status = 'COMPLETED'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        try:
+            os.remove(job.source_path)
+        except OSError:
+            pass
+    except Exception as e:
+        db.session.rollback()
+        print(f"Import {job_id} failed: {e}", flush=True)
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'FAILED'
+        job.last_error = str(e)[:500]
+        db.session.commit()
+    finally:
+        JobLease.release(lease, owner)
+    return {'acquired': True, **job.to_dict()}
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import')
+        return _executor
+
+
+def start(job_id):
+    """Run the job on the import pool, or in the calling request when IMPORT_WORKERS is 0"""
+    workers = current_app.config.get('IMPORT_WORKERS', 0)
+    if not workers:
+        return run_import(job_id)
+    _get_executor(workers).submit(copy_current_request_context(run_import), job_id)
+    return None
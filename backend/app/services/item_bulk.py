@@ -0,0 +1,266 @@
+"""
+Bulk item creation and updates (POST / PATCH /api/items/bulk)
+
+Validates every row first, then resolves collections, attached images and
+tags for the whole batch with a handful of set-based queries and writes
+items and item_tags as bulk INSERTs in the caller's transaction. Bulk
+INSERTs skip mapper events, so the stats projection and the item_images
+index are updated here with ``stats.count_items()`` and
+``image_index.index_items()``. Rows that fail validation are reported by
+index and left out; the rest are still created.
+
+``update_items()`` applies one change set to many items with UPDATE,
+INSERT and DELETE statements over chunks of ids, wrapping each UPDATE in
+``stats.discount_items()``/``stats.recount_items()`` so the counters move
+with it.
+"""
+from marshmallow import ValidationError
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app import db
+from app.models.collection import Collection
+from app.models.item import Item, item_tags
+from app.models.item_image import ItemImage
+from app.models.pending_upload import PendingUpload
+from app.models.tag import Tag
+from app.schemas.item import ItemSchema
+from app.services import change_log, image_index, stats, tags as tag_service
+
+# Values allowed by check_status_valid (the schema also accepts NEED_REVIEW)
+ITEM_STATUSES = ('UNANSWERED', 'ANSWERED', 'MASTERED')
+
+_schema = ItemSchema()
+
+# Ids per UPDATE/DELETE ... WHERE id IN (...) statement
+CHUNK_SIZE = 500
+
+
+def _image_ids(images):
+    return [img['public_id'] for img in images if img.get('public_id')]
+
+
+def _validate(rows):
+    """(index, data, tag names) for valid rows, plus per-row errors"""
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            data = _schema.load(row)
+        except ValidationError as e:
+            errors.append({'index': index, 'error': 'Validation failed', 'details': e.messages})
+            continue
+        if data['status'] not in ITEM_STATUSES:
+            errors.append({'index': index, 'error': f"Invalid status: {data['status']}"})
+            continue
+        try:
+            names = tag_service.clean_names(data.get('tags'))
+        except tag_service.InvalidTagName as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        valid.append((index, data, names))
+    return valid, errors
+
+
+def _load_collections(rows):
+    ids = {data['collection_id'] for _, data, _ in rows if data.get('collection_id')}
+    if not ids:
+        return {}
+    return {c.id: c for c in Collection.query.filter(Collection.id.in_(ids))}
+
+
+def _attached_images(rows):
+    public_ids = {pid for _, data, _ in rows for pid in _image_ids(data['images'])}
+    if not public_ids:
+        return set()
+    return set(db.session.scalars(select(ItemImage.public_id).where(ItemImage.public_id.in_(public_ids))))
+
+
+def _check_references(user_id, rows):
+    """Drop rows with foreign or unknown collections or already-used images"""
+    collections = _load_collections(rows)
+    attached = _attached_images(rows)
+    accepted, errors = [], []
+    for index, data, names in rows:
+        collection_id = data.get('collection_id')
+        collection = collections.get(collection_id) if collection_id else None
+        if collection_id and not collection:
+            errors.append({'index': index, 'error': 'Invalid collection_id: Collection not found'})
+            continue
+        if collection and str(collection.user_id) != str(user_id):
+            errors.append({'index': index, 'error': 'Invalid collection_id: Access denied'})
+            continue
+        public_ids = _image_ids(data['images'])
+        if attached.intersection(public_ids):
+            errors.append({'index': index, 'error': 'Image is already attached to another item'})
+            continue
+        # Earlier rows of the same batch claim their images too
+        attached.update(public_ids)
+        accepted.append((index, data, names, collection))
+    return accepted, errors
+
+
+def _item_row(user_id, data, collection):
+    subject = data.get('subject')
+    if not subject and collection and collection.type == 'SUBJECT':
+        subject = collection.name
+    return {
+        'title': data.get('title'),
+        'subject': subject,
+        'collection_id': data.get('collection_id'),
+        'difficulty': data['difficulty'],
+        'status': data['status'],
+        'needs_review': False,
+        'images': data['images'],
+        'content_text': data.get('content_text'),
+        'author_id': int(user_id),
+    }
+
+
+def _insert_items(rows):
+    """Insert item rows and return their ids in input order"""
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        return list(db.session.scalars(
+            insert(Item).returning(Item.id, sort_by_parameter_order=True), rows
+        ))
+    # No RETURNING (MySQL/TiDB): one multi-row INSERT per chunk. A single
+    # statement's auto-increment ids are consecutive (InnoDB allocates a
+    # simple insert's values at once; TiDB needs AUTO_ID_CACHE=1), so they
+    # follow from the first id and the row count.
+    ids = []
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        result = db.session.execute(insert(Item.__table__).values(chunk))
+        first = _first_inserted_id(result, len(chunk))
+        ids.extend(range(first, first + len(chunk)))
+    return ids
+
+
+def _first_inserted_id(result, count):
+    # MySQL's LAST_INSERT_ID() is the first row of a multi-row insert,
+    # SQLite's last_insert_rowid() the last one
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return result.lastrowid - count + 1
+    return result.lastrowid
+
+
+def check_rows(user_id, rows):
+    """
+    Run create_items()' validation and reference checks without writing;
+    returns (indexes of rows that would be created, errors)
+    """
+    valid, errors = _validate(rows)
+    accepted, reference_errors = _check_references(user_id, valid)
+    errors.extend(reference_errors)
+    return [index for index, _, _, _ in accepted], sorted(errors, key=lambda e: e['index'])
+
+
+def create_items(user_id, rows):
+    """Create items from raw request rows; returns (created, errors), no commit"""
+    valid, errors = _validate(rows)
+    accepted, reference_errors = _check_references(user_id, valid)
+    errors.extend(reference_errors)
+    errors.sort(key=lambda e: e['index'])
+    if not accepted:
+        return [], errors
+
+    item_rows = [_item_row(user_id, data, collection) for _, data, _, collection in accepted]
+    ids = _insert_items(item_rows)
+
+    stats.count_items(item_rows)
+    change_log.record(int(user_id), 'item', ids)
+    image_index.index_items(
+        (item_id, row['author_id'], row['images']) for item_id, row in zip(ids, item_rows)
+    )
+
+    tag_ids = tag_service.resolve(user_id, list({
+        name.lower(): name for _, _, names, _ in accepted for name in names
+    }.values()))
+    links = [
+        {'item_id': item_id, 'tag_id': tag_ids[name.lower()]}
+        for item_id, (_, _, names, _) in zip(ids, accepted)
+        for name in names
+    ]
+    if links:
+        db.session.execute(insert(item_tags), links)
+
+    # Promote pending uploads
+    public_ids = [pid for row in item_rows for pid in _image_ids(row['images'])]
+    if public_ids:
+        db.session.execute(
+            delete(PendingUpload).where(PendingUpload.public_id.in_(public_ids)),
+            execution_options={'synchronize_session': False}
+        )
+
+    created = [{'index': index, 'id': item_id} for item_id, (index, _, _, _) in zip(ids, accepted)]
+    return created, errors
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def _add_tags(item_ids, tag_ids):
+    """Link every item to every tag, skipping links that already exist"""
+    existing = {tuple(row) for row in db.session.execute(
+        select(item_tags.c.item_id, item_tags.c.tag_id).where(
+            item_tags.c.item_id.in_(item_ids), item_tags.c.tag_id.in_(tag_ids)
+        )
+    )}
+    links = [
+        {'item_id': item_id, 'tag_id': tag_id}
+        for item_id in item_ids for tag_id in tag_ids
+        if (item_id, tag_id) not in existing
+    ]
+    if links:
+        db.session.execute(insert(item_tags), links)
+    return len(links)
+
+
+def _remove_tags(item_ids, tag_ids):
+    result = db.session.execute(
+        delete(item_tags).where(item_tags.c.item_id.in_(item_ids), item_tags.c.tag_id.in_(tag_ids))
+    )
+    return result.rowcount
+
+
+def update_items(user_id, item_ids, values, add_tags=(), remove_tags=()):
+    """
+    Apply column values and tag changes to the user's items among item_ids.
+
+    values holds already validated Item columns (status, needs_review,
+    difficulty, collection_id, subject). Returns affected counts; no commit.
+    """
+    # Only the caller's items, whatever ids were sent
+    owned = list(db.session.scalars(
+        select(Item.id).where(Item.author_id == user_id, Item.id.in_(set(item_ids))).order_by(Item.id)
+    )) if item_ids else []
+    counts = {'matched': len(owned), 'updated': 0, 'tags_added': 0, 'tags_removed': 0}
+    if not owned:
+        return counts
+
+    add_ids = list(set(tag_service.resolve(user_id, add_tags).values()))
+    remove_ids = []
+    if remove_tags:
+        remove_ids = list(db.session.scalars(
+            select(Tag.id).where(Tag.user_id == user_id, func.lower(Tag.name).in_([n.lower() for n in remove_tags]))
+        ))
+
+    for chunk in _chunks(owned):
+        in_chunk = Item.id.in_(chunk)
+        if values:
+            stats.discount_items(in_chunk)
+            result = db.session.execute(
+                update(Item).where(in_chunk).values(**values, updated_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False}
+            )
+            stats.recount_items(in_chunk)
+            counts['updated'] += result.rowcount
+        removed = _remove_tags(chunk, remove_ids) if remove_ids else 0
+        added = _add_tags(chunk, add_ids) if add_ids else 0
+        counts['tags_removed'] += removed
+        counts['tags_added'] += added
+        if values or removed or added:
+            change_log.record_items(in_chunk)
+    return counts
@@ -0,0 +1,35 @@
+"""
+Reusable filters for item queries
+
+Work on both ``Model.query`` objects and ``select()`` statements.
+"""
+from sqlalchemy import func, select, false
+
+from app import db
+from app.models.item import Item, item_tags
+from app.models.tag import Tag
+
+
+def filter_by_tags(query, tag_names, user_id):
+    """
+    Restrict query to items carrying ALL of tag_names.
+    
+    Names are resolved to ids in one lookup on idx_tags_user_name_lower, then
+    matched with a single item_tags GROUP BY/HAVING instead of one EXISTS per tag.
+    """
+    wanted = {name.strip().lower() for name in tag_names if name.strip()}
+    if not wanted:
+        return query
+    
+    tag_ids = [tag_id for (tag_id,) in db.session.query(Tag.id).filter(
+        Tag.user_id == user_id,
+        func.lower(Tag.name).in_(wanted)
+    )]
+    # An unknown tag can never be matched
+    if len(tag_ids) < len(wanted):
+        return query.filter(false())
+    
+    matching = select(item_tags.c.item_id).where(
+        item_tags.c.tag_id.in_(tag_ids)
+    ).group_by(item_tags.c.item_id).having(func.count() == len(tag_ids))
+    return query.filter(Item.id.in_(matching))
@@ -0,0 +1,264 @@
+"""
+Reconcile stored images against database references
+
+Assets end up orphaned when a delete skips storage (bulk collection
+deletes), a storage call fails, or a direct upload is never confirmed.
+``reconcile()`` walks the storage listing and the DB references, both in
+ascending public_id order, and merges them like two sorted files: memory
+stays constant no matter how many assets exist.
+
+A storage asset is referenced when its public_id (or, for ``_medium`` /
+``_thumb`` variants, its base public_id) appears in item_images,
+pending_uploads or the deletion outbox, or is named by the URL of a legacy
+items.images entry that has no public_id (those aren't in item_images). Unreferenced assets older than the
+grace period are deleted in bulk batches. Progress is checkpointed on the
+job's lease row, so an interrupted run resumes where it stopped.
+"""
+import heapq
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import db
+from app.models.item import Item
+from app.models.item_image import ItemImage
+from app.models.job_lease import JobLease
+from app.models.pending_upload import PendingUpload
+from app.models.storage_deletion import StorageDeletion
+from app.services.background import lease_owner
+from app.services.image_variants import base_public_id, variant_public_ids
+from app.services.storage import get_storage, public_id_from_url
+
+LEASE_NAME = 'orphan_reconciler'
+BATCH_SIZE = 100
+SAMPLE_SIZE = 20
+
+
+class UnsortedListing(RuntimeError):
+    """A source did not return public_ids in ascending order"""
+
+
+def _ordered(column):
+    # MySQL's default collations are case-insensitive; compare bytes like Python
+    if db.engine.dialect.name == 'mysql':
+        return column.collate('utf8mb4_bin')
+    return column
+
+
+def _db_source(column, prefix, after, chunk_size=1000):
+    """Distinct public_ids from one column, ascending, fetched in keyset chunks"""
+    last = after
+    while True:
+        pattern = prefix.replace('\\', '\\\\').replace('%', r'\%').replace('_', r'\_') + '%'
+        query = select(column).where(column.like(pattern, escape='\\'))
+        if last is not None:
+            query = query.where(_ordered(column) > last)
+        chunk = db.session.execute(
+            query.group_by(column).order_by(_ordered(column)).limit(chunk_size)
+        ).scalars().all()
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+
+
+def legacy_public_ids(prefix):
+    """
+    Sorted public_ids under prefix named only by URL in items.images.
+
+    Entries without a public_id are skipped by item_images, so the merge
+    would otherwise see the images of such items as orphans. There are few
+    of them, so they are collected in memory.
+    """
+    found = set()
+    rows = db.session.execute(
+        select(Item.images).where(Item.images.isnot(None)).execution_options(yield_per=500)
+    ).scalars()
+    for images in rows:
+        for img in images if isinstance(images, list) else []:
+            if isinstance(img, dict):
+                if img.get('public_id'):
+                    continue
+                img = img.get('url')
+            public_id = public_id_from_url(img)
+            if public_id and public_id.startswith(prefix):
+                found.update((public_id, base_public_id(public_id)))
+    return sorted(found)
+
+
+def _referenced_prefixes(prefix, after):
+    """
+    Referenced public_ids that are prefixes of ``after`` (after included).
+
+    A base at or before the checkpoint still has variants after it only if
+    it is a prefix of the checkpoint ('p/a' < 'p/a_b' < 'p/a_thumb'); the
+    checkpoint's own base is one of these.
+    """
+    candidates = [after[:end] for end in range(len(prefix) + 1, len(after) + 1)]
+    found = set()
+    for column in (ItemImage.public_id, PendingUpload.public_id, StorageDeletion.public_id):
+        found.update(db.session.execute(select(column).where(column.in_(candidates))).scalars())
+    return sorted(found)
+
+
+def referenced_ids(prefix, after=None, legacy=()):
+    """
+    Every referenced public_id under prefix (and after ``after``), ascending
+    and distinct, including the variant ids derived from each referenced image.
+    ``legacy`` is the sorted output of ``legacy_public_ids()``.
+    """
+    sources = [
+        _db_source(ItemImage.public_id, prefix, after),
+        _db_source(PendingUpload.public_id, prefix, after),
+        _db_source(StorageDeletion.public_id, prefix, after),
+        legacy,
+    ]
+    if after is None:
+        return _with_variants(sources)
+    sources.append(_referenced_prefixes(prefix, after))
+    return (public_id for public_id in _with_variants(sources) if public_id > after)
+
+
+def _with_variants(sources):
+    # Variant ids sort after their base id but may interleave with later
+    # ids, so hold them in a heap until the merge catches up
+    variants = []
+    previous = None
+    for public_id in heapq.merge(*sources):
+        while variants and variants[0] < public_id:
+            pending = heapq.heappop(variants)
+            if pending != previous:
+                yield pending
+                previous = pending
+        if public_id != previous:
+            yield public_id
+            previous = public_id
+        for variant in variant_public_ids(public_id):
+            heapq.heappush(variants, variant)
+    while variants:
+        pending = heapq.heappop(variants)
+        if pending != previous:
+            yield pending
+            previous = pending
+
+
+def _check_sorted(entries, key=lambda entry: entry):
+    previous = None
+    for entry in entries:
+        value = key(entry)
+        if previous is not None and value < previous:
+            raise UnsortedListing(f"{value!r} listed after {previous!r}")
+        previous = value
+        yield entry
+
+
+def find_orphans(storage_entries, referenced):
+    """Streaming set difference: storage entries whose public_id isn't referenced"""
+    referenced = iter(referenced)
+    current = next(referenced, None)
+    for entry in storage_entries:
+        public_id = entry['public_id']
+        while current is not None and current < public_id:
+            current = next(referenced, None)
+        if current != public_id:
+            yield entry
+
+
+def _still_unreferenced(public_ids, legacy=()):
+    """Re-check a batch right before deleting it, in case it was claimed meanwhile"""
+    bases = {public_id: base_public_id(public_id) for public_id in public_ids}
+    candidates = set(bases) | set(bases.values())
+    claimed = candidates & set(legacy)
+    for column in (ItemImage.public_id, PendingUpload.public_id, StorageDeletion.public_id):
+        claimed.update(db.session.execute(select(column).where(column.in_(candidates))).scalars())
+    return [public_id for public_id in public_ids
+            if public_id not in claimed and bases[public_id] not in claimed]
+
+
+def reconcile(prefix='selective-questions/', grace_hours=24, dry_run=True,
+              batch_size=BATCH_SIZE, lease_seconds=600):
+    """
+    Find (and unless dry_run, delete) unreferenced assets older than grace_hours.
+
+    Returns a report dict with counts, reclaimable bytes and a sample of
+    orphan ids; ``acquired`` is False when another worker holds the lease.
+    """
+    owner = lease_owner()
+    report = {
+        'acquired': False, 'dry_run': dry_run, 'resumed_from': None,
+        'scanned': 0, 'orphans': 0, 'too_recent': 0, 'orphan_bytes': 0,
+        'deleted': 0, 'failed': 0, 'sample': [], 'lease_lost': False, 'duration_ms': 0.0,
+    }
+    if not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+        return report
+
+    report['acquired'] = True
+    started = time.perf_counter()
+    try:
+        _reconcile(report, owner, prefix, grace_hours, dry_run, max(1, min(batch_size, BATCH_SIZE)), lease_seconds)
+    finally:
+        JobLease.release(LEASE_NAME, owner)
+        report['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def _reconcile(report, owner, prefix, grace_hours, dry_run, batch_size, lease_seconds):
+    storage = get_storage()
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+
+    # Dry runs always look at everything and never move the checkpoint
+    after = None if dry_run else JobLease.get_checkpoint(LEASE_NAME)
+    report['resumed_from'] = after
+
+    def listing():
+        for entry in storage.list(prefix):
+            report['scanned'] += 1
+            if after is None or entry['public_id'] > after:
+                yield entry
+
+    legacy = legacy_public_ids(prefix)
+    storage_entries = _check_sorted(listing(), key=lambda entry: entry['public_id'])
+    referenced = _check_sorted(referenced_ids(prefix, after, legacy))
+
+    batch = []
+    for entry in find_orphans(storage_entries, referenced):
+        if entry['created_at'] is not None and entry['created_at'] > cutoff:
+            report['too_recent'] += 1
+            continue
+        report['orphans'] += 1
+        report['orphan_bytes'] += entry['bytes'] or 0
+        if len(report['sample']) < SAMPLE_SIZE:
+            report['sample'].append(entry['public_id'])
+        if dry_run:
+            continue
+        batch.append(entry['public_id'])
+        if len(batch) == batch_size:
+            if not _delete_batch(storage, batch, legacy, report, owner, lease_seconds):
+                return
+            batch = []
+
+    if batch and not _delete_batch(storage, batch, legacy, report, owner, lease_seconds):
+        return
+    if not dry_run:
+        # Completed a full pass; the next run starts from the beginning
+        JobLease.save_checkpoint(LEASE_NAME, owner, None)
+        db.session.commit()
+
+
+def _delete_batch(storage, batch, legacy, report, owner, lease_seconds):
+    """Delete one batch and renew the lease; False once another worker holds it"""
+    orphans = _still_unreferenced(batch, legacy)
+    if orphans:
+        statuses = storage.delete_many(orphans)
+        deleted = sum(1 for public_id in orphans if statuses.get(public_id) in ('deleted', 'not_found'))
+        report['deleted'] += deleted
+        report['failed'] += len(orphans) - deleted
+    JobLease.save_checkpoint(LEASE_NAME, owner, batch[-1])
+    db.session.commit()
+    if not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+        # The new holder resumes from its own checkpoint; keep out of its way
+        print("Orphan reconciliation stopped: lease was taken over", flush=True)
+        report['lease_lost'] = True
+        return False
+    return True
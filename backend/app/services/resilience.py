@@ -0,0 +1,147 @@
+"""
+Failure handling for calls to remote services
+
+- ``CircuitBreaker`` fails fast once the error rate over a sliding window
+  crosses a threshold, then lets a single probe through after a cool-down.
+- ``CallMetrics`` keeps per-operation call counts, errors and recent
+  latencies (p50/p95/max) for the status endpoint.
+- ``call_with_retries`` ties both together with bounded, fully jittered
+  exponential backoff for operations that are safe to repeat.
+
+All state is per process; each gunicorn worker trips its own breaker.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Breaker is open; the remote service is not being called"""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate=0.5, min_calls=10, window_seconds=60, reset_seconds=30):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _trim(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record(self, ok):
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._state = self.OPEN
+                    self._opened_at = now
+                return
+
+            self._outcomes.append((now, ok))
+            self._trim(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if self._state == self.CLOSED and calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._state = self.OPEN
+                self._opened_at = now
+
+    def snapshot(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, success in self._outcomes if not success)
+        return {'state': self.state, 'window_calls': calls, 'window_failures': failures}
+
+
+class CallMetrics:
+    """Counts and recent latencies per operation name"""
+
+    def __init__(self, sample_size=200):
+        self._lock = threading.Lock()
+        self._sample_size = sample_size
+        self._ops = {}
+
+    def record(self, op, seconds, ok):
+        with self._lock:
+            stats = self._ops.setdefault(op, {'calls': 0, 'errors': 0, 'latencies': deque(maxlen=self._sample_size)})
+            stats['calls'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['latencies'].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for op, stats in self._ops.items():
+                latencies = sorted(stats['latencies'])
+                report[op] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+                    'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                    'max_ms': round(latencies[-1] * 1000, 1),
+                }
+            return report
+
+
+def call_with_retries(op, fn, *args, breaker, metrics, is_transient, retries=0,
+                      base_delay=0.2, max_delay=2.0, **kwargs):
+    """
+    Call fn(*args, **kwargs) through the breaker, retrying transient errors.
+
+    Only exceptions for which ``is_transient(exc)`` is true count against the
+    breaker or are retried; anything else (404s, bad input) is the remote
+    service working as intended and is re-raised immediately.
+    """
+    for attempt in range(retries + 1):
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            transient = is_transient(e)
+            metrics.record(op, time.perf_counter() - started, not transient)
+            breaker.record(not transient)
+            if not transient or attempt == retries:
+                raise
+            # Full jitter keeps retrying workers from synchronizing
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+        else:
+            metrics.record(op, time.perf_counter() - started, True)
+            breaker.record(True)
+            return result
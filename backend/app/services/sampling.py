@@ -0,0 +1,55 @@
+"""
+Uniform sampling of review items without sorting whole rows
+
+ORDER BY RANDOM() over full item rows drags every candidate's content and
+images JSON through the sort. Instead the random pick runs over the
+id-only projection, which idx_items_author_needs_review covers (secondary
+indexes carry the primary key): with a LIMIT the database keeps a top-k
+heap of (random key, id) while it scans the index, a reservoir sample in
+C. Only the chosen rows are then loaded by primary key.
+
+Fetching the projection into Python and sampling there was measured
+slower at every size (row handling in Python costs more than the scan),
+and random id-range seeks are biased by gaps between one user's ids,
+which are interleaved with everyone else's.
+"""
+import random
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models.item import Item
+from app.services.item_filters import filter_by_tags
+
+
+def _candidate_ids(user_id, subject=None, collection_id=None, tag_names=None):
+    stmt = select(Item.id).where(
+        Item.author_id == user_id,
+        Item.needs_review == True
+    )
+    if subject:
+        stmt = stmt.where(Item.subject == subject)
+    if collection_id:
+        stmt = stmt.where(Item.collection_id == collection_id)
+    if tag_names:
+        stmt = filter_by_tags(stmt, tag_names, user_id)
+    return stmt
+
+
+def sample_ids(stmt, limit):
+    """Uniformly sample up to ``limit`` ids from an id-only select"""
+    return db.session.execute(stmt.order_by(func.random()).limit(limit)).scalars().all()
+
+
+def sample_review_items(user_id, limit, subject=None, collection_id=None, tag_names=None, rng=random):
+    """Up to ``limit`` flagged items for user_id, uniformly sampled, in random order"""
+    if limit <= 0:
+        return []
+
+    ids = sample_ids(_candidate_ids(user_id, subject, collection_id, tag_names), limit)
+    if not ids:
+        return []
+
+    rng.shuffle(ids)
+    by_id = {item.id: item for item in Item.query.filter(Item.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
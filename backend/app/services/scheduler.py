@@ -0,0 +1,58 @@
+"""
+SM-2 spaced-repetition scheduling
+
+Each answer submission moves the item's review_interval, ease_factor,
+repetitions and due_at forward; GET /api/items/due then reads the
+(author_id, due_at) index to fetch whatever is due next.
+"""
+from datetime import datetime, timedelta
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Quality used when the client only sends is_correct
+DEFAULT_QUALITY_CORRECT = 4
+DEFAULT_QUALITY_INCORRECT = 1
+
+
+def default_quality(is_correct):
+    return DEFAULT_QUALITY_CORRECT if is_correct else DEFAULT_QUALITY_INCORRECT
+
+
+def next_schedule(quality, repetitions, interval, ease_factor):
+    """
+    One SM-2 step.
+
+    quality: 0-5 recall grade (>= 3 counts as a successful recall)
+    Returns (repetitions, interval_days, ease_factor).
+    """
+    repetitions = repetitions or 0
+    interval = interval or 0
+    ease_factor = ease_factor or DEFAULT_EASE
+
+    if quality >= 3:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = int(round(interval * ease_factor))
+        repetitions += 1
+    else:
+        # Failed recall: start the sequence again
+        repetitions = 0
+        interval = 1
+
+    ease_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease_factor = max(MIN_EASE, round(ease_factor, 2))
+    return repetitions, interval, ease_factor
+
+
+def schedule_review(item, quality, now=None):
+    """Apply one SM-2 step to item and set its next due_at"""
+    now = now or datetime.utcnow()
+    item.repetitions, item.review_interval, item.ease_factor = next_schedule(
+        quality, item.repetitions, item.review_interval, item.ease_factor
+    )
+    item.due_at = now + timedelta(days=item.review_interval)
+    return item
@@ -0,0 +1,261 @@
+"""
+Incrementally maintained item statistics (user_stats / collection_stats,
+plus the item_count / need_review_count counter cache on collections)
+
+Every Item insert, update and delete that goes through the ORM adjusts the
+counters inside the same flush via mapper events, so the projection commits
+or rolls back together with the item change. Bulk ``Query.delete()``,
+bulk UPDATEs and bulk INSERTs skip mapper events; callers doing bulk deletes
+must call ``discount_items()`` with the same criteria first, bulk updaters
+wrap the UPDATE in ``discount_items()``/``recount_items()`` and bulk
+inserters pass the inserted rows to ``count_items()``. ``rebuild()``
+recomputes everything from ``items`` for repair (``flask stats rebuild``).
+"""
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, select, insert, update, delete, func, case, cast, literal, String
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.item import Item
+from app.models.collection import Collection
+from app.models.stats import UserStats, CollectionStats
+
+# Item columns that decide which counters an item contributes to
+TRACKED_FIELDS = ('author_id', 'collection_id', 'subject', 'difficulty', 'status', 'needs_review')
+COUNTERS = ('total', 'answered', 'mastered', 'need_review')
+
+
+def _counter_values(row, weight):
+    status = row['status']
+    return {
+        'total': weight,
+        'answered': weight if status in ('ANSWERED', 'MASTERED') else 0,
+        'mastered': weight if status == 'MASTERED' else 0,
+        'need_review': weight if row['needs_review'] else 0,
+    }
+
+
+def _bucket_keys(row):
+    """(table, key columns) of every counter row an item contributes to"""
+    if row['author_id'] is None:
+        return []
+    user_id = int(row['author_id'])
+    keys = [(UserStats, (('user_id', user_id), ('dimension', 'all'), ('bucket', '')))]
+    if row['subject']:
+        keys.append((UserStats, (('user_id', user_id), ('dimension', 'subject'), ('bucket', row['subject']))))
+    if row['difficulty'] is not None:
+        keys.append((UserStats, (('user_id', user_id), ('dimension', 'difficulty'), ('bucket', str(row['difficulty'])))))
+    if row['collection_id']:
+        keys.append((CollectionStats, (('collection_id', row['collection_id']), ('user_id', user_id))))
+    return keys
+
+
+def _accumulate(deltas, row, weight):
+    values = _counter_values(row, weight)
+    for key in _bucket_keys(row):
+        for name, value in values.items():
+            deltas[key][name] += value
+
+
+def _increment(connection, model, key, counters):
+    """Atomic upsert: counter = counter + delta, creating the row if needed"""
+    table = model.__table__
+    if connection.dialect.name == 'mysql':
+        stmt = mysql_insert(table).values(**dict(key), **counters)
+        stmt = stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in counters})
+    else:
+        stmt = sqlite_insert(table).values(**dict(key), **counters)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key],
+            set_={name: table.c[name] + stmt.excluded[name] for name in counters}
+        )
+    connection.execute(stmt)
+
+
+def _bump_collection_counters(connection, collection_id, item_delta, need_review_delta):
+    """UPDATE collections SET item_count = item_count + n, ... in one statement"""
+    if not item_delta and not need_review_delta:
+        return
+    table = Collection.__table__
+    connection.execute(
+        update(table).where(table.c.id == collection_id).values(
+            item_count=table.c.item_count + item_delta,
+            need_review_count=table.c.need_review_count + need_review_delta,
+            # Counter bumps aren't edits of the collection itself
+            updated_at=table.c.updated_at
+        )
+    )
+
+
+def _apply(connection, deltas):
+    for (model, key), counters in deltas.items():
+        if any(counters.values()):
+            _increment(connection, model, key, dict(counters))
+            if model is CollectionStats:
+                _bump_collection_counters(
+                    connection, dict(key)['collection_id'], counters['total'], counters['need_review']
+                )
+
+
+def _new_deltas():
+    return defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+
+def _load_missing(connection, target, row):
+    """Fill fields the instance doesn't have loaded straight from the row"""
+    missing = [f for f in TRACKED_FIELDS if f not in row]
+    if missing:
+        loaded = connection.execute(
+            select(*[getattr(Item, f) for f in missing]).where(Item.id == target.id)
+        ).mappings().first()
+        row.update(loaded or dict.fromkeys(missing))
+    return row
+
+
+def _current_row(connection, target):
+    state = inspect(target)
+    row = {f: state.dict[f] for f in TRACKED_FIELDS if f in state.dict}
+    return _load_missing(connection, target, row)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """No-op; registered with active_history so updates see the replaced value"""
+
+
+for _field in TRACKED_FIELDS:
+    event.listen(getattr(Item, _field), 'set', _keep_old_value, active_history=True)
+
+
+@event.listens_for(Item, 'after_insert')
+def _item_inserted(mapper, connection, target):
+    deltas = _new_deltas()
+    _accumulate(deltas, _current_row(connection, target), 1)
+    _apply(connection, deltas)
+
+
+@event.listens_for(Item, 'after_update')
+def _item_updated(mapper, connection, target):
+    state = inspect(target)
+    old, new = {}, {}
+    for f in TRACKED_FIELDS:
+        history = state.attrs[f].history
+        if history.added:
+            new[f] = history.added[0]
+            old[f] = history.deleted[0] if history.deleted else None
+        elif history.unchanged:
+            new[f] = old[f] = history.unchanged[0]
+    if old == new:
+        return
+
+    # Fields neither loaded nor changed are the same before and after
+    new = _load_missing(connection, target, new)
+    old = {f: old.get(f, new[f]) for f in TRACKED_FIELDS}
+
+    deltas = _new_deltas()
+    _accumulate(deltas, old, -1)
+    _accumulate(deltas, new, 1)
+    _apply(connection, deltas)
+
+
+@event.listens_for(Item, 'before_delete')
+def _item_deleted(mapper, connection, target):
+    deltas = _new_deltas()
+    _accumulate(deltas, _current_row(connection, target), -1)
+    _apply(connection, deltas)
+
+
+@event.listens_for(Collection, 'before_delete')
+def _collection_deleted(mapper, connection, target):
+    connection.execute(delete(CollectionStats).where(CollectionStats.collection_id == target.id))
+
+
+def _count_matching(criteria, weight):
+    columns = [getattr(Item, f) for f in TRACKED_FIELDS]
+    rows = db.session.execute(
+        select(*columns, func.count().label('n')).where(*criteria).group_by(*columns)
+    ).mappings()
+
+    deltas = _new_deltas()
+    for row in rows:
+        _accumulate(deltas, row, weight * row['n'])
+    _apply(db.session.connection(), deltas)
+
+
+def discount_items(*criteria):
+    """Subtract the items matching criteria, for use before a bulk Query.delete() or update()"""
+    _count_matching(criteria, -1)
+
+
+def recount_items(*criteria):
+    """Add the items matching criteria back after a bulk update() (pairs with discount_items)"""
+    _count_matching(criteria, 1)
+
+
+def count_items(rows):
+    """Add bulk-inserted items (dicts with the TRACKED_FIELDS), one upsert per counter row"""
+    deltas = _new_deltas()
+    for row in rows:
+        _accumulate(deltas, row, 1)
+    _apply(db.session.connection(), deltas)
+
+
+def _aggregate_columns():
+    return [
+        func.count(Item.id),
+        func.sum(case((Item.status.in_(['ANSWERED', 'MASTERED']), 1), else_=0)),
+        func.sum(case((Item.status == 'MASTERED', 1), else_=0)),
+        func.sum(case((Item.needs_review == True, 1), else_=0)),
+    ]
+
+
+def rebuild(user_id=None):
+    """Recompute user_stats/collection_stats from items (all users, or one)"""
+    user_scope = [UserStats.user_id == user_id] if user_id else []
+    collection_scope = [CollectionStats.user_id == user_id] if user_id else []
+    item_scope = [Item.author_id.isnot(None)]
+    if user_id:
+        item_scope.append(Item.author_id == user_id)
+
+    db.session.execute(delete(UserStats).where(*user_scope))
+    db.session.execute(delete(CollectionStats).where(*collection_scope))
+
+    user_columns = ['user_id', 'dimension', 'bucket'] + list(COUNTERS)
+    dimensions = (
+        ('all', literal(''), []),
+        ('subject', Item.subject, [Item.subject.isnot(None), Item.subject != '']),
+        ('difficulty', cast(Item.difficulty, String), [Item.difficulty.isnot(None)]),
+    )
+    for dimension, bucket, bucket_scope in dimensions:
+        group_by = [Item.author_id] if dimension == 'all' else [Item.author_id, bucket]
+        query = select(
+            Item.author_id, literal(dimension), bucket, *_aggregate_columns()
+        ).where(*item_scope, *bucket_scope).group_by(*group_by)
+        db.session.execute(insert(UserStats).from_select(user_columns, query))
+
+    collection_query = select(
+        Item.collection_id, Collection.user_id, *_aggregate_columns()
+    ).join(
+        Collection, Collection.id == Item.collection_id
+    ).where(*item_scope).group_by(Item.collection_id, Collection.user_id)
+    db.session.execute(insert(CollectionStats).from_select(
+        ['collection_id', 'user_id'] + list(COUNTERS), collection_query
+    ))
+
+    # Counter cache columns on collections, via correlated subqueries
+    table = Collection.__table__
+    in_collection = [Item.collection_id == table.c.id, Item.author_id.isnot(None)]
+    db.session.execute(
+        update(table).where(
+            *([table.c.user_id == user_id] if user_id else [])
+        ).values(
+            item_count=select(func.count(Item.id)).where(*in_collection).scalar_subquery(),
+            need_review_count=select(func.count(Item.id)).where(
+                *in_collection, Item.needs_review == True
+            ).scalar_subquery(),
+            updated_at=table.c.updated_at
+        )
+    )
+
+    db.session.commit()
@@ -0,0 +1,483 @@
+"""
+Image storage backends
+
+Routes and jobs talk to storage only through ``get_storage()``, which picks
+a backend from STORAGE_BACKEND:
+
+- ``cloudinary`` (default): the hosted Cloudinary account.
+- ``local``: files under LOCAL_STORAGE_PATH, served by
+  ``GET /api/upload/files/<public_id>``. Uploads without an explicit
+  public_id get a random one, like Cloudinary, so load tests exercise
+  real disk I/O with no network in the loop. Matching identical content
+  is the job of ``image_hashes``, not of the storage name.
+
+Every backend deals in public_ids and returns plain dicts, so callers never
+see SDK-specific responses.
+
+Cloudinary calls go through ``_call``: connect/read timeouts on the SDK's
+connection pools, jittered retries for idempotent operations, and a shared
+circuit breaker so a slow or failing Cloudinary makes requests fail fast
+instead of tying up every gunicorn worker.
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from urllib.parse import unquote, urlsplit
+from uuid import uuid4
+
+import cloudinary
+import cloudinary.api
+import cloudinary.api_client.call_api
+import cloudinary.exceptions
+import cloudinary.search
+import cloudinary.uploader
+import cloudinary.utils
+import urllib3
+from flask import current_app, url_for
+
+from app.services import image_variants
+from app.services.resilience import CallMetrics, CircuitBreaker, CircuitOpenError, call_with_retries
+
+
+class StorageError(Exception):
+    """Storage backend failed"""
+
+
+class NotFound(StorageError):
+    """No asset stored under this public_id"""
+
+
+class StorageUnavailable(StorageError, CircuitOpenError):
+    """Remote storage is failing; calls are short-circuited for now"""
+
+
+class Storage(ABC):
+    """Interface implemented by every backend"""
+
+    name = None
+
+    @abstractmethod
+    def put(self, fileobj, folder=None, public_id=None):
+        """Store an image; returns {'public_id', 'url'}"""
+
+    @abstractmethod
+    def delete(self, public_id):
+        """Remove one asset; True if it is gone (including already missing)"""
+
+    @abstractmethod
+    def delete_many(self, public_ids):
+        """Remove up to 100 assets; returns {public_id: 'deleted' | 'not_found' | 'error'}"""
+
+    @abstractmethod
+    def list(self, prefix=''):
+        """
+        Iterate {'public_id', 'bytes', 'created_at'} for assets under prefix,
+        in ascending public_id order (created_at is a naive UTC datetime).
+        """
+
+    @abstractmethod
+    def info(self, public_id):
+        """{'public_id', 'url', 'bytes', 'format'}; raises NotFound"""
+
+    @abstractmethod
+    def read(self, public_id):
+        """Stored bytes of an asset; raises NotFound"""
+
+    @abstractmethod
+    def url_for(self, public_id):
+        """Public URL of an asset"""
+
+    def signed_upload(self, folder, public_id, allowed_formats):
+        """Browser direct-upload payload, or None if the backend can't do that"""
+        return None
+
+    def direct_upload_variants(self, public_id):
+        """{variant name: url} of a confirmed direct upload; none without signed_upload"""
+        return {}
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+metrics = CallMetrics()
+_applied_timeouts = None
+
+
+# The upload API raises the bare Error class for everything: transport
+# failures, unparseable (proxy/gateway) responses and every API error
+# message. Only the first two are worth retrying.
+_TRANSIENT_UPLOAD_ERROR = re.compile(
+    r'^(Socket error|Unexpected error|Error parsing server response \((5\d\d|429)\))'
+)
+
+
+def _is_transient(exc):
+    """Network trouble, 5xx and rate limiting; not 4xx answers or misconfiguration"""
+    if isinstance(exc, (cloudinary.exceptions.GeneralError, cloudinary.exceptions.RateLimited,
+                        urllib3.exceptions.HTTPError, OSError)):
+        return True
+    if type(exc) is cloudinary.exceptions.Error:
+        return bool(_TRANSIENT_UPLOAD_ERROR.match(str(exc)))
+    return False
+
+
+def breaker():
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            config = current_app.config
+            _breaker = CircuitBreaker(
+                'cloudinary',
+                failure_rate=config.get('STORAGE_BREAKER_FAILURE_RATE', 0.5),
+                min_calls=config.get('STORAGE_BREAKER_MIN_CALLS', 10),
+                window_seconds=config.get('STORAGE_BREAKER_WINDOW_SECONDS', 60),
+                reset_seconds=config.get('STORAGE_BREAKER_RESET_SECONDS', 30),
+            )
+        return _breaker
+
+
+def reset_breaker():
+    """Forget breaker state and metrics (config changes, tests)"""
+    global _breaker, metrics
+    with _breaker_lock:
+        _breaker = None
+    metrics = CallMetrics()
+
+
+def status():
+    """Breaker state and per-operation latency for the current process"""
+    return {'backend': current_app.config.get('STORAGE_BACKEND', 'cloudinary'),
+            'breaker': breaker().snapshot(), 'operations': metrics.snapshot()}
+
+
+def _apply_timeouts(connect, read):
+    """
+    Bound every Cloudinary HTTP call.
+
+    The SDK only takes a timeout per call, so set it once on the connection
+    pools both of its clients (upload API and admin API) share.
+    """
+    global _applied_timeouts
+    if _applied_timeouts == (connect, read):
+        return
+    timeout = urllib3.Timeout(connect=connect, read=read)
+    for manager in (cloudinary.uploader._http, cloudinary.api_client.call_api._http):
+        if hasattr(manager, 'connection_pool_kw'):
+            manager.connection_pool_kw['timeout'] = timeout
+            manager.clear()
+    _applied_timeouts = (connect, read)
+
+
+class CloudinaryStorage(Storage):
+    name = 'cloudinary'
+
+    def __init__(self):
+        config = current_app.config
+        _apply_timeouts(config.get('STORAGE_CONNECT_TIMEOUT', 5), config.get('STORAGE_READ_TIMEOUT', 30))
+        self.retries = config.get('STORAGE_RETRIES', 2)
+        self.breaker = breaker()
+
+    def _call(self, op, fn, *args, idempotent=True, **kwargs):
+        try:
+            return call_with_retries(
+                op, fn, *args,
+                breaker=self.breaker, metrics=metrics, is_transient=_is_transient,
+                retries=self.retries if idempotent else 0,
+                **kwargs
+            )
+        except CircuitOpenError as e:
+            raise StorageUnavailable(str(e)) from e
+
+    def put(self, fileobj, folder=None, public_id=None):
+        options = {'resource_type': 'image'}
+        if folder:
+            options['folder'] = folder
+        if public_id:
+            options['public_id'] = public_id
+        # Without an explicit public_id a retry would create a second asset
+        result = self._call('put', self._upload, fileobj, idempotent=bool(public_id), **options)
+        return {'public_id': result['public_id'], 'url': result['secure_url']}
+
+    @staticmethod
+    def _upload(fileobj, **options):
+        # Rewind so a retry re-sends the whole file
+        if hasattr(fileobj, 'seek'):
+            fileobj.seek(0)
+        return cloudinary.uploader.upload(fileobj, **options)
+
+    def delete(self, public_id):
+        result = self._call('delete', cloudinary.uploader.destroy, public_id)
+        return result.get('result') in ('ok', 'not found')
+
+    def delete_many(self, public_ids):
+        result = self._call('delete_many', cloudinary.api.delete_resources, list(public_ids), resource_type='image')
+        return result.get('deleted', {})
+
+    def list(self, prefix=''):
+        # The Search API can sort by public_id; the plain resources listing can't
+        next_cursor = None
+        while True:
+            search = (cloudinary.search.Search()
+                      .expression(f'public_id:{prefix}*')
+                      .sort_by('public_id', 'asc')
+                      .max_results(500))
+            if next_cursor:
+                search = search.next_cursor(next_cursor)
+            page = self._call('list', search.execute)
+            for resource in page.get('resources', []):
+                yield {
+                    'public_id': resource['public_id'],
+                    'bytes': resource.get('bytes'),
+                    'created_at': _parse_timestamp(resource.get('created_at')),
+                }
+            next_cursor = page.get('next_cursor')
+            if not next_cursor:
+                return
+
+    def info(self, public_id):
+        try:
+            resource = self._call('info', cloudinary.api.resource, public_id, resource_type='image')
+        except cloudinary.exceptions.NotFound as e:
+            raise NotFound(public_id) from e
+        return {
+            'public_id': public_id,
+            'url': resource['secure_url'],
+            'bytes': resource.get('bytes', 0),
+            'format': resource.get('format'),
+        }
+
+    def read(self, public_id):
+        try:
+            return self._call('read', self._download, self.url_for(public_id))
+        except cloudinary.exceptions.NotFound as e:
+            raise NotFound(public_id) from e
+
+    @staticmethod
+    def _download(url):
+        # Same pool (and timeouts) as the upload API
+        response = cloudinary.uploader._http.request('GET', url)
+        if response.status == 404:
+            raise cloudinary.exceptions.NotFound(url)
+        if response.status >= 500 or response.status == 429:
+            raise cloudinary.exceptions.GeneralError(f"Download failed ({response.status})")
+        if response.status >= 400:
+            raise StorageError(f"Download failed ({response.status})")
+        return response.data
+
+    def url_for(self, public_id):
+        return cloudinary.utils.cloudinary_url(public_id, secure=True)[0]
+
+    @staticmethod
+    def _direct_processing():
+        """
+        (format, incoming transformation, {variant: transformation}) mirroring
+        image_variants for uploads that bypass the API: Cloudinary applies
+        the EXIF rotation and drops metadata when it transforms the incoming
+        file, and pre-renders the variants as eager derivatives.
+        """
+        config = current_app.config
+        fmt = 'jpg' if config.get('IMAGE_FORMAT', 'WEBP').upper() == 'JPEG' else 'webp'
+        quality = config.get('IMAGE_QUALITY', 80)
+        max_edge = config.get('IMAGE_MAX_EDGE', 2048)
+        incoming = f"c_limit,h_{max_edge},w_{max_edge},q_{quality}"
+        derived = {
+            name: f"c_limit,h_{edge},w_{edge},q_{quality}"
+            for name, edge in image_variants.VARIANTS if edge
+        }
+        return fmt, incoming, derived
+
+    def direct_upload_variants(self, public_id):
+        fmt, _, derived = self._direct_processing()
+        variants = {'full': cloudinary.utils.cloudinary_url(public_id, secure=True, format=fmt)[0]}
+        for name, transformation in derived.items():
+            variants[name] = cloudinary.utils.cloudinary_url(
+                public_id, secure=True, format=fmt, raw_transformation=transformation
+            )[0]
+        return variants
+
+    def signed_upload(self, folder, public_id, allowed_formats):
+        cfg = cloudinary.config()
+        api_key = current_app.config.get('CLOUDINARY_API_KEY') or cfg.api_key
+        api_secret = current_app.config.get('CLOUDINARY_API_SECRET') or cfg.api_secret
+        cloud_name = current_app.config.get('CLOUDINARY_CLOUD_NAME') or cfg.cloud_name
+        if not (api_key and api_secret and cloud_name):
+            return None
+
+        fmt, incoming, derived = self._direct_processing()
+        params = {
+            'timestamp': int(time.time()),
+            'folder': folder,
+            'public_id': public_id,
+            'allowed_formats': ','.join(allowed_formats),
+            'format': fmt,
+            'transformation': incoming,
+            'eager': '|'.join(f"{transformation}/{fmt}" for transformation in derived.values()),
+        }
+        return {
+            'upload_url': f"https://api.cloudinary.com/v1_1/{cloud_name}/image/upload",
+            'api_key': api_key,
+            'signature': cloudinary.utils.api_sign_request(params, api_secret),
+            **params
+        }
+
+
+def _parse_timestamp(value):
+    """Cloudinary's '2024-05-01T12:00:00Z' as a naive UTC datetime"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+# Magic numbers of the formats we accept, for Content-Type on local files
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'RIFF', 'webp', 'image/webp'),
+)
+
+
+def sniff_format(head):
+    """(format, mimetype) from the first bytes of an image file"""
+    for magic, fmt, mimetype in _SIGNATURES:
+        if head.startswith(magic):
+            return fmt, mimetype
+    return None, 'application/octet-stream'
+
+
+class LocalStorage(Storage):
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, public_id):
+        path = os.path.abspath(os.path.join(self.root, public_id))
+        if not path.startswith(self.root + os.sep):
+            raise NotFound(public_id)
+        return path
+
+    def put(self, fileobj, folder=None, public_id=None):
+        os.makedirs(self.root, exist_ok=True)
+        # Write to a temp file, then move into place atomically
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+                    out.write(chunk)
+            if not public_id:
+                public_id = uuid4().hex
+                if folder:
+                    public_id = f"{folder}/{public_id}"
+            path = self.path_for(public_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {'public_id': public_id, 'url': self.url_for(public_id)}
+
+    def delete(self, public_id):
+        try:
+            os.remove(self.path_for(public_id))
+        except (FileNotFoundError, NotFound):
+            pass
+        return True
+
+    def delete_many(self, public_ids):
+        statuses = {}
+        for public_id in public_ids:
+            try:
+                os.remove(self.path_for(public_id))
+                statuses[public_id] = 'deleted'
+            except (FileNotFoundError, NotFound):
+                statuses[public_id] = 'not_found'
+            except OSError:
+                statuses[public_id] = 'error'
+        return statuses
+
+    def list(self, prefix=''):
+        yield from self._walk(self.root, '', prefix)
+
+    def _walk(self, directory, rel, prefix):
+        """Depth-first walk yielding files in full-path order"""
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        # A directory "a" holds "a/..." paths, so it sorts as "a/"
+        keyed = sorted(
+            (rel + entry.name + ('/' if entry.is_dir() else ''), entry) for entry in entries
+            if not entry.name.startswith('.upload-')
+        )
+        for key, entry in keyed:
+            if entry.is_dir():
+                # Skip subtrees that can't contain the prefix
+                if key.startswith(prefix) or prefix.startswith(key):
+                    yield from self._walk(entry.path, key, prefix)
+            elif key.startswith(prefix):
+                stat = entry.stat()
+                yield {
+                    'public_id': key,
+                    'bytes': stat.st_size,
+                    'created_at': datetime.utcfromtimestamp(stat.st_mtime),
+                }
+
+    def info(self, public_id):
+        path = self.path_for(public_id)
+        try:
+            with open(path, 'rb') as f:
+                fmt, _ = sniff_format(f.read(16))
+            size = os.path.getsize(path)
+        except FileNotFoundError as e:
+            raise NotFound(public_id) from e
+        return {'public_id': public_id, 'url': self.url_for(public_id), 'bytes': size, 'format': fmt}
+
+    def read(self, public_id):
+        try:
+            with open(self.path_for(public_id), 'rb') as f:
+                return f.read()
+        except FileNotFoundError as e:
+            raise NotFound(public_id) from e
+
+    def url_for(self, public_id):
+        return url_for('upload.serve_file', public_id=public_id, _external=True)
+
+
+_CLOUDINARY_PATH = re.compile(r'/image/upload/(?:.+?/)?(?:v\d+/)(?P<public_id>.+)$|/image/upload/(?P<bare>[^,]+)$')
+_LOCAL_PATH = re.compile(r'/api/upload/files/(?P<public_id>.+)$')
+
+
+def public_id_from_url(url):
+    """
+    public_id of an image URL served by either backend, or None.
+
+    Legacy items.images entries carry only a URL; Cloudinary delivery URLs
+    look like ``.../image/upload/[transformations/]v123/<public_id>.<ext>``.
+    """
+    if not isinstance(url, str):
+        return None
+    path = urlsplit(url).path
+    match = _LOCAL_PATH.search(path)
+    if match:
+        return unquote(match.group('public_id'))
+    if 'res.cloudinary.com' not in url:
+        return None
+    match = _CLOUDINARY_PATH.search(path)
+    if not match:
+        return None
+    public_id = unquote(match.group('public_id') or match.group('bare'))
+    return os.path.splitext(public_id)[0] or None
+
+
+def get_storage():
+    """Storage backend configured for the current app"""
+    backend = current_app.config.get('STORAGE_BACKEND', 'cloudinary')
+    if backend == 'local':
+        return LocalStorage(current_app.config['LOCAL_STORAGE_PATH'])
+    if backend == 'cloudinary':
+        return CloudinaryStorage()
+    raise StorageError(f"Unknown STORAGE_BACKEND: {backend}")
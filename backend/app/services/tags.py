@@ -0,0 +1,90 @@
+"""
+Set-based tag resolution
+
+Turns the tag names of one or many items into tag ids with one SELECT,
+one bulk INSERT for the names the user doesn't have yet and (only if
+something was inserted) one re-read. The insert skips rows that collide
+with idx_tags_user_name_lower, so two requests creating the same tag at
+once both end up with the row whichever of them wrote it.
+``set_item_tags()`` then writes only the item_tags rows that differ, so
+saving an item costs the same few statements however many tags it has.
+"""
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.item import item_tags
+from app.models.tag import Tag
+from app.services import change_log
+
+MAX_NAME_LENGTH = 30
+
+
+class InvalidTagName(ValueError):
+    pass
+
+
+def clean_names(names):
+    """Stripped names, first spelling wins per case-insensitive name"""
+    cleaned = {}
+    for name in names or []:
+        name = name.strip()
+        if not name:
+            raise InvalidTagName('Tag name cannot be empty')
+        if len(name) > MAX_NAME_LENGTH:
+            raise InvalidTagName(f'Tag name cannot exceed {MAX_NAME_LENGTH} characters')
+        cleaned.setdefault(name.lower(), name)
+    return list(cleaned.values())
+
+
+def _lookup(user_id, keys):
+    rows = db.session.execute(
+        select(Tag.id, Tag.name).where(Tag.user_id == user_id, func.lower(Tag.name).in_(keys))
+    )
+    return {name.lower(): tag_id for tag_id, name in rows}
+
+
+def _insert_ignoring_duplicates(rows):
+    table = Tag.__table__
+    if db.session.get_bind().dialect.name == 'sqlite':
+        stmt = sqlite_insert(table).on_conflict_do_nothing()
+    else:
+        stmt = insert(table).prefix_with('IGNORE')
+    db.session.execute(stmt, rows)
+
+
+def resolve(user_id, names):
+    """{lower(name): tag_id} for cleaned names, creating the missing tags (no commit)"""
+    if not names:
+        return {}
+    wanted = {name.lower(): name for name in names}
+    ids = _lookup(user_id, list(wanted))
+
+    missing = [name for key, name in wanted.items() if key not in ids]
+    if missing:
+        _insert_ignoring_duplicates([{'user_id': user_id, 'name': name} for name in missing])
+        created = _lookup(user_id, [name.lower() for name in missing])
+        # Bulk INSERT skips the change log's mapper events
+        change_log.record(user_id, 'tag', created.values())
+        ids.update(created)
+    return ids
+
+
+def set_item_tags(item_id, tag_ids, current=None):
+    """
+    Make item_id's item_tags rows exactly tag_ids; current skips the read for
+    new items. Returns whether any row changed.
+    """
+    if current is None:
+        current = db.session.scalars(select(item_tags.c.tag_id).where(item_tags.c.item_id == item_id))
+    current, wanted = set(current), set(tag_ids)
+
+    added = wanted - current
+    if added:
+        db.session.execute(insert(item_tags), [{'item_id': item_id, 'tag_id': tag_id} for tag_id in added])
+    removed = current - wanted
+    if removed:
+        db.session.execute(
+            delete(item_tags).where(item_tags.c.item_id == item_id, item_tags.c.tag_id.in_(removed))
+        )
+    return bool(added or removed)
@@ -0,0 +1,111 @@
+"""
+Background sweeper for expired pending uploads
+
+Runs outside the request path, either from ``flask uploads sweep`` (cron)
+or from an optional in-process timer (PENDING_UPLOAD_SWEEP_INTERVAL).
+A JobLease makes sure only one gunicorn worker sweeps at a time. Expired
+assets are removed with the storage backend's bulk delete, one batch per call, and
+each batch is committed on its own so a crash loses at most one batch.
+"""
+import time
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.job_lease import JobLease
+from app.models.pending_upload import PendingUpload
+from app.services.background import lease_owner, start_periodic_job
+from app.services.image_dedup import forget as forget_hashes
+from app.services.image_variants import DERIVED_VARIANTS, variant_public_ids
+from app.services.storage import StorageUnavailable, get_storage
+
+LEASE_NAME = 'pending_upload_sweeper'
+
+# Cloudinary's delete_resources accepts at most 100 public_ids per call
+MAX_BATCH_SIZE = 100
+ASSETS_PER_UPLOAD = 1 + len(DERIVED_VARIANTS)
+
+
+def sweep_pending_uploads(hours=24, batch_size=MAX_BATCH_SIZE // ASSETS_PER_UPLOAD, lease_seconds=600):
+    """
+    Delete pending uploads older than ``hours`` from storage and the DB.
+
+    ``batch_size`` counts uploads; each one is deleted together with its
+    variants, so it is capped to fit Cloudinary's 100-id limit.
+
+    Returns a report dict; ``acquired`` is False when another worker holds
+    the lease and nothing was done.
+    """
+    owner = lease_owner()
+    report = {'acquired': False, 'lease_lost': False, 'deleted': 0, 'failed': 0, 'batches': 0, 'duration_ms': 0.0}
+    if not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+        return report
+
+    report['acquired'] = True
+    started = time.perf_counter()
+    try:
+        _sweep(report, owner, hours, max(1, min(batch_size, MAX_BATCH_SIZE // ASSETS_PER_UPLOAD)), lease_seconds)
+    finally:
+        JobLease.release(LEASE_NAME, owner)
+        report['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def _sweep(report, owner, hours, batch_size, lease_seconds):
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    storage = get_storage()
+    last_public_id = ''
+
+    while True:
+        # Keep the lease alive through long sweeps; once another worker has
+        # taken it over, deleting alongside it would double the work
+        if report['batches'] and not JobLease.acquire(LEASE_NAME, owner, lease_seconds):
+            print("Sweeper stopped: lease was taken over", flush=True)
+            report['lease_lost'] = True
+            break
+
+        # Keyset over public_id so failed ids aren't re-selected in this run
+        batch = [public_id for (public_id,) in db.session.query(PendingUpload.public_id).filter(
+            PendingUpload.created_at < cutoff,
+            PendingUpload.public_id > last_public_id
+        ).order_by(PendingUpload.public_id).limit(batch_size)]
+        if not batch:
+            break
+        last_public_id = batch[-1]
+        report['batches'] += 1
+
+        # Each upload may have derived variants stored next to it
+        asset_ids = []
+        for public_id in batch:
+            asset_ids.append(public_id)
+            asset_ids.extend(variant_public_ids(public_id))
+
+        try:
+            statuses = storage.delete_many(asset_ids)
+        except StorageUnavailable as e:
+            # Breaker is open; stop rather than fail every remaining batch
+            print(f"Sweeper stopped: {e}", flush=True)
+            report['failed'] += len(batch)
+            break
+        except Exception as e:
+            print(f"Sweeper batch failed ({len(batch)} uploads): {e}", flush=True)
+            report['failed'] += len(batch)
+            continue
+
+        done = [public_id for public_id in batch if statuses.get(public_id) in ('deleted', 'not_found')]
+        report['failed'] += len(batch) - len(done)
+
+        if done:
+            PendingUpload.query.filter(
+                PendingUpload.public_id.in_(done)
+            ).delete(synchronize_session=False)
+            forget_hashes(done)
+            db.session.commit()
+            report['deleted'] += len(done)
+
+
+def start_background_sweeper(app, interval_seconds, hours=24):
+    """Run sweep_pending_uploads every interval_seconds on a daemon thread"""
+    return start_periodic_job(
+        app, 'pending-upload-sweeper', interval_seconds,
+        lambda: sweep_pending_uploads(hours=hours)
+    )
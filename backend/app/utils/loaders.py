@@ -0,0 +1,37 @@
+"""
+Batch loaders for serializers
+
+Serializers walk relationships one row at a time; these helpers load a
+relationship for a whole page in one query up front and attach the result
+to each instance as its committed value. The instances live in the
+request's scoped session, so any serializer touching them later in the
+same request reads the primed collection instead of lazy-loading it.
+"""
+from collections import defaultdict
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.models.item import item_tags
+from app.models.tag import Tag
+
+
+def prime_item_tags(items):
+    """Load tags for all ``items`` in a single select-in query"""
+    # Skip instances whose tags are already loaded in this session
+    pending = [item for item in items if 'tags' not in item.__dict__]
+    if not pending:
+        return items
+
+    by_item = defaultdict(list)
+    rows = db.session.query(item_tags.c.item_id, Tag).join(
+        Tag, Tag.id == item_tags.c.tag_id
+    ).filter(
+        item_tags.c.item_id.in_([item.id for item in pending])
+    ).order_by(Tag.id).all()
+    for item_id, tag in rows:
+        by_item[item_id].append(tag)
+
+    for item in pending:
+        set_committed_value(item, 'tags', by_item.get(item.id, []))
+    return items
@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination helpers
+
+Sort columns may be NULL on legacy rows. MySQL and SQLite sort NULLs
+lowest (first ascending, last descending); a cursor row with a NULL key
+carries ``null`` in its token and the seek predicate handles it with an
+explicit IS NULL branch.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+# Hard ceiling for cursor mode so one request can't materialize an unbounded page
+MAX_CURSOR_PER_PAGE = 100
+
+# Sort keys that have a seekable index path; value codec per key
+CURSOR_SORT_FIELDS = {
+    'created_at': 'datetime',
+    'updated_at': 'datetime',
+    'difficulty': 'int',
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token is malformed or doesn't match the requested sort"""
+
+
+def encode_cursor(sort_by, direction, value, row_id):
+    """Build an opaque token from the last row's sort key and id"""
+    if CURSOR_SORT_FIELDS[sort_by] == 'datetime' and value is not None:
+        value = value.isoformat()
+    payload = json.dumps([sort_by, direction, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_by, direction):
+    """Return (value, id) from a token, validating it against the current sort"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort, cursor_dir, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+
+    if cursor_sort != sort_by or cursor_dir != direction:
+        raise InvalidCursor('Cursor does not match sort_by/sort_direction')
+    if not isinstance(row_id, int):
+        raise InvalidCursor('Malformed cursor')
+    if value is None:
+        return None, row_id
+
+    try:
+        if CURSOR_SORT_FIELDS[sort_by] == 'datetime':
+            value = datetime.fromisoformat(value)
+        else:
+            value = int(value)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    return value, row_id
+
+
+def apply_keyset(query, sort_column, id_column, direction, cursor_value=None, cursor_id=None):
+    """
+    Order by (sort_column, id) and seek past the cursor row.
+
+    The seek predicate is spelled out as OR/AND rather than a row-value
+    comparison so MySQL/TiDB can turn it into an index range scan.
+    """
+    if direction == 'asc':
+        query = query.order_by(sort_column.asc(), id_column.asc())
+        if cursor_id is None:
+            return query
+        if cursor_value is None:
+            # Still inside the leading NULLs
+            return query.filter(or_(
+                and_(sort_column.is_(None), id_column > cursor_id),
+                sort_column.isnot(None)
+            ))
+        return query.filter(or_(
+            sort_column > cursor_value,
+            and_(sort_column == cursor_value, id_column > cursor_id)
+        ))
+
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor_id is None:
+        return query
+    if cursor_value is None:
+        # Inside the trailing NULLs
+        return query.filter(sort_column.is_(None), id_column < cursor_id)
+    return query.filter(or_(
+        sort_column < cursor_value,
+        and_(sort_column == cursor_value, id_column < cursor_id),
+        sort_column.is_(None)
+    ))
@@ -0,0 +1,90 @@
+"""
+Benchmark: review-session sampling vs ORDER BY RANDOM()
+
+Seeds an in-memory SQLite database with N flagged items for one user and
+times the old query against app.services.sampling at each size.
+
+Usage: python benchmark_review_session.py [--sizes 1000 10000 100000] [--runs 20] [--limit 10]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+from app import create_app, db
+from app.models.user import User
+from app.models.item import Item
+from app.services.sampling import sample_review_items
+
+
+def seed(user_id, count, batch=5000):
+    now = datetime.utcnow()
+    # Realistic row width: a paragraph of text and two image entries
+    content = 'Lorem ipsum dolor sit amet. ' * 20
+    images = [
+        {'url': 'https://res.cloudinary.com/demo/image/upload/selective-questions/a.jpg', 'public_id': 'selective-questions/a', 'rotation': 0},
+        {'url': 'https://res.cloudinary.com/demo/image/upload/selective-questions/b.jpg', 'public_id': 'selective-questions/b', 'rotation': 90},
+    ]
+    rows = [{
+        'title': f'Q{i}',
+        'author_id': user_id,
+        'needs_review': True,
+        'status': 'ANSWERED',
+        'difficulty': (i % 5) + 1,
+        'content_text': content,
+        'images': images,
+        'created_at': now,
+        'updated_at': now,
+    } for i in range(count)]
+    # Core insert: skips the stats listeners, which don't matter here
+    for start in range(0, count, batch):
+        db.session.execute(insert(Item.__table__), rows[start:start + batch])
+    db.session.commit()
+
+
+def order_by_random(user_id, limit):
+    return Item.query.filter_by(
+        author_id=user_id, needs_review=True
+    ).order_by(func.random()).limit(limit).all()
+
+
+def time_it(fn, runs):
+    timings = []
+    for _ in range(runs):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'flagged':>10} {'ORDER BY RANDOM() ms':>22} {'sampler ms':>12} {'speedup':>9}")
+    for size in args.sizes:
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            seed(user_id, size)
+
+            old = time_it(lambda: order_by_random(user_id, args.limit), args.runs)
+            new = time_it(lambda: sample_review_items(user_id, args.limit), args.runs)
+            print(f"{size:>10} {old:>22.2f} {new:>12.2f} {old / new:>8.1f}x")
+
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Verify the per-user hot queries are served by their composite indexes.
+
+Runs EXPLAIN against the configured database (SQLite: EXPLAIN QUERY PLAN,
+MySQL/TiDB: EXPLAIN) and checks the expected index shows up in the plan.
+
+Usage: python check_query_plans.py
+"""
+import sys
+from sqlalchemy import select, func, text
+
+from app import create_app, db
+from app.models.item import Item
+from app.models.answer import Answer
+
+
+def hot_queries(user_id=1, item_id=1, collection_id=1):
+    """(name, statement, expected index) for each hot access path"""
+    return [
+        (
+            'get_items by collection, newest first',
+            select(Item.id).where(
+                Item.author_id == user_id,
+                Item.collection_id == collection_id
+            ).order_by(Item.created_at.desc()).limit(10),
+            'idx_items_author_collection_created',
+        ),
+        (
+            'get_stats status breakdown',
+            select(Item.status, func.count(Item.id)).where(
+                Item.author_id == user_id
+            ).group_by(Item.status),
+            'idx_items_author_status',
+        ),
+        (
+            'review session flagged items',
+            select(Item.id).where(
+                Item.author_id == user_id,
+                Item.needs_review == True
+            ),
+            'idx_items_author_needs_review',
+        ),
+        (
+            'due queue, earliest first',
+            select(Item.id).where(
+                Item.author_id == user_id,
+                Item.due_at <= func.now()
+            ).order_by(Item.due_at.asc()).limit(10),
+            'idx_items_author_due',
+        ),
+        (
+            'submit_answer correct count',
+            select(func.count(Answer.id)).where(
+                Answer.item_id == item_id,
+                Answer.is_correct == True
+            ),
+            'idx_answers_item_correct',
+        ),
+        (
+            'answers by user, newest first',
+            select(Answer.id).where(
+                Answer.user_id == user_id
+            ).order_by(Answer.created_at.desc()).limit(50),
+            'idx_answers_user_created',
+        ),
+    ]
+
+
+def explain(statement, bind=None):
+    """Return the plan for ``statement`` as a single string"""
+    bind = bind or db.engine
+    dialect = bind.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    with bind.connect() as conn:
+        rows = conn.execute(text(prefix + sql)).fetchall()
+    return '\n'.join(' '.join(str(col) for col in row) for row in rows)
+
+
+def check_query_plans(bind=None):
+    """Return a list of (name, expected_index, plan, ok)"""
+    results = []
+    for name, statement, index_name in hot_queries():
+        plan = explain(statement, bind)
+        results.append((name, index_name, plan, index_name in plan))
+    return results
+
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        print(f"Dialect: {db.engine.dialect.name}")
+        failed = 0
+        for name, index_name, plan, ok in check_query_plans():
+            print(f"[{'OK' if ok else 'FAIL'}] {name} -> {index_name}")
+            if not ok:
+                failed += 1
+                print('    ' + plan.replace('\n', '\n    '))
+        sys.exit(1 if failed else 0)
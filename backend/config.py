@@ -32,6 +32,55 @@ class Config:
     CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
     
+    # 批量上传: 单次请求最多文件数 / 并发上传线程数
+    UPLOAD_BATCH_MAX_FILES = int(os.environ.get('UPLOAD_BATCH_MAX_FILES', 10))
+    UPLOAD_BATCH_WORKERS = int(os.environ.get('UPLOAD_BATCH_WORKERS', 4))
+    
+    # 批量创建题目: 单次请求最多行数
+    ITEMS_BULK_MAX_ROWS = int(os.environ.get('ITEMS_BULK_MAX_ROWS', 500))
+    
+    # 批量导入: 每批条数 / 图片并发上传线程数 / 导入任务线程数（0 = 在请求线程内执行）
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 100))
+    IMPORT_UPLOAD_WORKERS = int(os.environ.get('IMPORT_UPLOAD_WORKERS', 4))
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+    IMPORT_STORAGE_PATH = os.environ.get(
+        'IMPORT_STORAGE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imports')
+    )
+    
+    # 增量同步: 每次最多返回的变更日志条数
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
+    
+    # 图片存储后端: cloudinary 或 local（本地磁盘，便于离线测试和压测）
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'cloudinary')
+    LOCAL_STORAGE_PATH = os.environ.get(
+        'LOCAL_STORAGE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    )
+    
+    # 远程存储调用: 超时(秒) / 幂等操作重试次数 / 熔断器
+    STORAGE_CONNECT_TIMEOUT = float(os.environ.get('STORAGE_CONNECT_TIMEOUT', 5))
+    STORAGE_READ_TIMEOUT = float(os.environ.get('STORAGE_READ_TIMEOUT', 30))
+    STORAGE_RETRIES = int(os.environ.get('STORAGE_RETRIES', 2))
+    STORAGE_BREAKER_FAILURE_RATE = float(os.environ.get('STORAGE_BREAKER_FAILURE_RATE', 0.5))
+    STORAGE_BREAKER_MIN_CALLS = int(os.environ.get('STORAGE_BREAKER_MIN_CALLS', 10))
+    STORAGE_BREAKER_WINDOW_SECONDS = int(os.environ.get('STORAGE_BREAKER_WINDOW_SECONDS', 60))
+    STORAGE_BREAKER_RESET_SECONDS = int(os.environ.get('STORAGE_BREAKER_RESET_SECONDS', 30))
+    
+    # 过期待处理上传清理（秒，0 = 不在进程内运行，改用 `flask uploads sweep`）
+    PENDING_UPLOAD_SWEEP_INTERVAL = int(os.environ.get('PENDING_UPLOAD_SWEEP_INTERVAL', 0))
+    PENDING_UPLOAD_TTL_HOURS = int(os.environ.get('PENDING_UPLOAD_TTL_HOURS', 24))
+    
+    # 上传图片处理（EXIF方向校正、长边上限、重新编码、多尺寸）
+    IMAGE_FORMAT = os.environ.get('IMAGE_FORMAT', 'WEBP')  # WEBP 或 JPEG
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 80))
+    IMAGE_MAX_EDGE = int(os.environ.get('IMAGE_MAX_EDGE', 2048))
+    IMAGE_PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS', 2))  # 0 = 在请求线程内处理
+    
+    # 图片删除发件箱（秒，0 = 不在进程内运行，改用 `flask uploads drain-deletions`）
+    DELETION_OUTBOX_INTERVAL = int(os.environ.get('DELETION_OUTBOX_INTERVAL', 0))
+    DELETION_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('DELETION_OUTBOX_MAX_ATTEMPTS', 10))
+    
     # CORS配置
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
@@ -109,6 +158,8 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     # SQLite不支持pool参数,移除或覆盖
     SQLALCHEMY_ENGINE_OPTIONS = {}
+    IMAGE_PROCESS_WORKERS = 0
+    IMPORT_WORKERS = 0
 
 
 # 配置字典
@@ -0,0 +1,94 @@
+"""Add item_images index table, backfilled from items.images JSON
+
+Revision ID: 1184dabc5bef
+Revises: 99bb886da2ce
+Create Date: 2026-10-18 18:31:26.447810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '1184dabc5bef'
+down_revision = '99bb886da2ce'
+branch_labels = None
+depends_on = None
+
+
+def _backfill_rows(conn):
+    """item_images rows from the JSON column; fails if items share a public_id"""
+    result = conn.execute(sa.text(
+        "SELECT id, author_id, images FROM items WHERE images IS NOT NULL ORDER BY id"
+    ))
+    owners = {}
+    rows = []
+    for item_id, author_id, images in result:
+        if isinstance(images, str):
+            try:
+                images = json.loads(images)
+            except ValueError:
+                continue
+        for position, img in enumerate(images or []):
+            if not isinstance(img, dict) or not img.get('public_id'):
+                continue
+            public_id = img['public_id']
+            owners.setdefault(public_id, [])
+            if item_id in owners[public_id]:
+                continue
+            owners[public_id].append(item_id)
+            rows.append({
+                'item_id': item_id,
+                'user_id': author_id,
+                'public_id': public_id,
+                'position': position,
+                'rotation': img.get('rotation') or 0
+            })
+
+    # Keeping one owner would let deleting it queue the asset for deletion
+    # while the other items still show it, so these need fixing by hand
+    shared = {public_id: ids for public_id, ids in owners.items() if len(ids) > 1}
+    if shared:
+        listing = '\n'.join(
+            f"  {public_id}: items {', '.join(map(str, ids))}"
+            for public_id, ids in sorted(shared.items())[:100]
+        )
+        more = f"\n  ... and {len(shared) - 100} more" if len(shared) > 100 else ''
+        raise RuntimeError(
+            f"{len(shared)} image public_id(s) are used by more than one item. "
+            f"Give each item its own copy (or remove the image from all but one item) "
+            f"and re-run the migration:\n{listing}{more}"
+        )
+    return rows
+
+
+def upgrade():
+    # Check before any DDL: MySQL can't roll back a created table
+    rows = _backfill_rows(op.get_bind())
+
+    item_images = op.create_table('item_images',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('rotation', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('item_images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_item_images_item_id'), ['item_id'], unique=False)
+        batch_op.create_index('idx_item_images_public_id', ['public_id'], unique=True)
+
+    for start in range(0, len(rows), 1000):
+        op.bulk_insert(item_images, rows[start:start + 1000])
+
+
+def downgrade():
+    with op.batch_alter_table('item_images', schema=None) as batch_op:
+        batch_op.drop_index('idx_item_images_public_id')
+        batch_op.drop_index(batch_op.f('ix_item_images_item_id'))
+
+    op.drop_table('item_images')
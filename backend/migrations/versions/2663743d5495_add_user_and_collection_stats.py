@@ -0,0 +1,86 @@
+"""Add user_stats and collection_stats projection tables
+
+Revision ID: 2663743d5495
+Revises: 298faeb7a3a8
+Create Date: 2026-10-18 11:40:02.118934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2663743d5495'
+down_revision = '298faeb7a3a8'
+branch_labels = None
+depends_on = None
+
+
+COUNTER_SUMS = """
+    COUNT(*),
+    SUM(CASE WHEN status IN ('ANSWERED', 'MASTERED') THEN 1 ELSE 0 END),
+    SUM(CASE WHEN status = 'MASTERED' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN needs_review THEN 1 ELSE 0 END)
+"""
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.String(length=100), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('answered', sa.Integer(), nullable=False),
+    sa.Column('mastered', sa.Integer(), nullable=False),
+    sa.Column('need_review', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'dimension', 'bucket')
+    )
+    op.create_table('collection_stats',
+    sa.Column('collection_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('answered', sa.Integer(), nullable=False),
+    sa.Column('mastered', sa.Integer(), nullable=False),
+    sa.Column('need_review', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['collection_id'], ['collections.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('collection_id')
+    )
+    with op.batch_alter_table('collection_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_collection_stats_user_id'), ['user_id'], unique=False)
+
+    # Backfill from existing items (same as `flask stats rebuild`)
+    op.execute(f"""
+        INSERT INTO user_stats (user_id, dimension, bucket, total, answered, mastered, need_review)
+        SELECT author_id, 'all', '', {COUNTER_SUMS}
+        FROM items WHERE author_id IS NOT NULL
+        GROUP BY author_id
+    """)
+    op.execute(f"""
+        INSERT INTO user_stats (user_id, dimension, bucket, total, answered, mastered, need_review)
+        SELECT author_id, 'subject', subject, {COUNTER_SUMS}
+        FROM items WHERE author_id IS NOT NULL AND subject IS NOT NULL AND subject != ''
+        GROUP BY author_id, subject
+    """)
+    op.execute(f"""
+        INSERT INTO user_stats (user_id, dimension, bucket, total, answered, mastered, need_review)
+        SELECT author_id, 'difficulty', CAST(difficulty AS CHAR), {COUNTER_SUMS}
+        FROM items WHERE author_id IS NOT NULL AND difficulty IS NOT NULL
+        GROUP BY author_id, CAST(difficulty AS CHAR)
+    """)
+    op.execute(f"""
+        INSERT INTO collection_stats (collection_id, user_id, total, answered, mastered, need_review)
+        SELECT items.collection_id, collections.user_id, {COUNTER_SUMS}
+        FROM items JOIN collections ON collections.id = items.collection_id
+        WHERE items.author_id IS NOT NULL
+        GROUP BY items.collection_id, collections.user_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('collection_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_collection_stats_user_id'))
+
+    op.drop_table('collection_stats')
+    op.drop_table('user_stats')
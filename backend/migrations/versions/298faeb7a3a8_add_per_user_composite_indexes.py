@@ -0,0 +1,43 @@
+"""Add composite indexes for per-user hot queries
+
+Revision ID: 298faeb7a3a8
+Revises: 8dab8182d25f
+Create Date: 2026-10-18 09:12:44.531207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '298faeb7a3a8'
+down_revision = '8dab8182d25f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        # get_items / collection listing: author -> collection -> newest first
+        batch_op.create_index('idx_items_author_collection_created', ['author_id', 'collection_id', 'created_at'], unique=False)
+        # analytics status breakdown, recommendations
+        batch_op.create_index('idx_items_author_status', ['author_id', 'status'], unique=False)
+        # review session, collection need_review counts
+        batch_op.create_index('idx_items_author_needs_review', ['author_id', 'needs_review'], unique=False)
+
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        # submit_answer attempt/correct counts
+        batch_op.create_index('idx_answers_item_correct', ['item_id', 'is_correct'], unique=False)
+        # per-user answer history
+        batch_op.create_index('idx_answers_user_created', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.drop_index('idx_answers_user_created')
+        batch_op.drop_index('idx_answers_item_correct')
+
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('idx_items_author_needs_review')
+        batch_op.drop_index('idx_items_author_status')
+        batch_op.drop_index('idx_items_author_collection_created')
@@ -0,0 +1,29 @@
+"""Add job_leases table for single-runner background jobs
+
+Revision ID: 5d0c3a9e71b4
+Revises: 1184dabc5bef
+Create Date: 2026-10-18 19:02:44.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0c3a9e71b4'
+down_revision = '1184dabc5bef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_leases',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_leases')
@@ -0,0 +1,36 @@
+"""Add correct_count to items for incremental answer stats
+
+Revision ID: 61e9857c7772
+Revises: b4f0342aecfb
+Create Date: 2026-10-18 15:22:10.904518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '61e9857c7772'
+down_revision = 'b4f0342aecfb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('correct_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from answers (same as `flask stats repair-answers`)
+    op.execute("""
+        UPDATE items SET
+            correct_count = (
+                SELECT COUNT(*) FROM answers
+                WHERE answers.item_id = items.id AND answers.is_correct = TRUE
+            ),
+            updated_at = updated_at
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('correct_count')
@@ -0,0 +1,41 @@
+"""Add SM-2 scheduling columns and due queue index to items
+
+Revision ID: 99bb886da2ce
+Revises: 61e9857c7772
+Create Date: 2026-10-18 16:48:51.273016
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '99bb886da2ce'
+down_revision = '61e9857c7772'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_interval', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('ease_factor', sa.Float(), server_default='2.5', nullable=False))
+        batch_op.add_column(sa.Column('repetitions', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('due_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('idx_items_author_due', ['author_id', 'due_at'], unique=False)
+
+    # Existing items that still need work are due now; settled items stay
+    # unscheduled until they are answered again
+    op.execute("""
+        UPDATE items SET due_at = created_at, updated_at = updated_at
+        WHERE status != 'MASTERED' OR needs_review = TRUE
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('idx_items_author_due')
+        batch_op.drop_column('due_at')
+        batch_op.drop_column('repetitions')
+        batch_op.drop_column('ease_factor')
+        batch_op.drop_column('review_interval')
@@ -0,0 +1,55 @@
+"""Add change_log table for delta sync
+
+Revision ID: 9b2d6e83f1a4
+Revises: e5b90a4c1d36
+Create Date: 2026-10-18 21:34:12.418507
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2d6e83f1a4'
+down_revision = 'e5b90a4c1d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index('idx_change_log_user_seq', ['user_id', 'seq'], unique=False)
+
+    # Seed the log with current rows so a first sync (since=0) sees existing data
+    op.execute(
+        "INSERT INTO change_log (user_id, entity, entity_id, op, created_at) "
+        "SELECT user_id, 'collection', id, "
+        "CASE WHEN is_deleted = 1 THEN 'delete' ELSE 'upsert' END, CURRENT_TIMESTAMP "
+        "FROM collections"
+    )
+    op.execute(
+        "INSERT INTO change_log (user_id, entity, entity_id, op, created_at) "
+        "SELECT user_id, 'tag', id, 'upsert', CURRENT_TIMESTAMP FROM tags"
+    )
+    op.execute(
+        "INSERT INTO change_log (user_id, entity, entity_id, op, created_at) "
+        "SELECT author_id, 'item', id, 'upsert', CURRENT_TIMESTAMP "
+        "FROM items WHERE author_id IS NOT NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('idx_change_log_user_seq')
+
+    op.drop_table('change_log')
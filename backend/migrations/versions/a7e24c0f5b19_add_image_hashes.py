@@ -0,0 +1,42 @@
+"""Add image_hashes table for upload deduplication
+
+Revision ID: a7e24c0f5b19
+Revises: 5d0c3a9e71b4
+Create Date: 2026-10-18 19:40:12.905361
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e24c0f5b19'
+down_revision = '5d0c3a9e71b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_hashes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('phash', sa.String(length=16), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('variants', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('image_hashes', schema=None) as batch_op:
+        batch_op.create_index('idx_image_hashes_user_sha256', ['user_id', 'sha256'], unique=False)
+        batch_op.create_index(batch_op.f('ix_image_hashes_public_id'), ['public_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('image_hashes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_image_hashes_public_id'))
+        batch_op.drop_index('idx_image_hashes_user_sha256')
+
+    op.drop_table('image_hashes')
@@ -0,0 +1,43 @@
+"""Add item_count and need_review_count counter cache to collections
+
+Revision ID: b4f0342aecfb
+Revises: 2663743d5495
+Create Date: 2026-10-18 14:05:37.620155
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f0342aecfb'
+down_revision = '2663743d5495'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('collections', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('need_review_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing items
+    op.execute("""
+        UPDATE collections SET
+            item_count = (
+                SELECT COUNT(*) FROM items
+                WHERE items.collection_id = collections.id AND items.author_id IS NOT NULL
+            ),
+            need_review_count = (
+                SELECT COUNT(*) FROM items
+                WHERE items.collection_id = collections.id AND items.author_id IS NOT NULL
+                AND items.needs_review = TRUE
+            ),
+            updated_at = updated_at
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('collections', schema=None) as batch_op:
+        batch_op.drop_column('need_review_count')
+        batch_op.drop_column('item_count')
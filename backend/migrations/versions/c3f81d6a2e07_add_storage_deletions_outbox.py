@@ -0,0 +1,37 @@
+"""Add storage_deletions outbox table
+
+Revision ID: c3f81d6a2e07
+Revises: a7e24c0f5b19
+Create Date: 2026-10-18 20:21:37.550218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f81d6a2e07'
+down_revision = 'a7e24c0f5b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('storage_deletions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('storage_deletions', schema=None) as batch_op:
+        batch_op.create_index('idx_storage_deletions_due', ['attempts', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('storage_deletions', schema=None) as batch_op:
+        batch_op.drop_index('idx_storage_deletions_due')
+
+    op.drop_table('storage_deletions')
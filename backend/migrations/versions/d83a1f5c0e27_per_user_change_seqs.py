@@ -0,0 +1,73 @@
+"""Assign change_log seqs from a per-user counter row
+
+Revision ID: d83a1f5c0e27
+Revises: 2f6c84b0d7e3
+Create Date: 2026-10-18 23:12:05.731940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83a1f5c0e27'
+down_revision = '2f6c84b0d7e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_seqs',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_seq', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Existing seqs are unique and increasing per user, so clients' tokens stay valid
+    op.execute(
+        "INSERT INTO change_seqs (user_id, last_seq) "
+        "SELECT user_id, MAX(seq) FROM change_log GROUP BY user_id"
+    )
+
+    op.create_table('change_log_new',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'seq')
+    )
+    op.execute(
+        "INSERT INTO change_log_new (user_id, seq, entity, entity_id, op, created_at) "
+        "SELECT user_id, seq, entity, entity_id, op, created_at FROM change_log"
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('idx_change_log_user_seq')
+    op.drop_table('change_log')
+    op.rename_table('change_log_new', 'change_log')
+
+
+def downgrade():
+    op.create_table('change_log_old',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    # Per-user seqs overlap across users; renumber in (seq, user) order
+    op.execute(
+        "INSERT INTO change_log_old (user_id, entity, entity_id, op, created_at) "
+        "SELECT user_id, entity, entity_id, op, created_at FROM change_log ORDER BY seq, user_id"
+    )
+    op.drop_table('change_log')
+    op.rename_table('change_log_old', 'change_log')
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index('idx_change_log_user_seq', ['user_id', 'seq'], unique=False)
+
+    op.drop_table('change_seqs')
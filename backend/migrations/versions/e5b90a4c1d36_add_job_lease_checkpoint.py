@@ -0,0 +1,26 @@
+"""Add checkpoint column to job_leases for resumable jobs
+
+Revision ID: e5b90a4c1d36
+Revises: c3f81d6a2e07
+Create Date: 2026-10-18 20:58:03.274116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b90a4c1d36'
+down_revision = 'c3f81d6a2e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job_leases', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checkpoint', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job_leases', schema=None) as batch_op:
+        batch_op.drop_column('checkpoint')
@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app import create_app, db
 from app.models.user import User
 from app.models.item import Item
+from app.services.storage import get_storage
 
 @pytest.fixture
 def app():
@@ -69,3 +70,10 @@ def seed_item(client, auth_headers):
         'difficulty': 3
     }, headers=auth_headers)
     return response.json
+
+@pytest.fixture
+def local_storage(app, tmp_path):
+    """LocalStorage under a temporary directory, inside a request context (URLs)"""
+    app.config.update(STORAGE_BACKEND='local', LOCAL_STORAGE_PATH=str(tmp_path))
+    with app.test_request_context():
+        yield get_storage()
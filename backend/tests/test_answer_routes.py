@@ -146,3 +146,26 @@ def test_answer_updates_stats(client, auth_headers, app):
         q = Item.query.get(item_id)
         assert q.attempts == 3
         assert abs(q.success_rate - 66.7) < 0.1 # 2/3 = 66.7%
+
+def test_answer_stats_repair_command(client, auth_headers, app):
+    """repair-answers recomputes counters from the answers table"""
+    item = Item(title="Repair Question", subject="MATHS", difficulty=3, author_id=1)
+    db.session.add(item)
+    db.session.commit()
+    item_id = item.id
+
+    for is_correct in (True, False, False, True):
+        client.post(f'/api/items/{item_id}/answers', json={'is_correct': is_correct}, headers=auth_headers)
+
+    q = Item.query.get(item_id)
+    assert (q.attempts, q.correct_count, q.success_rate) == (4, 2, 50.0)
+
+    # Corrupt the counters, then repair
+    q.attempts, q.correct_count, q.success_rate = 0, 0, 0.0
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['stats', 'repair-answers'])
+    assert result.exit_code == 0
+    db.session.expire_all()
+    q = Item.query.get(item_id)
+    assert (q.attempts, q.correct_count, q.success_rate) == (4, 2, 50.0)
@@ -0,0 +1,109 @@
+import threading
+import uuid
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+from sqlalchemy import event
+
+from app import db
+from app.models.image_hash import ImageHash
+from app.models.pending_upload import PendingUpload
+
+
+def _jpeg(color, size=(300, 200)):
+    buf = BytesIO()
+    Image.new('RGB', size, color).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def _fake_upload(threads):
+    def upload(file, public_id=None, folder=None, resource_type=None):
+        threads.add(threading.get_ident())
+        public_id = public_id or f'{folder}/{uuid.uuid4().hex}'
+        return {'public_id': public_id, 'secure_url': f'https://cdn/{public_id}.webp'}
+    return upload
+
+
+def _post(client, headers, files):
+    return client.post(
+        '/api/upload/batch',
+        data={'files': [(BytesIO(data), name) for name, data in files]},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def test_batch_upload_stores_all_files_with_bulk_inserts(app, client, auth_headers):
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO pending_uploads') or statement.startswith('INSERT INTO image_hashes'):
+            inserts.append(statement.split()[2])
+
+    threads = set()
+    event.listen(db.engine, 'before_cursor_execute', count_inserts)
+    try:
+        with patch('cloudinary.uploader.upload', side_effect=_fake_upload(threads)):
+            response = _post(client, auth_headers, [
+                ('a.jpg', _jpeg('red')),
+                ('b.jpg', _jpeg('green')),
+                ('c.png', _jpeg('blue')),
+            ])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_inserts)
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [r['filename'] for r in results] == ['a.jpg', 'b.jpg', 'c.png']
+    assert all(r['status'] == 201 and set(r['variants']) == {'full', 'medium', 'thumb'} for r in results)
+    assert response.json['uploaded'] == 3
+
+    assert PendingUpload.query.count() == 3
+    assert ImageHash.query.count() == 3
+    # One executemany per table, not one INSERT per file
+    assert sorted(inserts) == ['image_hashes', 'pending_uploads']
+    # Storage calls ran off the request thread
+    assert threading.get_ident() not in threads
+
+
+def test_batch_upload_reports_per_file_failures(client, auth_headers):
+    with patch('cloudinary.uploader.upload', side_effect=_fake_upload(set())):
+        response = _post(client, auth_headers, [
+            ('ok.jpg', _jpeg('red')),
+            ('notes.txt', b'hello'),
+            ('broken.jpg', b'not an image'),
+        ])
+
+    assert response.status_code == 200
+    statuses = [(r['filename'], r['status']) for r in response.json['results']]
+    assert statuses == [('ok.jpg', 201), ('notes.txt', 400), ('broken.jpg', 400)]
+    assert response.json['uploaded'] == 1
+    assert response.json['failed'] == 2
+    assert PendingUpload.query.count() == 1
+
+
+def test_batch_upload_collapses_identical_files(client, auth_headers):
+    data = _jpeg('red')
+    with patch('cloudinary.uploader.upload', side_effect=_fake_upload(set())) as mock_upload:
+        response = _post(client, auth_headers, [('one.jpg', data), ('two.jpg', data)])
+
+    first, second = response.json['results']
+    assert first['status'] == 201
+    assert second['status'] == 200
+    assert second['duplicate'] is True
+    assert second['public_id'] == first['public_id']
+    # Full + two variants, once
+    assert mock_upload.call_count == 3
+    assert PendingUpload.query.count() == 1
+
+
+def test_batch_upload_limits_file_count(app, client, auth_headers):
+    app.config['UPLOAD_BATCH_MAX_FILES'] = 2
+    response = _post(client, auth_headers, [(f'{i}.jpg', _jpeg('red')) for i in range(3)])
+    assert response.status_code == 400
+
+
+def test_batch_upload_requires_files(client, auth_headers):
+    response = client.post('/api/upload/batch', data={}, headers=auth_headers, content_type='multipart/form-data')
+    assert response.status_code == 400
@@ -69,3 +69,46 @@ def test_need_review_count_independent_of_status(client, auth_headers):
     response = client.get('/api/collections', headers=auth_headers)
     test_col = next((c for c in response.json if c['name'] == 'Status Test'), None)
     assert test_col['need_review_count'] == 1  # Counted because needs_review=True
+
+
+def test_counter_cache_follows_moves_and_deletes(client, auth_headers):
+    """item_count/need_review_count track moves between collections and deletes"""
+    from unittest.mock import patch
+    from app.models.collection import Collection
+    from app.services import stats
+    from app import db
+
+    a = client.post('/api/collections', json={'name': 'Counter A'}, headers=auth_headers).json
+    b = client.post('/api/collections', json={'name': 'Counter B'}, headers=auth_headers).json
+
+    item_ids = [
+        client.post('/api/items', json={'collection_id': a['id']}, headers=auth_headers).json['id']
+        for _ in range(3)
+    ]
+    client.patch(f'/api/items/{item_ids[0]}/review', json={'needs_review': True}, headers=auth_headers)
+    client.patch(f'/api/items/{item_ids[0]}', json={'collection_id': b['id']}, headers=auth_headers)
+    with patch('cloudinary.uploader.destroy'):
+        client.delete(f'/api/items/{item_ids[1]}', headers=auth_headers)
+
+    counts = {c['id']: c for c in client.get('/api/collections', headers=auth_headers).json}
+    assert (counts[a['id']]['total_count'], counts[a['id']]['need_review_count']) == (1, 0)
+    assert (counts[b['id']]['total_count'], counts[b['id']]['need_review_count']) == (1, 1)
+
+    # Rebuild agrees with the incremental counters
+    stats.rebuild()
+    db.session.expire_all()
+    assert Collection.query.get(a['id']).item_count == 1
+    assert Collection.query.get(b['id']).need_review_count == 1
+
+
+def test_counter_bump_does_not_touch_updated_at(client, auth_headers):
+    from app.models.collection import Collection
+    from app import db
+
+    col = client.post('/api/collections', json={'name': 'Stable'}, headers=auth_headers).json
+    before = Collection.query.get(col['id']).updated_at
+    client.post('/api/items', json={'collection_id': col['id']}, headers=auth_headers)
+    db.session.expire_all()
+    collection = Collection.query.get(col['id'])
+    assert collection.item_count == 1
+    assert collection.updated_at == before
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import cloudinary.exceptions
+
+from app import db
+from app.models.item import Item
+from app.models.job_lease import JobLease
+from app.models.storage_deletion import StorageDeletion
+from app.services import deletion_outbox, storage as storage_service
+
+
+def _item_with_images(images):
+    item = Item(title='Q', subject='MATHS', difficulty=1, author_id=1, images=images)
+    db.session.add(item)
+    db.session.commit()
+    return item.id
+
+
+def test_delete_item_queues_images_and_variants(client, auth_headers):
+    item_id = _item_with_images([
+        {'url': 'u', 'public_id': 'selective-questions/a', 'variants': {'thumb': 't', 'medium': 'm', 'full': 'u'}},
+        {'url': 'u', 'public_id': 'selective-questions/b'},
+    ])
+    with patch('cloudinary.uploader.destroy') as mock_destroy, \
+            patch('cloudinary.api.delete_resources') as mock_delete:
+        response = client.delete(f'/api/items/{item_id}', headers=auth_headers)
+
+    assert response.status_code == 200
+    mock_destroy.assert_not_called()
+    mock_delete.assert_not_called()
+    assert sorted(d.public_id for d in StorageDeletion.query.all()) == [
+        'selective-questions/a', 'selective-questions/a_medium', 'selective-questions/a_thumb',
+        'selective-questions/b',
+    ]
+    assert db.session.get(Item, item_id) is None
+
+
+def test_delete_item_succeeds_while_storage_is_down(client, auth_headers):
+    item_id = _item_with_images([{'url': 'u', 'public_id': 'selective-questions/a'}])
+    with patch('cloudinary.uploader.destroy', side_effect=cloudinary.exceptions.GeneralError('down')):
+        response = client.delete(f'/api/items/{item_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert StorageDeletion.query.count() == 1
+
+
+def test_drain_batches_and_reschedules_failures(app):
+    deletion_outbox.enqueue([f'selective-questions/{i}' for i in range(5)])
+    db.session.commit()
+
+    def partial(public_ids, resource_type='image'):
+        return {'deleted': {pid: ('error' if pid.endswith('/3') else 'deleted') for pid in public_ids}}
+
+    with patch('cloudinary.api.delete_resources', side_effect=partial) as mock_delete:
+        report = deletion_outbox.drain(batch_size=2)
+
+    assert report['acquired'] is True
+    assert (report['deleted'], report['failed'], report['batches']) == (4, 1, 3)
+    assert [len(call.args[0]) for call in mock_delete.call_args_list] == [2, 2, 1]
+
+    left = StorageDeletion.query.one()
+    assert left.public_id == 'selective-questions/3'
+    assert left.attempts == 1
+    assert left.next_attempt_at > datetime.utcnow() + timedelta(seconds=30)
+    assert left.last_error
+
+    # Not due yet, so a second drain leaves it alone
+    with patch('cloudinary.api.delete_resources') as mock_delete:
+        assert deletion_outbox.drain()['batches'] == 0
+    mock_delete.assert_not_called()
+
+
+def test_drain_gives_up_after_max_attempts(app):
+    deletion_outbox.enqueue(['selective-questions/x'])
+    db.session.commit()
+    StorageDeletion.query.update({'attempts': 3})
+    db.session.commit()
+
+    with patch('cloudinary.api.delete_resources') as mock_delete:
+        assert deletion_outbox.drain(max_attempts=3)['batches'] == 0
+    mock_delete.assert_not_called()
+
+
+def test_drain_stops_when_breaker_is_open(app):
+    deletion_outbox.enqueue(['selective-questions/x'])
+    db.session.commit()
+    storage_service.reset_breaker()
+    with patch.object(storage_service.CircuitBreaker, 'before_call',
+                      side_effect=storage_service.CircuitOpenError('open')):
+        report = deletion_outbox.drain()
+    storage_service.reset_breaker()
+
+    assert report['failed'] == 1
+    assert StorageDeletion.query.one().attempts == 1
+
+
+def test_drain_respects_lease(app):
+    deletion_outbox.enqueue(['selective-questions/x'])
+    db.session.commit()
+    JobLease.acquire(deletion_outbox.LEASE_NAME, 'other-worker', 600)
+    with patch('cloudinary.api.delete_resources') as mock_delete:
+        assert deletion_outbox.drain()['acquired'] is False
+    mock_delete.assert_not_called()
+
+
+def test_drain_stops_when_lease_is_taken_over(app):
+    deletion_outbox.enqueue([f'selective-questions/{i}' for i in range(5)])
+    db.session.commit()
+
+    def taken_over(public_ids, resource_type='image'):
+        # The lease expired mid-batch and another worker picked it up
+        db.session.execute(db.update(JobLease).where(JobLease.name == deletion_outbox.LEASE_NAME).values(
+            owner='other-worker', expires_at=datetime.utcnow() + timedelta(minutes=10)
+        ))
+        db.session.commit()
+        return {'deleted': {pid: 'deleted' for pid in public_ids}}
+
+    with patch('cloudinary.api.delete_resources', side_effect=taken_over) as mock_delete:
+        report = deletion_outbox.drain(batch_size=2)
+
+    assert report['lease_lost'] is True
+    assert (report['deleted'], report['batches']) == (2, 1)
+    assert mock_delete.call_count == 1
+    assert StorageDeletion.query.count() == 3
+    assert not JobLease.acquire(deletion_outbox.LEASE_NAME, 'third-worker', 600)
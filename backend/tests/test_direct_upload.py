@@ -0,0 +1,134 @@
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+import pytest
+from PIL import Image
+
+from app import db
+from app.models.image_hash import ImageHash
+from app.models.pending_upload import PendingUpload
+
+
+@pytest.fixture
+def cloud_name():
+    # Delivery URLs need a cloud name; production sets it through CLOUDINARY_URL
+    previous = cloudinary.config().cloud_name
+    cloudinary.config(cloud_name='demo')
+    yield
+    cloudinary.config(cloud_name=previous)
+
+
+def _stored_webp(color='red'):
+    buf = BytesIO()
+    Image.new('RGB', (64, 48), color).save(buf, format='WEBP')
+    return buf.getvalue()
+
+
+def _storage_serves(data):
+    """Patch the Cloudinary resource lookup and delivery download"""
+    resource = patch('cloudinary.api.resource', return_value={
+        'format': 'webp', 'bytes': len(data), 'secure_url': 'https://cdn/x.webp'
+    })
+    download = patch.object(cloudinary.uploader._http, 'request', return_value=MagicMock(status=200, data=data))
+    return resource, download
+
+
+def _configure(app):
+    app.config.update(
+        CLOUDINARY_CLOUD_NAME='demo',
+        CLOUDINARY_API_KEY='key',
+        CLOUDINARY_API_SECRET='secret'
+    )
+
+
+def test_signature_returns_signed_user_scoped_params(app, client, auth_headers):
+    _configure(app)
+    response = client.post('/api/upload/signature', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json
+
+    assert data['upload_url'] == 'https://api.cloudinary.com/v1_1/demo/image/upload'
+    assert data['folder'] == 'selective-questions'
+    assert data['public_id'].startswith('u1-')
+    assert data['max_file_size'] == 15 * 1024 * 1024
+
+    # Storage normalizes the file and pre-renders the variants like /api/upload
+    assert data['format'] == 'webp'
+    assert data['transformation'] == 'c_limit,h_2048,w_2048,q_80'
+    assert data['eager'] == 'c_limit,h_1024,w_1024,q_80/webp|c_limit,h_320,w_320,q_80/webp'
+
+    signed = {k: data[k] for k in ('timestamp', 'folder', 'public_id', 'allowed_formats',
+                                   'format', 'transformation', 'eager')}
+    assert data['signature'] == cloudinary.utils.api_sign_request(signed, 'secret')
+
+
+def test_signature_requires_configuration(app, client, auth_headers):
+    with patch('cloudinary.config') as mock_config:
+        mock_config.return_value.api_key = None
+        mock_config.return_value.api_secret = None
+        mock_config.return_value.cloud_name = None
+        response = client.post('/api/upload/signature', headers=auth_headers)
+    assert response.status_code == 503
+
+
+def test_confirm_registers_pending_upload(client, auth_headers, cloud_name):
+    public_id = 'selective-questions/u1-abc'
+    resource, download = _storage_serves(_stored_webp())
+    with resource, download:
+        response = client.post('/api/upload/confirm', json={'public_id': public_id}, headers=auth_headers)
+
+    assert response.status_code == 201
+    assert response.json['url'] == 'https://cdn/x.webp'
+    assert response.json['public_id'] == public_id
+    variants = response.json['variants']
+    assert set(variants) == {'full', 'medium', 'thumb'}
+    assert '/c_limit,h_320,w_320,q_80/' in variants['thumb'] and variants['thumb'].endswith(f'/{public_id}.webp')
+    assert PendingUpload.query.get(public_id).user_id == 1
+    assert ImageHash.query.filter_by(public_id=public_id).one().variants == variants
+
+    # Confirming twice is rejected
+    response = client.post('/api/upload/confirm', json={'public_id': public_id}, headers=auth_headers)
+    assert response.status_code == 409
+
+
+def test_confirm_hands_back_identical_pending_upload(client, auth_headers, cloud_name):
+    data = _stored_webp()
+    resource, download = _storage_serves(data)
+    with resource, download:
+        first = client.post('/api/upload/confirm', json={'public_id': 'selective-questions/u1-a'}, headers=auth_headers)
+        with patch('cloudinary.uploader.destroy', return_value={'result': 'ok'}) as mock_destroy:
+            second = client.post('/api/upload/confirm', json={'public_id': 'selective-questions/u1-b'}, headers=auth_headers)
+
+    assert second.status_code == 200
+    assert second.json['duplicate'] is True
+    assert second.json['public_id'] == first.json['public_id']
+    mock_destroy.assert_called_once_with('selective-questions/u1-b')
+    assert db.session.get(PendingUpload, 'selective-questions/u1-b') is None
+
+
+def test_confirm_rejects_other_users_public_id(client, auth_headers):
+    response = client.post('/api/upload/confirm', json={'public_id': 'selective-questions/u2-abc'}, headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_confirm_rejects_oversized_upload(client, auth_headers):
+    public_id = 'selective-questions/u1-big'
+    with patch('cloudinary.api.resource') as mock_resource, \
+            patch('cloudinary.uploader.destroy') as mock_destroy:
+        mock_resource.return_value = {'format': 'jpg', 'bytes': 16 * 1024 * 1024, 'secure_url': 'https://cdn/x.jpg'}
+        response = client.post('/api/upload/confirm', json={'public_id': public_id}, headers=auth_headers)
+
+    assert response.status_code == 400
+    mock_destroy.assert_called_once_with(public_id)
+    assert db.session.get(PendingUpload, public_id) is None
+
+
+def test_confirm_missing_upload(client, auth_headers):
+    with patch('cloudinary.api.resource',
+               side_effect=cloudinary.exceptions.NotFound('missing')):
+        response = client.post('/api/upload/confirm', json={'public_id': 'selective-questions/u1-nope'}, headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,64 @@
+import gzip
+import json
+
+from app.services import exporter
+
+
+def _lines(data):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def _seed(client, headers):
+    col = client.post('/api/collections', json={'name': 'Export'}, headers=headers).json
+    rows = [{'title': f'Q{i}', 'collection_id': col['id'], 'tags': ['a', 'b'] if i % 2 else []} for i in range(5)]
+    ids = [c['id'] for c in client.post('/api/items/bulk', json={'items': rows}, headers=headers).json['created']]
+    client.post(f'/api/items/{ids[0]}/answers', json={'is_correct': False}, headers=headers)
+    return col, ids
+
+
+def test_export_streams_ndjson(client, auth_headers, other_auth_headers):
+    col, ids = _seed(client, auth_headers)
+    client.post('/api/items', json={'title': 'not mine'}, headers=other_auth_headers)
+
+    response = client.get('/api/export', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+
+    records = _lines(response.get_data())
+    assert records[0]['record'] == 'export'
+    by_type = {}
+    for record in records[1:]:
+        by_type.setdefault(record['record'], []).append(record)
+
+    assert [c['id'] for c in by_type['collection']] == [col['id']]
+    assert sorted(t['name'] for t in by_type['tag']) == ['a', 'b']
+    items = by_type['item']
+    assert [i['id'] for i in items] == ids
+    assert [i['tags'] for i in items[:2]] == [[], ['a', 'b']]
+    assert items[0]['collection_id'] == col['id']
+    assert [a['item_id'] for a in by_type['answer']] == [ids[0]]
+
+
+def test_export_gzip(client, auth_headers):
+    _seed(client, auth_headers)
+    response = client.get('/api/export?gzip=true', headers=auth_headers)
+    assert response.mimetype == 'application/gzip'
+    assert 'ndjson.gz' in response.headers['Content-Disposition']
+    records = _lines(gzip.decompress(response.get_data()))
+    assert sum(r['record'] == 'item' for r in records) == 5
+
+
+def test_ndjson_chunks_flushes_first_record_then_batches(monkeypatch):
+    monkeypatch.setattr(exporter, 'CHUNK_BYTES', 100)
+    records = [{'record': 'export'}] + [{'record': 'item', 'id': i, 'pad': 'x' * 40} for i in range(10)]
+
+    chunks = list(exporter.ndjson_chunks(iter(records)))
+    assert chunks[0] == b'{"record":"export"}\n'
+    assert 2 < len(chunks) < 11
+    assert len(_lines(b''.join(chunks))) == 11
+
+    compressed = list(exporter.ndjson_chunks(iter(records), compress=True))
+    # The first chunk alone already decompresses to the header line
+    assert gzip.decompress(b''.join(compressed)).startswith(b'{"record":"export"}\n')
+    assert _lines(gzip.decompress(b''.join(compressed))) == records
@@ -0,0 +1,128 @@
+import random
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app import db
+from app.models.image_hash import ImageHash
+from app.models.pending_upload import PendingUpload
+from app.services import image_dedup
+from app.services.image_dedup import BKTree, hamming
+
+
+@pytest.fixture(autouse=True)
+def fresh_tree_cache():
+    # Each test gets a fresh database, so ids (and cache keys) repeat
+    image_dedup._trees.clear()
+    yield
+    image_dedup._trees.clear()
+
+
+def _page(seed, size=(600, 800), quality=90):
+    """A synthetic 'photographed page' with some structure for the dHash"""
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle([x, y, x + 150, y + 60], fill=(rng.randrange(256),) * 3)
+    buf = BytesIO()
+    img.save(buf, format='JPEG', quality=quality)
+    return buf.getvalue()
+
+
+def _upload(client, headers, data):
+    counter = {'n': 0}
+
+    def fake_upload(file, public_id=None, folder=None, resource_type=None):
+        counter['n'] += 1
+        public_id = public_id or f"{folder}/asset{random.randrange(10**9)}"
+        return {'public_id': public_id, 'secure_url': f'https://cdn/{public_id}.webp'}
+
+    with patch('cloudinary.uploader.upload', side_effect=fake_upload):
+        response = client.post(
+            '/api/upload',
+            data={'file': (BytesIO(data), 'page.jpg')},
+            headers=headers,
+            content_type='multipart/form-data'
+        )
+    return response, counter['n']
+
+
+def test_bk_tree_matches_linear_scan():
+    rng = random.Random(1)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+
+    probe = values[42] ^ 0b1011  # 3 bits away
+    expected = sorted((hamming(probe, v), i) for i, v in enumerate(values) if hamming(probe, v) <= 6)
+    assert sorted(tree.search(probe, 6)) == expected
+    assert (3, 42) in expected
+
+
+def test_exact_duplicate_returns_existing_pending_asset(client, auth_headers):
+    data = _page(1)
+    first, uploads = _upload(client, auth_headers, data)
+    assert first.status_code == 201
+    assert uploads == 3
+
+    second, uploads = _upload(client, auth_headers, data)
+    assert second.status_code == 200
+    assert uploads == 0
+    assert second.json['duplicate'] is True
+    assert second.json['public_id'] == first.json['public_id']
+    assert second.json['variants'] == first.json['variants']
+    assert PendingUpload.query.count() == 1
+
+
+def test_duplicates_are_per_user(client, auth_headers, other_auth_headers):
+    data = _page(2)
+    _upload(client, auth_headers, data)
+    response, uploads = _upload(client, other_auth_headers, data)
+    assert response.status_code == 201
+    assert uploads == 3
+    assert 'near_duplicates' not in response.json
+
+
+def test_reencoded_copy_is_flagged_as_near_duplicate(client, auth_headers):
+    first, _ = _upload(client, auth_headers, _page(3, quality=90))
+    _upload(client, auth_headers, _page(4))
+
+    response, uploads = _upload(client, auth_headers, _page(3, size=(600, 800), quality=40))
+    assert response.status_code == 201
+    assert uploads == 3
+    near = response.json['near_duplicates']
+    assert [n['public_id'] for n in near] == [first.json['public_id']]
+
+
+def test_deleted_assets_are_not_reused(client, auth_headers):
+    data = _page(5)
+    first, _ = _upload(client, auth_headers, data)
+    public_id = first.json['public_id']
+
+    with patch('cloudinary.uploader.destroy', return_value={'result': 'ok'}), \
+            patch('cloudinary.api.delete_resources', return_value={'deleted': {}}):
+        assert client.delete('/api/upload', json={'public_id': public_id}, headers=auth_headers).status_code == 200
+    assert ImageHash.query.filter_by(public_id=public_id).count() == 0
+
+    response, uploads = _upload(client, auth_headers, data)
+    assert response.status_code == 201
+    assert uploads == 3
+    assert 'near_duplicates' not in response.json
+
+
+def test_stale_hash_rows_are_ignored_and_dropped(client, auth_headers):
+    data = _page(6)
+    first, _ = _upload(client, auth_headers, data)
+    # Asset vanished without the hash row being cleaned up
+    PendingUpload.query.delete()
+    db.session.commit()
+
+    response, uploads = _upload(client, auth_headers, data)
+    assert response.status_code == 201
+    assert uploads == 3
+    assert ImageHash.query.filter_by(public_id=first.json['public_id']).count() == 0
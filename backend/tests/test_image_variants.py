@@ -0,0 +1,95 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app.services.image_variants import InvalidImage, render_variants
+
+
+def _jpeg(width, height, orientation=None):
+    img = Image.new('RGB', (width, height), 'red')
+    buf = BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        img.save(buf, format='JPEG', exif=exif)
+    else:
+        img.save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def _size(data):
+    return Image.open(BytesIO(data)).size
+
+
+def test_render_variants_caps_edges_and_reencodes():
+    rendered = render_variants(_jpeg(4000, 3000), image_format='WEBP', quality=70, max_edge=2048)
+
+    assert _size(rendered['full']) == (2048, 1536)
+    assert _size(rendered['medium']) == (1024, 768)
+    assert _size(rendered['thumb']) == (320, 240)
+    assert all(Image.open(BytesIO(data)).format == 'WEBP' for data in rendered.values())
+
+
+def test_render_variants_applies_exif_orientation():
+    # Orientation 6 = rotate 90° clockwise for display
+    rendered = render_variants(_jpeg(400, 200, orientation=6), image_format='JPEG', max_edge=2048)
+    assert _size(rendered['full']) == (200, 400)
+
+
+def test_render_variants_never_upscales():
+    rendered = render_variants(_jpeg(100, 50), max_edge=2048)
+    assert _size(rendered['full']) == (100, 50)
+    assert _size(rendered['thumb']) == (100, 50)
+
+
+def test_render_variants_rejects_non_images():
+    with pytest.raises(InvalidImage):
+        render_variants(b'not an image')
+
+
+def test_upload_stores_variants(client, auth_headers):
+    def fake_upload(file, public_id=None, folder=None, resource_type=None):
+        public_id = public_id or f'{folder}/abc'
+        return {'public_id': public_id, 'secure_url': f'https://cdn/{public_id}.webp'}
+
+    with patch('cloudinary.uploader.upload', side_effect=fake_upload) as mock_upload:
+        response = client.post(
+            '/api/upload',
+            data={'file': (BytesIO(_jpeg(3000, 1000)), 'photo.jpg')},
+            headers=auth_headers,
+            content_type='multipart/form-data'
+        )
+
+    assert response.status_code == 201
+    assert response.json['public_id'] == 'selective-questions/abc'
+    assert response.json['variants'] == {
+        'full': 'https://cdn/selective-questions/abc.webp',
+        'medium': 'https://cdn/selective-questions/abc_medium.webp',
+        'thumb': 'https://cdn/selective-questions/abc_thumb.webp',
+    }
+    # Original bytes are never sent; the first upload is the capped rendition
+    assert _size(mock_upload.call_args_list[0].args[0].getvalue()) == (2048, 683)
+
+
+def test_upload_rejects_unreadable_image(client, auth_headers):
+    with patch('cloudinary.uploader.upload') as mock_upload:
+        response = client.post(
+            '/api/upload',
+            data={'file': (BytesIO(b'garbage'), 'photo.jpg')},
+            headers=auth_headers,
+            content_type='multipart/form-data'
+        )
+    assert response.status_code == 400
+    mock_upload.assert_not_called()
+
+
+def test_create_item_keeps_variants(client, auth_headers):
+    variants = {'thumb': 'https://cdn/t.webp', 'medium': 'https://cdn/m.webp', 'full': 'https://cdn/f.webp'}
+    response = client.post('/api/items', json={
+        'subject': 'MATHS',
+        'images': [{'url': 'https://cdn/f.webp', 'public_id': 'selective-questions/v1', 'variants': variants}]
+    }, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json['images'][0]['variants'] == variants
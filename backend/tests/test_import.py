@@ -0,0 +1,195 @@
+import json
+import zipfile
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app import db
+from app.models.collection import Collection
+from app.models.item import Item
+from app.models.item_image import ItemImage
+from app.services import importer, item_bulk
+from app.services.storage import StorageUnavailable
+
+
+@pytest.fixture(autouse=True)
+def import_dir(app, tmp_path):
+    app.config.update(
+        IMPORT_STORAGE_PATH=str(tmp_path / 'imports'),
+        IMPORT_BATCH_SIZE=2,
+        STORAGE_BACKEND='local',
+        LOCAL_STORAGE_PATH=str(tmp_path / 'uploads'),
+    )
+    return tmp_path
+
+
+def _ndjson(records):
+    return ''.join((r if isinstance(r, str) else json.dumps(r)) + '\n' for r in records).encode('utf-8')
+
+
+def _post(client, headers, data, filename='bank.ndjson'):
+    return client.post(
+        '/api/import',
+        data={'file': (BytesIO(data), filename)},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def _png(color):
+    buf = BytesIO()
+    Image.new('RGB', (60, 40), color).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def test_import_ndjson_in_batches(client, auth_headers, other_auth_headers):
+    records = [
+        {'title': 'Q1', 'collection': 'Maths', 'tags': ['algebra']},
+        {'title': 'Q2', 'collection': 'Maths', 'difficulty': 9},
+        '',
+        'not json',
+        {'title': 'Q3', 'collection': 'Reading', 'tags': ['algebra', 'vocab']},
+        {'title': 'Q4'},
+        {'title': 'Q5', 'images': ['missing.png']},
+    ]
+    response = _post(client, auth_headers, _ndjson(records))
+    assert response.status_code == 202
+    job_id = response.json['id']
+
+    job = client.get(f'/api/import/{job_id}', headers=auth_headers).json
+    assert job['status'] == 'COMPLETED'
+    assert (job['created'], job['failed']) == (3, 3)
+    assert job['processed'] == 7
+    assert [e['line'] for e in job['errors']] == [2, 4, 7]
+    assert job['errors'][2]['error'] == 'Image file names need a ZIP archive'
+
+    titles = sorted(i.title for i in Item.query.filter_by(author_id=1))
+    assert titles == ['Q1', 'Q3', 'Q4']
+    maths = Collection.query.filter_by(user_id=1, name='Maths').one()
+    assert maths.item_count == 1
+
+    # Other users can't see the job
+    assert client.get(f'/api/import/{job_id}', headers=other_auth_headers).status_code == 404
+
+
+def test_import_zip_uploads_images(client, auth_headers):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr('manifest.ndjson', _ndjson([
+            {'title': 'With image', 'images': ['img/a.png', 'img/b.png']},
+            {'title': 'Bad image', 'images': ['img/broken.png']},
+            {'title': 'Plain'},
+            {'title': 'Same bytes', 'images': ['img/copy.png']},
+        ]))
+        archive.writestr('img/a.png', _png('red'))
+        archive.writestr('img/copy.png', _png('red'))
+        archive.writestr('img/b.png', _png('blue'))
+        archive.writestr('img/broken.png', b'not an image')
+
+    response = _post(client, auth_headers, buf.getvalue(), filename='bank.zip')
+    job = client.get(f"/api/import/{response.json['id']}", headers=auth_headers).json
+    assert job['status'] == 'COMPLETED'
+    assert (job['created'], job['failed']) == (3, 1)
+    assert job['errors'][0]['error'] == 'Not a readable image: img/broken.png'
+
+    item = Item.query.filter_by(title='With image').one()
+    assert len(item.images) == 2
+    assert set(item.images[0]['variants']) == {'full', 'medium', 'thumb'}
+    assert ItemImage.query.filter_by(item_id=item.id).count() == 2
+
+
+def test_import_checks_rows_before_uploading_and_reports_storage_errors(client, auth_headers):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr('manifest.ndjson', _ndjson([
+            {'title': 'Invalid', 'difficulty': 9, 'images': ['img/a.png']},
+            {'title': 'Storage down', 'images': ['img/b.png']},
+            {'title': 'Stored', 'images': ['img/c.png']},
+        ]))
+        archive.writestr('img/a.png', _png('red'))
+        archive.writestr('img/b.png', _png('blue'))
+        archive.writestr('img/c.png', _png('green'))
+
+    real_store = importer._render_and_store
+    stored = []
+
+    def flaky_store(data, storage, config):
+        stored.append(data)
+        if data == _png('blue'):
+            raise StorageUnavailable('Storage temporarily unavailable')
+        return real_store(data, storage, config)
+
+    with patch.object(importer, '_render_and_store', side_effect=flaky_store):
+        response = _post(client, auth_headers, buf.getvalue(), filename='bank.zip')
+    job = client.get(f"/api/import/{response.json['id']}", headers=auth_headers).json
+
+    assert job['status'] == 'COMPLETED'
+    assert (job['created'], job['failed']) == (1, 2)
+    assert [(e['line'], e['error']) for e in job['errors']] == [
+        (1, 'Validation failed'), (2, 'Image upload failed: img/b.png'),
+    ]
+    # The invalid row's image was never stored
+    assert _png('red') not in stored
+    assert [i.title for i in Item.query.all()] == ['Stored']
+
+
+def test_import_resumes_after_last_committed_batch(client, auth_headers):
+    records = [{'title': f'Q{i}'} for i in range(5)]
+    real_create = item_bulk.create_items
+    calls = []
+
+    def flaky(user_id, rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError('database went away')
+        return real_create(user_id, rows)
+
+    with patch.object(item_bulk, 'create_items', side_effect=flaky):
+        response = _post(client, auth_headers, _ndjson(records))
+    job_id = response.json['id']
+    job = client.get(f'/api/import/{job_id}', headers=auth_headers).json
+    assert job['status'] == 'FAILED'
+    assert job['last_error'] == 'database went away'
+    assert (job['processed'], job['created']) == (2, 2)
+
+    response = client.post(f'/api/import/{job_id}/resume', headers=auth_headers)
+    assert response.status_code == 202
+    job = client.get(f'/api/import/{job_id}', headers=auth_headers).json
+    assert job['status'] == 'COMPLETED'
+    assert job['created'] == 5
+    assert sorted(i.title for i in Item.query.all()) == [f'Q{i}' for i in range(5)]
+
+    assert client.post(f'/api/import/{job_id}/resume', headers=auth_headers).status_code == 409
+
+
+def test_export_round_trip(client, auth_headers, other_auth_headers):
+    col = client.post('/api/collections', json={'name': 'Shared bank'}, headers=auth_headers).json
+    client.post('/api/items/bulk', json={'items': [
+        {'title': 'A', 'collection_id': col['id'], 'tags': ['t']},
+        {'title': 'B', 'difficulty': 5},
+    ]}, headers=auth_headers)
+    export = client.get('/api/export', headers=auth_headers).get_data()
+
+    response = _post(client, other_auth_headers, export)
+    job = client.get(f"/api/import/{response.json['id']}", headers=other_auth_headers).json
+    assert (job['status'], job['created'], job['failed']) == ('COMPLETED', 2, 0)
+
+    imported = {i.title: i for i in Item.query.filter_by(author_id=2)}
+    target = Collection.query.filter_by(user_id=2, name='Shared bank').one()
+    assert imported['A'].collection_id == target.id
+    assert [t.name for t in imported['A'].tags] == ['t']
+    assert imported['B'].difficulty == 5
+
+
+def test_import_rejects_bad_uploads(client, auth_headers, import_dir):
+    assert _post(client, auth_headers, b'{}', filename='bank.txt').status_code == 400
+
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr('questions.csv', 'a,b')
+    response = _post(client, auth_headers, buf.getvalue(), filename='bank.zip')
+    assert response.status_code == 400
+    assert 'manifest.ndjson' in response.json['error']
+    assert list((import_dir / 'imports').iterdir()) == []
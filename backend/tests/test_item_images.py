@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import patch
+from app.models.item import Item
+from app.models.item_image import ItemImage
+from app import db
+
+
+def _images(*public_ids):
+    return [{'url': f'http://example.com/{p}.jpg', 'public_id': p} for p in public_ids]
+
+
+def _index_rows(item_id):
+    db.session.expire_all()
+    return [
+        (r.public_id, r.position, r.rotation)
+        for r in ItemImage.query.filter_by(item_id=item_id).order_by(ItemImage.position)
+    ]
+
+
+def test_index_follows_item_writes(client, auth_headers):
+    item = client.post('/api/items', json={'images': _images('selective-questions/a', 'selective-questions/b')}, headers=auth_headers).json
+    assert _index_rows(item['id']) == [('selective-questions/a', 0, 0), ('selective-questions/b', 1, 0)]
+
+    client.patch(f"/api/items/{item['id']}/rotate", json={'image_index': 1, 'rotation': 270}, headers=auth_headers)
+    assert _index_rows(item['id'])[1] == ('selective-questions/b', 1, 270)
+
+    client.patch(f"/api/items/{item['id']}", json={'images': _images('selective-questions/c')}, headers=auth_headers)
+    assert _index_rows(item['id']) == [('selective-questions/c', 0, 0)]
+
+    with patch('cloudinary.uploader.destroy'):
+        client.delete(f"/api/items/{item['id']}", headers=auth_headers)
+    assert ItemImage.query.count() == 0
+
+
+def test_image_cannot_be_attached_twice(client, auth_headers):
+    first = client.post('/api/items', json={'images': _images('selective-questions/dup')}, headers=auth_headers)
+    assert first.status_code == 201
+
+    response = client.post('/api/items', json={'images': _images('selective-questions/dup')}, headers=auth_headers)
+    assert response.status_code == 409
+
+    other = client.post('/api/items', json={}, headers=auth_headers).json
+    response = client.patch(f"/api/items/{other['id']}", json={'images': _images('selective-questions/dup')}, headers=auth_headers)
+    assert response.status_code == 409
+
+    # Re-saving the owning item with the same image is fine
+    response = client.patch(f"/api/items/{first.json['id']}", json={'images': _images('selective-questions/dup')}, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_delete_image_ownership_uses_index(client, auth_headers, other_auth_headers):
+    client.post('/api/items', json={'images': _images('selective-questions/mine')}, headers=auth_headers)
+
+    with patch('cloudinary.uploader.destroy') as mock_destroy:
+        mock_destroy.return_value = {'result': 'ok'}
+
+        response = client.delete('/api/upload', json={'public_id': 'selective-questions/mine'}, headers=other_auth_headers)
+        assert response.status_code == 403
+        mock_destroy.assert_not_called()
+
+        # No per-item scan of the owner's images
+        with patch.object(Item, 'query') as item_query:
+            response = client.delete('/api/upload', json={'public_id': 'selective-questions/mine'}, headers=auth_headers)
+            item_query.filter_by.assert_not_called()
+        assert response.status_code == 200
+        mock_destroy.assert_called_once_with('selective-questions/mine')
+
+
+def test_collection_hard_delete_drops_index_rows(client, auth_headers):
+    col = client.post('/api/collections', json={'name': 'Images'}, headers=auth_headers).json
+    client.post('/api/items', json={'collection_id': col['id'], 'images': _images('selective-questions/x')}, headers=auth_headers)
+
+    client.patch(f"/api/collections/{col['id']}", json={'is_deleted': True}, headers=auth_headers)
+    response = client.delete(f"/api/collections/{col['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert ItemImage.query.count() == 0
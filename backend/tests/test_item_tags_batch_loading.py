@@ -0,0 +1,64 @@
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.models.item import Item
+from app.models.tag import Tag
+from app import db
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _seed_tagged_items(count, prefix='tag'):
+    tags = [Tag(user_id=1, name=f"{prefix}{i}") for i in range(3)]
+    db.session.add_all(tags)
+    for i in range(count):
+        item = Item(title=f"Q{i}", author_id=1, needs_review=True)
+        item.tags = tags[:(i % 3) + 1]
+        db.session.add(item)
+    db.session.commit()
+    db.session.expire_all()
+
+
+def _list_statement_count(client, headers, url):
+    with count_statements() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements), response
+
+
+@pytest.mark.parametrize('url', [
+    '/api/items?per_page=50',
+    '/api/items?per_page=50&cursor=',
+    '/api/items/review-session?limit=50',
+])
+def test_list_statement_count_independent_of_page_size(client, auth_headers, url):
+    _seed_tagged_items(2)
+    small, _ = _list_statement_count(client, auth_headers, url)
+
+    _seed_tagged_items(10, prefix='more')
+    large, response = _list_statement_count(client, auth_headers, url)
+
+    assert large == small
+    body = response.json if isinstance(response.json, list) else response.json['items']
+    assert len(body) == 12
+    assert all(len(item['tags']) >= 1 for item in body)
+
+
+def test_batched_tags_match_lazy_load(client, auth_headers):
+    _seed_tagged_items(6)
+    response = client.get('/api/items?per_page=50', headers=auth_headers)
+    for data in response.json['items']:
+        item = db.session.get(Item, data['id'])
+        assert sorted(t['name'] for t in data['tags']) == sorted(t.name for t in item.tags)
@@ -36,9 +36,13 @@ def test_update_item_ownership(client, auth_headers, other_auth_headers):
     assert response.status_code == 403
 
 def test_delete_item_cleanup(client, auth_headers):
+    from app.models.storage_deletion import StorageDeletion
+    from app.services.deletion_outbox import drain
+
     # Mock cloudinary
-    with patch('app.routes.items.cloudinary.uploader.destroy') as mock_destroy:
-        mock_destroy.return_value = {'result': 'ok'}
+    with patch('cloudinary.uploader.destroy') as mock_destroy, \
+            patch('cloudinary.api.delete_resources') as mock_delete:
+        mock_delete.return_value = {'deleted': {'img123': 'deleted'}}
         
         # Create item with image
         data = {
@@ -48,18 +52,22 @@ def test_delete_item_cleanup(client, auth_headers):
         response = client.post('/api/items', json=data, headers=auth_headers)
         item_id = response.json['id']
         
-        # Delete item
+        # Delete item: no storage calls in the request, image queued instead
         response = client.delete(f'/api/items/{item_id}', headers=auth_headers)
         assert response.status_code == 200
+        mock_destroy.assert_not_called()
+        assert [d.public_id for d in StorageDeletion.query.all()] == ['img123']
         
-        # Verify destroy called
-        mock_destroy.assert_called_with('img123')
+        # Verify the outbox deletes it from storage
+        assert drain()['deleted'] == 1
+        mock_delete.assert_called_once_with(['img123'], resource_type='image')
+        assert StorageDeletion.query.count() == 0
 
 def test_upload_delete(client, auth_headers):
     from app.models.pending_upload import PendingUpload
     from app import db
     
-    with patch('app.routes.upload.cloudinary.uploader.destroy') as mock_destroy:
+    with patch('cloudinary.uploader.destroy') as mock_destroy:
         mock_destroy.return_value = {'result': 'ok'}
         
         # Seed database to simulate a recent upload by this user
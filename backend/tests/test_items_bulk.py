@@ -0,0 +1,170 @@
+from app import db
+from app.models.collection import Collection
+from app.models.item import Item
+from app.models.item_image import ItemImage
+from app.models.pending_upload import PendingUpload
+from app.models.tag import Tag
+from unittest.mock import patch
+
+from app.services import item_bulk
+from tests.test_item_tags_batch_loading import count_statements
+from tests.test_stats_projection import assert_matches_rebuild
+
+
+def test_bulk_create_items(client, auth_headers):
+    col = client.post('/api/collections', json={'name': 'Bulk'}, headers=auth_headers).json
+    db.session.add(PendingUpload(public_id='bulk-img-1', user_id=1))
+    db.session.add(Tag(user_id=1, name='Algebra'))
+    db.session.commit()
+
+    rows = [
+        {'title': f'Q{i}', 'collection_id': col['id'], 'difficulty': i % 5 + 1, 'tags': ['algebra', 'New']}
+        for i in range(50)
+    ]
+    rows[0]['images'] = [{'url': 'http://example.com/1.jpg', 'public_id': 'bulk-img-1'}]
+    rows[1]['status'] = 'MASTERED'
+
+    response = client.post('/api/items/bulk', json={'items': rows}, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json['errors'] == []
+    created = response.json['created']
+    assert [c['index'] for c in created] == list(range(50))
+
+    first = client.get(f"/api/items/{created[0]['id']}", headers=auth_headers).json
+    assert first['title'] == 'Q0'
+    assert sorted(t['name'] for t in first['tags']) == ['Algebra', 'New']
+
+    # Existing tag reused, missing one created once
+    assert Tag.query.filter_by(user_id=1).count() == 2
+    assert ItemImage.query.filter_by(public_id='bulk-img-1').one().item_id == created[0]['id']
+    assert PendingUpload.query.get('bulk-img-1') is None
+
+    db.session.expire_all()
+    assert Collection.query.get(col['id']).item_count == 50
+    assert_matches_rebuild()
+
+
+def test_bulk_create_without_returning_is_one_insert_per_chunk(client, auth_headers):
+    # MySQL/TiDB path: no INSERT ... RETURNING
+    client.post('/api/items', json={'title': 'existing'}, headers=auth_headers)
+    rows = [{'title': f'Q{i}', 'difficulty': i % 5 + 1} for i in range(7)]
+    dialect = db.session.get_bind().dialect
+    with patch.object(dialect, 'insert_executemany_returning', False), \
+            patch.object(item_bulk, 'CHUNK_SIZE', 3), count_statements() as statements:
+        response = client.post('/api/items/bulk', json={'items': rows}, headers=auth_headers)
+
+    assert response.status_code == 201
+    assert len([s for s in statements if s.startswith('INSERT INTO items ')]) == 3
+    for row, created in zip(rows, response.json['created']):
+        item = db.session.get(Item, created['id'])
+        assert (item.title, item.difficulty) == (row['title'], row['difficulty'])
+
+
+def test_bulk_create_reports_row_errors(client, auth_headers, other_auth_headers):
+    own = client.post('/api/collections', json={'name': 'Mine'}, headers=auth_headers).json
+    foreign = client.post('/api/collections', json={'name': 'Theirs'}, headers=other_auth_headers).json
+    client.post('/api/items', json={
+        'images': [{'url': 'http://example.com/a.jpg', 'public_id': 'taken'}]
+    }, headers=auth_headers)
+
+    image = {'url': 'http://example.com/b.jpg', 'public_id': 'shared'}
+    rows = [
+        {'title': 'ok', 'collection_id': own['id']},
+        {'difficulty': 9},
+        {'collection_id': foreign['id']},
+        {'collection_id': 999999},
+        {'images': [{'url': 'http://example.com/a.jpg', 'public_id': 'taken'}]},
+        {'tags': ['  ']},
+        'not an object',
+        {'images': [image]},
+        {'images': [image]},
+    ]
+    response = client.post('/api/items/bulk', json={'items': rows}, headers=auth_headers)
+    assert response.status_code == 201
+    assert [c['index'] for c in response.json['created']] == [0, 7]
+    errors = {e['index']: e['error'] for e in response.json['errors']}
+    assert sorted(errors) == [1, 2, 3, 4, 5, 6, 8]
+    assert errors[2] == 'Invalid collection_id: Access denied'
+    assert errors[3] == 'Invalid collection_id: Collection not found'
+    assert errors[8] == 'Image is already attached to another item'
+    assert Item.query.filter_by(author_id=1).count() == 3
+
+
+def test_bulk_create_rejects_bad_payload(client, auth_headers, app):
+    assert client.post('/api/items/bulk', json={'items': []}, headers=auth_headers).status_code == 400
+    assert client.post('/api/items/bulk', json=[{}], headers=auth_headers).status_code == 400
+
+    app.config['ITEMS_BULK_MAX_ROWS'] = 2
+    response = client.post('/api/items/bulk', json={'items': [{}, {}, {}]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert Item.query.count() == 0
+
+    # Nothing valid: no rows written
+    response = client.post('/api/items/bulk', json={'items': [{'difficulty': 0}]}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json['created'] == []
+
+
+def _item_ids(client, headers, count, **fields):
+    rows = [dict(fields, title=f'T{i}') for i in range(count)]
+    response = client.post('/api/items/bulk', json={'items': rows}, headers=headers)
+    return [c['id'] for c in response.json['created']]
+
+
+def test_bulk_update_by_ids(client, auth_headers, other_auth_headers):
+    col = client.post('/api/collections', json={'name': 'Triage'}, headers=auth_headers).json
+    ids = _item_ids(client, auth_headers, 4, tags=['old', 'keep'])
+    foreign = _item_ids(client, other_auth_headers, 1)
+
+    response = client.patch('/api/items/bulk', json={
+        'ids': ids[:3] + foreign,
+        'status': 'MASTERED', 'needs_review': True, 'difficulty': 5, 'collection_id': col['id'],
+        'add_tags': ['Exam', 'keep'], 'remove_tags': ['OLD']
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json == {'matched': 3, 'updated': 3, 'tags_added': 3, 'tags_removed': 3}
+
+    db.session.expire_all()
+    changed = client.get(f'/api/items/{ids[0]}', headers=auth_headers).json
+    assert (changed['status'], changed['needs_review'], changed['difficulty']) == ('MASTERED', True, 5)
+    assert changed['collection_id'] == col['id']
+    assert sorted(t['name'] for t in changed['tags']) == ['Exam', 'keep']
+    untouched = client.get(f'/api/items/{ids[3]}', headers=auth_headers).json
+    assert untouched['status'] == 'UNANSWERED'
+    assert sorted(t['name'] for t in untouched['tags']) == ['keep', 'old']
+    assert Item.query.get(foreign[0]).status == 'UNANSWERED'
+
+    collection = Collection.query.get(col['id'])
+    assert (collection.item_count, collection.need_review_count) == (3, 3)
+    assert_matches_rebuild()
+
+
+def test_bulk_update_by_filter(client, auth_headers):
+    easy = _item_ids(client, auth_headers, 3, difficulty=1, tags=['mock'])
+    hard = _item_ids(client, auth_headers, 2, difficulty=4, tags=['mock'])
+
+    response = client.patch('/api/items/bulk?difficulty=1&tag=mock', json={'status': 'ANSWERED'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['updated'] == 3
+
+    db.session.expire_all()
+    assert {Item.query.get(i).status for i in easy} == {'ANSWERED'}
+    assert {Item.query.get(i).status for i in hard} == {'UNANSWERED'}
+    assert_matches_rebuild()
+
+
+def test_bulk_update_validation(client, auth_headers, other_auth_headers):
+    ids = _item_ids(client, auth_headers, 1)
+    foreign_col = client.post('/api/collections', json={'name': 'X'}, headers=other_auth_headers).json
+
+    def patch(body, query=''):
+        return client.patch(f'/api/items/bulk{query}', json=body, headers=auth_headers)
+
+    assert patch({'status': 'ANSWERED'}).status_code == 400  # no ids or filter
+    assert patch({'ids': ids}).status_code == 400  # nothing to change
+    assert patch({'ids': ids, 'status': 'NEED_REVIEW'}).status_code == 400
+    assert patch({'ids': ids, 'difficulty': 7}).status_code == 400
+    assert patch({'ids': 'all', 'difficulty': 2}).status_code == 400
+    assert patch({'ids': ids, 'add_tags': ['x' * 31]}).status_code == 400
+    assert patch({'ids': ids, 'collection_id': foreign_col['id']}).status_code == 403
+    assert patch({'ids': ids, 'collection_id': 999999}).status_code == 404
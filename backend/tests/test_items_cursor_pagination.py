@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models.item import Item
+from app import db
+
+
+def _seed_items(count, author_id=1):
+    base = datetime(2025, 1, 1)
+    items = []
+    for i in range(count):
+        # Pairs share a timestamp to exercise the id tiebreaker
+        items.append(Item(
+            title=f"Q{i}",
+            difficulty=(i % 5) + 1,
+            author_id=author_id,
+            created_at=base + timedelta(minutes=i // 2)
+        ))
+    db.session.add_all(items)
+    db.session.commit()
+    return [item.id for item in items]
+
+
+def _walk(client, headers, params):
+    seen = []
+    cursor = ''
+    while True:
+        response = client.get('/api/items', query_string={**params, 'cursor': cursor}, headers=headers)
+        assert response.status_code == 200
+        assert 'total' not in response.json
+        seen.extend(item['id'] for item in response.json['items'])
+        cursor = response.json['next_cursor']
+        if not response.json['has_more']:
+            assert cursor is None
+            return seen
+
+
+def test_cursor_walks_created_at_desc(client, auth_headers):
+    ids = _seed_items(7)
+    seen = _walk(client, auth_headers, {'per_page': 3})
+    # Newest first, ties broken by id descending
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_cursor_walks_difficulty_asc(client, auth_headers):
+    _seed_items(11)
+    seen = _walk(client, auth_headers, {'per_page': 4, 'sort_by': 'difficulty', 'sort_direction': 'asc'})
+    expected = [i.id for i in Item.query.order_by(Item.difficulty.asc(), Item.id.asc()).all()]
+    assert seen == expected
+
+
+@pytest.mark.parametrize('sort_by', ['difficulty', 'updated_at'])
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_cursor_walks_past_null_sort_keys(client, auth_headers, sort_by, direction):
+    ids = _seed_items(9)
+    # Legacy rows without a value for the sort column
+    Item.query.filter(Item.id.in_(ids[::2])).update({sort_by: None}, synchronize_session=False)
+    db.session.commit()
+
+    seen = _walk(client, auth_headers, {'per_page': 2, 'sort_by': sort_by, 'sort_direction': direction})
+    column = getattr(Item, sort_by)
+    order = (column.asc(), Item.id.asc()) if direction == 'asc' else (column.desc(), Item.id.desc())
+    assert seen == [i.id for i in Item.query.order_by(*order).all()]
+
+
+def test_cursor_respects_filters_and_scope(client, auth_headers, other_auth_headers):
+    _seed_items(4, author_id=1)
+    other_ids = _seed_items(3, author_id=2)
+    seen = _walk(client, other_auth_headers, {'per_page': 2})
+    assert sorted(seen) == sorted(other_ids)
+
+    response = client.get('/api/items?cursor=&difficulty=1', headers=auth_headers)
+    assert all(item['difficulty'] == 1 for item in response.json['items'])
+
+
+def test_cursor_per_page_ceiling(client, auth_headers):
+    response = client.get('/api/items?cursor=&per_page=100000', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['per_page'] == 100
+
+
+def test_invalid_cursor(client, auth_headers):
+    response = client.get('/api/items?cursor=not-a-token', headers=auth_headers)
+    assert response.status_code == 400
+
+    # Cursor issued for one sort can't be replayed against another
+    _seed_items(3)
+    response = client.get('/api/items?cursor=&per_page=1', headers=auth_headers)
+    token = response.json['next_cursor']
+    response = client.get(f'/api/items?cursor={token}&sort_by=difficulty', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_offset_mode_unchanged(client, auth_headers):
+    _seed_items(5)
+    response = client.get('/api/items?per_page=2&page=2', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json['total'] == 5
+    assert response.json['pages'] == 3
+    assert len(response.json['items']) == 2
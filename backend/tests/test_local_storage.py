@@ -0,0 +1,106 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.services.storage import LocalStorage, NotFound
+
+
+def _png():
+    buf = BytesIO()
+    Image.new('RGB', (40, 20), 'blue').save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def test_put_assigns_unique_public_ids(local_storage):
+    data = _png()
+    first = local_storage.put(BytesIO(data), folder='selective-questions')
+    second = local_storage.put(BytesIO(data), folder='selective-questions')
+
+    assert first['public_id'] != second['public_id']
+    assert first['public_id'].startswith('selective-questions/')
+    assert first['url'].endswith(f"/api/upload/files/{first['public_id']}")
+    assert local_storage.info(first['public_id'])['format'] == 'png'
+    assert sorted(entry['public_id'] for entry in local_storage.list('selective-questions/')) == sorted(
+        [first['public_id'], second['public_id']]
+    )
+
+
+def test_delete_many_reports_per_id(local_storage):
+    kept = local_storage.put(BytesIO(b'\xff\xd8\xffkeep'), public_id='a/keep')
+    gone = local_storage.put(BytesIO(b'\xff\xd8\xffgone'), public_id='a/gone')
+
+    assert local_storage.delete_many([gone['public_id'], 'a/missing']) == {
+        'a/gone': 'deleted',
+        'a/missing': 'not_found'
+    }
+    assert local_storage.delete('a/missing') is True
+    with pytest.raises(NotFound):
+        local_storage.info('a/gone')
+    assert local_storage.info(kept['public_id'])['bytes'] == 7
+
+
+def test_public_ids_cannot_escape_root(local_storage):
+    with pytest.raises(NotFound):
+        local_storage.path_for('../outside')
+
+
+def test_serve_file_supports_range_and_conditional_get(client, local_storage):
+    data = _png()
+    stored = local_storage.put(BytesIO(data), folder='selective-questions')
+    url = f"/api/upload/files/{stored['public_id']}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data == data
+    etag = response.headers['ETag']
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    partial = client.get(url, headers={'Range': 'bytes=0-7'})
+    assert partial.status_code == 206
+    assert partial.data == data[:8]
+
+    assert client.get('/api/upload/files/selective-questions/missing').status_code == 404
+
+
+def test_upload_and_delete_round_trip_on_local_disk(client, auth_headers, local_storage, tmp_path):
+    buf = BytesIO()
+    Image.new('RGB', (800, 600), 'green').save(buf, format='JPEG')
+    buf.seek(0)
+
+    response = client.post(
+        '/api/upload',
+        data={'file': (buf, 'photo.jpg')},
+        headers=auth_headers,
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 201
+    public_id = response.json['public_id']
+    assert (tmp_path / public_id).exists()
+    assert (tmp_path / f'{public_id}_thumb').exists()
+
+    response = client.delete('/api/upload', json={'public_id': public_id}, headers=auth_headers)
+    assert response.status_code == 200
+    assert not (tmp_path / public_id).exists()
+    assert not (tmp_path / f'{public_id}_thumb').exists()
+
+
+def test_same_image_uploaded_by_two_users(client, auth_headers, other_auth_headers, local_storage):
+    data = _png()
+    ids = []
+    for headers in (auth_headers, other_auth_headers):
+        response = client.post(
+            '/api/upload',
+            data={'file': (BytesIO(data), 'same.png')},
+            headers=headers,
+            content_type='multipart/form-data'
+        )
+        assert response.status_code == 201
+        ids.append(response.json['public_id'])
+    assert ids[0] != ids[1]
+
+
+def test_files_route_is_disabled_for_cloudinary(client):
+    assert client.get('/api/upload/files/selective-questions/x').status_code == 404
@@ -0,0 +1,207 @@
+import os
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from app import db
+from app.models.item import Item
+from app.models.job_lease import JobLease
+from app.models.pending_upload import PendingUpload
+from app.services import orphan_reconciler
+from app.services.orphan_reconciler import UnsortedListing, find_orphans, reconcile, referenced_ids
+
+
+def _put(storage, public_id, age_hours=48):
+    storage.put(BytesIO(b'\xff\xd8\xff' + public_id.encode()), public_id=public_id)
+    mtime = time.time() - age_hours * 3600
+    os.utime(storage.path_for(public_id), (mtime, mtime))
+
+
+def _seed(storage):
+    # Attached to an item (with variants), pending, queued for deletion, orphaned, and fresh
+    item = Item(title='Q', subject='MATHS', difficulty=1, author_id=1,
+                images=[{'url': 'u', 'public_id': 'selective-questions/item', 'variants': {}}])
+    db.session.add(item)
+    db.session.add(PendingUpload(public_id='selective-questions/pending', user_id=1))
+    db.session.commit()
+    for public_id in ('selective-questions/item', 'selective-questions/item_thumb',
+                      'selective-questions/item_medium', 'selective-questions/pending',
+                      'selective-questions/lost', 'selective-questions/lost_thumb',
+                      'selective-questions/zz-orphan'):
+        _put(storage, public_id)
+    _put(storage, 'selective-questions/just-uploaded', age_hours=1)
+    _put(storage, 'other-folder/untouched')
+
+
+def test_find_orphans_is_a_sorted_set_difference():
+    entries = [{'public_id': p} for p in ['a', 'b', 'c', 'd', 'f']]
+    assert [e['public_id'] for e in find_orphans(entries, ['b', 'd', 'e'])] == ['a', 'c', 'f']
+
+
+def test_referenced_ids_interleave_variants_in_order(app):
+    for public_id in ('p/a', 'p/a_x', 'p/b'):
+        db.session.add(PendingUpload(public_id=public_id, user_id=1))
+    db.session.commit()
+
+    ids = list(referenced_ids('p/'))
+    assert ids == sorted(ids)
+    assert ids == ['p/a', 'p/a_medium', 'p/a_thumb', 'p/a_x', 'p/a_x_medium', 'p/a_x_thumb',
+                   'p/b', 'p/b_medium', 'p/b_thumb']
+
+
+def test_referenced_ids_after_checkpoint_keep_variants_of_earlier_bases(app):
+    for public_id in ('p/a', 'p/a_x', 'p/b'):
+        db.session.add(PendingUpload(public_id=public_id, user_id=1))
+    db.session.commit()
+
+    assert list(referenced_ids('p/', after='p/a')) == [
+        'p/a_medium', 'p/a_thumb', 'p/a_x', 'p/a_x_medium', 'p/a_x_thumb', 'p/b', 'p/b_medium', 'p/b_thumb'
+    ]
+    # A checkpoint that isn't itself referenced, after the base 'p/a_x'
+    assert list(referenced_ids('p/', after='p/a_x_a')) == [
+        'p/a_x_medium', 'p/a_x_thumb', 'p/b', 'p/b_medium', 'p/b_thumb'
+    ]
+
+
+def test_dry_run_reports_without_deleting(local_storage):
+    _seed(local_storage)
+    report = reconcile(dry_run=True)
+
+    assert report['scanned'] == 8
+    assert report['orphans'] == 3
+    assert report['too_recent'] == 1
+    assert report['sample'] == ['selective-questions/lost', 'selective-questions/lost_thumb',
+                                'selective-questions/zz-orphan']
+    assert report['deleted'] == 0
+    assert os.path.exists(local_storage.path_for('selective-questions/lost'))
+
+
+def test_apply_deletes_only_old_orphans(local_storage):
+    _seed(local_storage)
+    report = reconcile(dry_run=False, batch_size=2)
+
+    assert report['deleted'] == 3
+    remaining = [entry['public_id'] for entry in local_storage.list('')]
+    assert remaining == [
+        'other-folder/untouched',
+        'selective-questions/item', 'selective-questions/item_medium', 'selective-questions/item_thumb',
+        'selective-questions/just-uploaded', 'selective-questions/pending',
+    ]
+    # A full pass clears the checkpoint
+    assert JobLease.get_checkpoint(orphan_reconciler.LEASE_NAME) is None
+
+
+def test_interrupted_run_resumes_from_checkpoint(local_storage):
+    _seed(local_storage)
+    real_delete_many = local_storage.delete_many.__func__
+    calls = []
+
+    def flaky_delete_many(self, public_ids):
+        calls.append(list(public_ids))
+        if len(calls) == 2:
+            raise RuntimeError('worker killed')
+        return real_delete_many(self, public_ids)
+
+    with patch.object(type(local_storage), 'delete_many', flaky_delete_many):
+        with pytest.raises(RuntimeError):
+            reconcile(dry_run=False, batch_size=2)
+    assert JobLease.get_checkpoint(orphan_reconciler.LEASE_NAME) == 'selective-questions/lost_thumb'
+
+    report = reconcile(dry_run=False, batch_size=2)
+    assert report['resumed_from'] == 'selective-questions/lost_thumb'
+    assert report['deleted'] == 1
+    assert not os.path.exists(local_storage.path_for('selective-questions/zz-orphan'))
+
+
+def test_apply_stops_when_lease_is_taken_over(local_storage):
+    _seed(local_storage)
+    real_delete_many = local_storage.delete_many.__func__
+    calls = []
+
+    def taken_over(self, public_ids):
+        # The lease expired mid-batch and another worker picked it up
+        calls.append(list(public_ids))
+        db.session.execute(db.update(JobLease).where(JobLease.name == orphan_reconciler.LEASE_NAME).values(
+            owner='other-worker', expires_at=datetime.utcnow() + timedelta(minutes=10)
+        ))
+        db.session.commit()
+        return real_delete_many(self, public_ids)
+
+    with patch.object(type(local_storage), 'delete_many', taken_over):
+        report = reconcile(dry_run=False, batch_size=2)
+
+    assert report['lease_lost'] is True
+    assert calls == [['selective-questions/lost', 'selective-questions/lost_thumb']]
+    assert report['deleted'] == 2
+    assert os.path.exists(local_storage.path_for('selective-questions/zz-orphan'))
+    # Neither our checkpoint nor a completed-pass reset touched the new holder's row
+    lease = db.session.get(JobLease, orphan_reconciler.LEASE_NAME)
+    assert (lease.owner, lease.checkpoint) == ('other-worker', None)
+
+
+def test_resume_at_a_base_id_does_not_report_its_variants(local_storage):
+    _seed(local_storage)
+    JobLease.acquire(orphan_reconciler.LEASE_NAME, 'earlier-run', 600)
+    JobLease.save_checkpoint(orphan_reconciler.LEASE_NAME, 'earlier-run', 'selective-questions/item')
+    JobLease.release(orphan_reconciler.LEASE_NAME, 'earlier-run')
+
+    report = reconcile(dry_run=False)
+    assert report['resumed_from'] == 'selective-questions/item'
+    assert report['sample'] == ['selective-questions/lost', 'selective-questions/lost_thumb',
+                                'selective-questions/zz-orphan']
+    assert report['orphans'] == report['deleted'] == 3
+    assert os.path.exists(local_storage.path_for('selective-questions/item_thumb'))
+
+
+def test_legacy_url_only_images_are_referenced(local_storage):
+    # Pre-public_id items: a bare URL string and a dict with only a url
+    db.session.add(Item(title='Legacy', author_id=1, images=[
+        'https://res.cloudinary.com/demo/image/upload/v1700000000/selective-questions/old-a.jpg',
+        {'url': local_storage.url_for('selective-questions/old-b')},
+        'https://example.com/elsewhere.png',
+    ]))
+    db.session.commit()
+    for public_id in ('selective-questions/old-a', 'selective-questions/old-a_thumb',
+                      'selective-questions/old-b', 'selective-questions/stray'):
+        _put(local_storage, public_id)
+
+    assert orphan_reconciler.legacy_public_ids('selective-questions/') == [
+        'selective-questions/old-a', 'selective-questions/old-b'
+    ]
+    report = reconcile(dry_run=False)
+    assert report['sample'] == ['selective-questions/stray']
+    assert report['deleted'] == 1
+    for public_id in ('selective-questions/old-a', 'selective-questions/old-a_thumb', 'selective-questions/old-b'):
+        assert os.path.exists(local_storage.path_for(public_id))
+
+
+def test_claimed_orphans_are_not_deleted(local_storage):
+    _put(local_storage, 'selective-questions/late')
+    real = orphan_reconciler._still_unreferenced
+
+    def claim_then_check(public_ids, legacy):
+        # Confirmed by another request between listing and deleting
+        db.session.add(PendingUpload(public_id='selective-questions/late', user_id=1))
+        db.session.flush()
+        return real(public_ids, legacy)
+
+    with patch.object(orphan_reconciler, '_still_unreferenced', side_effect=claim_then_check):
+        report = reconcile(dry_run=False)
+    assert report['orphans'] == 1
+    assert report['deleted'] == 0
+    assert os.path.exists(local_storage.path_for('selective-questions/late'))
+
+
+def test_unsorted_listing_is_rejected(app):
+    class Backwards:
+        def list(self, prefix=''):
+            now = datetime.utcnow() - timedelta(days=2)
+            yield {'public_id': 'selective-questions/b', 'bytes': 1, 'created_at': now}
+            yield {'public_id': 'selective-questions/a', 'bytes': 1, 'created_at': now}
+
+    with patch.object(orphan_reconciler, 'get_storage', return_value=Backwards()):
+        with pytest.raises(UnsortedListing):
+            reconcile(dry_run=True)
@@ -0,0 +1,20 @@
+import pytest
+from app.models.item import Item
+from app.models.answer import Answer
+from check_query_plans import check_query_plans
+
+
+def test_hot_queries_use_composite_indexes(app):
+    for name, index_name, plan, ok in check_query_plans():
+        assert ok, f"{name} should use {index_name}, got:\n{plan}"
+
+
+def test_composite_indexes_declared_on_models():
+    item_indexes = {ix.name: [c.name for c in ix.columns] for ix in Item.__table__.indexes}
+    assert item_indexes['idx_items_author_collection_created'] == ['author_id', 'collection_id', 'created_at']
+    assert item_indexes['idx_items_author_status'] == ['author_id', 'status']
+    assert item_indexes['idx_items_author_needs_review'] == ['author_id', 'needs_review']
+
+    answer_indexes = {ix.name: [c.name for c in ix.columns] for ix in Answer.__table__.indexes}
+    assert answer_indexes['idx_answers_item_correct'] == ['item_id', 'is_correct']
+    assert answer_indexes['idx_answers_user_created'] == ['user_id', 'created_at']
@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+from app.models.item import Item
+from app.models.tag import Tag
+from app.services import sampling
+from app import db
+
+
+def _seed_flagged(count, author_id=1, **fields):
+    items = [Item(title=f"R{i}", author_id=author_id, needs_review=True, **fields) for i in range(count)]
+    db.session.add_all(items)
+    db.session.commit()
+    return [item.id for item in items]
+
+
+def test_sample_is_distinct_and_scoped(app):
+    flagged = _seed_flagged(30)
+    db.session.add(Item(title='not flagged', author_id=1))
+    _seed_flagged(5, author_id=2)
+
+    items = sampling.sample_review_items(1, 10)
+    ids = [item.id for item in items]
+    assert len(ids) == len(set(ids)) == 10
+    assert set(ids) <= set(flagged)
+
+
+def test_limit_above_candidate_count(client, auth_headers):
+    flagged = _seed_flagged(10)
+    assert sorted(item.id for item in sampling.sample_review_items(1, 50)) == flagged
+
+    # limit is capped at 100 like /api/items/due
+    response = client.get('/api/items/review-session?limit=5000', headers=auth_headers)
+    assert response.status_code == 200
+    assert sorted(i['id'] for i in response.json) == flagged
+
+
+def test_sample_is_uniform(app):
+    flagged = _seed_flagged(20)
+    rng = random.Random(42)
+    counts = Counter()
+    for _ in range(400):
+        counts.update(item.id for item in sampling.sample_review_items(1, 5, rng=rng))
+
+    # 400 draws * 5 / 20 items = 100 expected hits each
+    assert set(counts) == set(flagged)
+    assert all(60 < n < 140 for n in counts.values())
+
+
+def test_review_session_filters(client, auth_headers):
+    c = client.post('/api/collections', json={'name': 'Review Col'}, headers=auth_headers).json
+    in_collection = _seed_flagged(3, collection_id=c['id'])
+    _seed_flagged(4)
+
+    response = client.get(f"/api/items/review-session?collection_id={c['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert sorted(i['id'] for i in response.json) == sorted(in_collection)
+
+    tag = Tag(user_id=1, name='geometry')
+    tagged = Item.query.get(in_collection[0])
+    tagged.tags.append(tag)
+    db.session.commit()
+
+    response = client.get('/api/items/review-session?tag=Geometry', headers=auth_headers)
+    assert [i['id'] for i in response.json] == [in_collection[0]]
+
+    response = client.get('/api/items/review-session?limit=2', headers=auth_headers)
+    assert len(response.json) == 2
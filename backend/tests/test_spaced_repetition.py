@@ -0,0 +1,58 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models.item import Item
+from app.services.scheduler import next_schedule, MIN_EASE
+from app import db
+
+
+def test_sm2_progression():
+    reps, interval, ease = next_schedule(4, 0, 0, 2.5)
+    assert (reps, interval, ease) == (1, 1, 2.5)
+    reps, interval, ease = next_schedule(4, reps, interval, ease)
+    assert (reps, interval) == (2, 6)
+    reps, interval, ease = next_schedule(5, reps, interval, ease)
+    assert (reps, interval) == (3, 15)
+    assert ease == 2.6
+
+    # Failure resets the sequence and lowers ease, never below the floor
+    reps, interval, ease = next_schedule(0, reps, interval, 1.4)
+    assert (reps, interval, ease) == (0, 1, MIN_EASE)
+
+
+def test_answer_schedules_next_review(client, auth_headers):
+    item = client.post('/api/items', json={'title': 'Due'}, headers=auth_headers).json
+    assert item['due_at'] is not None
+
+    response = client.post(f"/api/items/{item['id']}/answers", json={'is_correct': True}, headers=auth_headers)
+    assert response.status_code == 201
+    due_at = datetime.fromisoformat(response.json['due_at'])
+    assert timedelta(hours=23) < due_at - datetime.utcnow() <= timedelta(days=1)
+
+    response = client.post(f"/api/items/{item['id']}/answers", json={'is_correct': True, 'quality': 5}, headers=auth_headers)
+    q = Item.query.get(item['id'])
+    assert (q.repetitions, q.review_interval) == (2, 6)
+
+    response = client.post(f"/api/items/{item['id']}/answers", json={'is_correct': True, 'quality': 9}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_due_queue_order_and_scope(client, auth_headers, other_auth_headers):
+    now = datetime.utcnow()
+    db.session.add_all([
+        Item(title='later', author_id=1, due_at=now + timedelta(days=2)),
+        Item(title='oldest', author_id=1, due_at=now - timedelta(days=3)),
+        Item(title='recent', author_id=1, due_at=now - timedelta(hours=1)),
+        Item(title='unscheduled', author_id=1),
+        Item(title='other user', author_id=2, due_at=now - timedelta(days=5)),
+    ])
+    db.session.commit()
+    # Settled items can be unscheduled (NULL due_at) and never show up
+    Item.query.filter_by(title='unscheduled').update({'due_at': None})
+    db.session.commit()
+
+    response = client.get('/api/items/due', headers=auth_headers)
+    assert response.status_code == 200
+    assert [i['title'] for i in response.json] == ['oldest', 'recent']
+
+    response = client.get('/api/items/due?limit=1', headers=auth_headers)
+    assert [i['title'] for i in response.json] == ['oldest']
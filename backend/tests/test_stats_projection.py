@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import patch
+from app.models.item import Item
+from app.models.stats import UserStats, CollectionStats
+from app.services import stats
+from app import db
+
+
+def _snapshot():
+    db.session.expire_all()
+    user_rows = {
+        (r.user_id, r.dimension, r.bucket): r.to_dict()
+        for r in UserStats.query.all() if any(r.to_dict().values())
+    }
+    collection_rows = {
+        r.collection_id: r.to_dict()
+        for r in CollectionStats.query.all() if any(r.to_dict().values())
+    }
+    return user_rows, collection_rows
+
+
+def assert_matches_rebuild():
+    incremental = _snapshot()
+    stats.rebuild()
+    assert incremental == _snapshot()
+
+
+def test_write_paths_keep_stats_consistent(client, auth_headers):
+    c1 = client.post('/api/collections', json={'name': 'Maths'}, headers=auth_headers).json
+    c2 = client.post('/api/collections', json={'name': 'Reading'}, headers=auth_headers).json
+
+    ids = []
+    for i in range(4):
+        response = client.post('/api/items', json={
+            'collection_id': c1['id'], 'subject': 'MATHS', 'difficulty': i + 1
+        }, headers=auth_headers)
+        ids.append(response.json['id'])
+    assert_matches_rebuild()
+
+    client.patch(f'/api/items/{ids[0]}', json={'collection_id': c2['id'], 'difficulty': 5, 'subject': 'READING'}, headers=auth_headers)
+    client.patch(f'/api/items/{ids[1]}/status', json={'status': 'MASTERED'}, headers=auth_headers)
+    client.patch(f'/api/items/{ids[2]}/review', json={}, headers=auth_headers)
+    client.post(f'/api/items/{ids[3]}/answers', json={'is_correct': False}, headers=auth_headers)
+    assert_matches_rebuild()
+
+    with patch('cloudinary.uploader.destroy'):
+        client.delete(f'/api/items/{ids[1]}', headers=auth_headers)
+    assert_matches_rebuild()
+
+    client.patch(f"/api/collections/{c1['id']}", json={'is_deleted': True}, headers=auth_headers)
+    client.delete(f"/api/collections/{c1['id']}", headers=auth_headers)
+    assert CollectionStats.query.get(c1['id']) is None
+    assert_matches_rebuild()
+
+
+def test_get_stats_served_from_projection(client, auth_headers):
+    col = client.post('/api/collections', json={'name': 'Proj'}, headers=auth_headers).json
+    a = client.post('/api/items', json={'collection_id': col['id'], 'subject': 'MATHS', 'difficulty': 2}, headers=auth_headers).json
+    client.post('/api/items', json={'collection_id': col['id'], 'subject': 'WRITING', 'difficulty': 2}, headers=auth_headers)
+    client.post(f"/api/items/{a['id']}/answers", json={'is_correct': True}, headers=auth_headers)
+
+    data = client.get('/api/analytics/stats', headers=auth_headers).json
+    assert data['total_questions'] == 2
+    assert data['answered_questions'] == 1
+    assert data['mastered_questions'] == 1
+    assert data['by_subject']['MATHS'] == {'total': 1, 'answered': 1, 'mastered': 1}
+    assert data['by_subject']['WRITING']['total'] == 1
+    assert data['by_difficulty']['2'] == 2
+    assert data['by_collection'][str(col['id'])]['total'] == 2
+
+    # Reads don't scan items
+    with patch.object(Item, 'query') as item_query:
+        client.get('/api/analytics/stats', headers=auth_headers)
+        item_query.assert_not_called()
+
+
+def test_needs_review_counted_from_flag(client, auth_headers):
+    item = client.post('/api/items', json={'difficulty': 3}, headers=auth_headers).json
+    client.patch(f"/api/items/{item['id']}/review", json={'needs_review': True}, headers=auth_headers)
+
+    data = client.get('/api/analytics/stats', headers=auth_headers).json
+    assert data['need_review_questions'] == 1
+
+
+def test_rebuild_cli(app, auth_headers):
+    db.session.add(Item(title='direct', author_id=1, difficulty=4))
+    db.session.commit()
+    UserStats.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['stats', 'rebuild', '--user-id', '1'])
+    assert result.exit_code == 0
+    overall = UserStats.query.filter_by(user_id=1, dimension='all').first()
+    assert overall.total == 1
@@ -0,0 +1,126 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import cloudinary.api_client.call_api
+import cloudinary.exceptions
+import cloudinary.uploader
+import pytest
+
+from app.services import storage as storage_service
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+from app.services.storage import CloudinaryStorage, NotFound, StorageUnavailable
+
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(app):
+    app.config.update(STORAGE_BREAKER_MIN_CALLS=4, STORAGE_BREAKER_FAILURE_RATE=0.5, STORAGE_RETRIES=2)
+    storage_service.reset_breaker()
+    with patch('app.services.resilience.time.sleep') as mock_sleep:
+        yield mock_sleep
+    storage_service.reset_breaker()
+
+
+def test_breaker_opens_on_error_rate_and_probes_after_reset():
+    breaker = CircuitBreaker('test', failure_rate=0.5, min_calls=4, reset_seconds=30)
+    for ok in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(ok)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    with patch('app.services.resilience.time.monotonic', return_value=10**9):
+        breaker.before_call()          # the single half-open probe
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()      # everyone else still fails fast
+        breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_idempotent_calls_are_retried(fresh_breaker):
+    failures = [cloudinary.exceptions.GeneralError('Socket Error'), cloudinary.exceptions.GeneralError('503')]
+
+    def destroy(public_id):
+        if failures:
+            raise failures.pop()
+        return {'result': 'ok'}
+
+    with patch('cloudinary.uploader.destroy', side_effect=destroy) as mock_destroy:
+        assert CloudinaryStorage().delete('selective-questions/a') is True
+    assert mock_destroy.call_count == 3
+    assert fresh_breaker.call_count == 2
+    # Backoff is jittered but bounded by base * 2**attempt
+    assert all(0 <= call.args[0] <= 0.2 * 2 ** i for i, call in enumerate(fresh_breaker.call_args_list))
+
+
+def test_uploads_without_public_id_are_not_retried():
+    with patch('cloudinary.uploader.upload', side_effect=cloudinary.exceptions.Error('timeout')) as mock_upload:
+        with pytest.raises(cloudinary.exceptions.Error):
+            CloudinaryStorage().put(BytesIO(b'x'), folder='selective-questions')
+    assert mock_upload.call_count == 1
+
+
+@pytest.mark.parametrize('message', [
+    'Invalid image file',                   # 400
+    'Invalid Signature abc. String to sign', # 401
+    'Resource not found',                   # 404
+])
+def test_upload_api_error_responses_are_not_failures(message):
+    error = cloudinary.exceptions.Error(message)
+    with patch('cloudinary.uploader.destroy', side_effect=error) as mock_destroy:
+        for _ in range(5):
+            with pytest.raises(cloudinary.exceptions.Error):
+                CloudinaryStorage().delete('selective-questions/a')
+    assert mock_destroy.call_count == 5
+    assert storage_service.breaker().state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize('message, transient', [
+    ("Socket error: ConnectionResetError(104, 'reset')", True),
+    ("Unexpected error - ReadTimeoutError('read timed out')", True),
+    ("Error parsing server response (502) - b'<html>Bad Gateway</html>'", True),
+    ("Error parsing server response (200) - b''", False),
+])
+def test_upload_api_transport_errors_are_transient(message, transient):
+    assert storage_service._is_transient(cloudinary.exceptions.Error(message)) is transient
+
+
+def test_not_found_is_not_a_failure():
+    with patch('cloudinary.api.resource', side_effect=cloudinary.exceptions.NotFound('404')) as mock_resource:
+        for _ in range(5):
+            with pytest.raises(NotFound):
+                CloudinaryStorage().info('selective-questions/missing')
+    assert mock_resource.call_count == 5
+    assert storage_service.breaker().state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_fails_fast_with_503(client, auth_headers):
+    from app import db
+    from app.models.pending_upload import PendingUpload
+    db.session.add(PendingUpload(public_id='selective-questions/p1', user_id=1))
+    db.session.commit()
+
+    with patch('cloudinary.uploader.destroy', side_effect=cloudinary.exceptions.GeneralError('down')) as mock_destroy:
+        # Three failed attempts (plus the variant cleanup call) trip the breaker (min_calls=4)
+        response = client.delete('/api/upload', json={'public_id': 'selective-questions/p1'}, headers=auth_headers)
+        assert response.status_code == 500
+        calls = mock_destroy.call_count
+        assert calls == 3
+
+        response = client.delete('/api/upload', json={'public_id': 'selective-questions/p1'}, headers=auth_headers)
+        assert response.status_code == 503
+        assert mock_destroy.call_count == calls
+
+    status = client.get('/api/upload/storage-status', headers=auth_headers).json
+    assert status['breaker']['state'] == 'open'
+    assert status['operations']['delete']['errors'] == calls
+    with pytest.raises(StorageUnavailable):
+        CloudinaryStorage().delete('selective-questions/p1')
+
+
+def test_timeouts_are_set_on_sdk_connection_pools(app):
+    app.config.update(STORAGE_CONNECT_TIMEOUT=2, STORAGE_READ_TIMEOUT=7)
+    CloudinaryStorage()
+    for manager in (cloudinary.uploader._http, cloudinary.api_client.call_api._http):
+        timeout = manager.connection_pool_kw['timeout']
+        assert (timeout.connect_timeout, timeout.read_timeout) == (2, 7)
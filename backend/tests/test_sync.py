@@ -0,0 +1,147 @@
+import threading
+import time
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, select
+
+from app import db
+from app.models.change_log import ChangeLog, ChangeSeq
+from app.models.user import User
+from app.services import change_log
+from tests.test_item_tags_batch_loading import count_statements
+
+
+def _changes(client, headers, since=None, **params):
+    if since is not None:
+        params['since'] = since
+    response = client.get('/api/sync/changes', query_string=params, headers=headers)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_sync_returns_changes_and_tombstones(client, auth_headers):
+    col = client.post('/api/collections', json={'name': 'Sync'}, headers=auth_headers).json
+    item = client.post('/api/items', json={'collection_id': col['id'], 'tags': ['t1']}, headers=auth_headers).json
+    other = client.post('/api/items', json={'title': 'gone'}, headers=auth_headers).json
+
+    first = _changes(client, auth_headers)
+    assert {i['id'] for i in first['items']} == {item['id'], other['id']}
+    assert [c['id'] for c in first['collections']] == [col['id']]
+    assert [t['name'] for t in first['tags']] == ['t1']
+    assert first['has_more'] is False
+    token = first['next_since']
+
+    # Nothing changed: same token back, empty payload
+    idle = _changes(client, auth_headers, token)
+    assert idle['items'] == [] and idle['next_since'] == token
+
+    client.patch(f"/api/items/{item['id']}", json={'title': 'edited'}, headers=auth_headers)
+    with patch('cloudinary.uploader.destroy'):
+        client.delete(f"/api/items/{other['id']}", headers=auth_headers)
+
+    delta = _changes(client, auth_headers, token)
+    assert [i['title'] for i in delta['items']] == ['edited']
+    assert delta['deleted']['items'] == [other['id']]
+    token = delta['next_since']
+
+    # Soft delete, then hard delete with its items
+    client.patch(f"/api/collections/{col['id']}", json={'is_deleted': True}, headers=auth_headers)
+    delta = _changes(client, auth_headers, token)
+    assert delta['deleted']['collections'] == [col['id']]
+    client.delete(f"/api/collections/{col['id']}", headers=auth_headers)
+    delta = _changes(client, auth_headers, delta['next_since'])
+    assert delta['deleted'] == {'items': [item['id']], 'collections': [col['id']], 'tags': []}
+
+
+def test_sync_covers_bulk_writes_and_tag_edits(client, auth_headers):
+    created = client.post('/api/items/bulk', json={'items': [{'tags': ['bulk']}, {}]}, headers=auth_headers).json['created']
+    ids = [c['id'] for c in created]
+    first = _changes(client, auth_headers)
+    assert {i['id'] for i in first['items']} == set(ids)
+    assert [t['name'] for t in first['tags']] == ['bulk']
+
+    client.patch('/api/items/bulk', json={'ids': ids[:1], 'add_tags': ['more']}, headers=auth_headers)
+    delta = _changes(client, auth_headers, first['next_since'])
+    assert [i['id'] for i in delta['items']] == ids[:1]
+    assert [t['name'] for t in delta['tags']] == ['more']
+
+    # Tag-only edit through update_item is an item change too
+    client.patch(f'/api/items/{ids[1]}', json={'tags': ['bulk']}, headers=auth_headers)
+    delta = _changes(client, auth_headers, delta['next_since'])
+    assert [i['id'] for i in delta['items']] == ids[1:]
+
+
+def test_sync_pages_and_isolates_users(client, auth_headers, other_auth_headers):
+    for i in range(5):
+        client.post('/api/items', json={'title': f'Q{i}'}, headers=auth_headers)
+    client.post('/api/items', json={'title': 'theirs'}, headers=other_auth_headers)
+
+    seen, token = [], None
+    while True:
+        page = _changes(client, auth_headers, token, limit=2)
+        seen.extend(i['title'] for i in page['items'])
+        token = page['next_since']
+        if not page['has_more']:
+            break
+    assert sorted(seen) == [f'Q{i}' for i in range(5)]
+
+    assert client.get('/api/sync/changes?since=abc', headers=auth_headers).status_code == 400
+
+
+def test_idle_poll_is_one_query(client, auth_headers):
+    client.post('/api/items', json={'title': 'x'}, headers=auth_headers)
+    token = _changes(client, auth_headers)['next_since']
+    db.session.expire_all()
+
+    with count_statements() as statements:
+        _changes(client, auth_headers, token)
+    assert [s for s in statements if 'change_log' in s] == statements
+    assert len(statements) == 1
+    assert ChangeLog.query.count() == 1
+
+
+def test_seqs_are_per_user(client, auth_headers, other_auth_headers):
+    client.post('/api/items', json={'title': 'a'}, headers=auth_headers)
+    client.post('/api/items', json={'title': 'b'}, headers=other_auth_headers)
+    client.post('/api/items/bulk', json={'items': [{}, {}]}, headers=auth_headers)
+
+    seqs = [(row.user_id, row.seq) for row in ChangeLog.query.order_by(ChangeLog.user_id, ChangeLog.seq)]
+    assert seqs == [(1, 1), (1, 2), (1, 3), (2, 1)]
+    assert _changes(client, auth_headers)['next_since'] == '3'
+
+
+def test_interleaved_writers_commit_in_seq_order(app, tmp_path):
+    # Two connections to a file database, like two workers writing for one user
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}", connect_args={'timeout': 10})
+    db.metadata.create_all(engine, tables=[User.__table__, ChangeLog.__table__, ChangeSeq.__table__])
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {'id': 1, 'username': 'u', 'email': 'u@example.com'})
+
+    def committed_seqs():
+        with engine.connect() as conn:
+            return [row.seq for row in conn.execute(select(ChangeLog.seq).where(ChangeLog.user_id == 1))]
+
+    order = []
+
+    def writer_b():
+        with engine.begin() as conn:
+            change_log._append(conn, 1, 'item', [11], change_log.UPSERT)
+        order.append('b')
+
+    with engine.connect() as conn_a:
+        with conn_a.begin():
+            change_log._append(conn_a, 1, 'item', [10], change_log.UPSERT)
+            thread = threading.Thread(target=writer_b)
+            thread.start()
+            time.sleep(0.3)
+            # B waits on A's seq reservation instead of committing a later seq first
+            assert order == []
+            assert committed_seqs() == []
+            order.append('a')
+        thread.join()
+
+    assert order == ['a', 'b']
+    with engine.connect() as conn:
+        rows = conn.execute(select(ChangeLog.entity_id, ChangeLog.seq).order_by(ChangeLog.seq)).all()
+    assert [tuple(row) for row in rows] == [(10, 1), (11, 2)]
+    engine.dispose()
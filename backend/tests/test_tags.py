@@ -204,3 +204,59 @@ def test_get_tags_list(client, auth_headers):
     assert 'alpha' in tag_names
     assert 'beta' in tag_names
     assert 'gamma' in tag_names
+
+def test_filter_items_by_many_tags(client, auth_headers):
+    """Multi-tag AND filter: case-insensitive, duplicates ignored, unknown tag matches nothing"""
+    c = Collection(user_id=1, name="Multi Tag Collection", type="CUSTOM")
+    db.session.add(c)
+    db.session.commit()
+
+    all_tags = ['a', 'b', 'c', 'd', 'e']
+    client.post('/api/items', json={'collection_id': c.id, 'title': 'All', 'tags': all_tags}, headers=auth_headers)
+    client.post('/api/items', json={'collection_id': c.id, 'title': 'Some', 'tags': ['a', 'b', 'c']}, headers=auth_headers)
+
+    query = '&'.join(f'tag={t.upper()}' for t in all_tags)
+    response = client.get(f'/api/items?{query}&tag=a', headers=auth_headers)
+    assert response.json['total'] == 1
+    assert response.json['items'][0]['title'] == 'All'
+
+    response = client.get('/api/items?tag=a&tag=b', headers=auth_headers)
+    assert response.json['total'] == 2
+
+    response = client.get('/api/items?tag=a&tag=missing', headers=auth_headers)
+    assert response.json['total'] == 0
+
+
+def _tag_statements(statements):
+    return [s for s in statements if ' tags' in s or 'item_tags' in s]
+
+
+def test_item_tag_writes_are_constant(client, auth_headers):
+    """Saving ten tags costs the same handful of statements as saving one"""
+    from tests.test_item_tags_batch_loading import count_statements
+
+    db.session.add(Tag(user_id=1, name='Existing'))
+    db.session.commit()
+    names = ['existing'] + [f'new{i}' for i in range(9)]
+
+    with count_statements() as statements:
+        response = client.post('/api/items', json={'tags': names}, headers=auth_headers)
+    assert response.status_code == 201
+    assert len(response.json['tags']) == 10
+    # lookup, bulk insert of missing, re-read, link insert, serializer load
+    assert len(_tag_statements(statements)) == 5
+    item_id = response.json['id']
+
+    # Unchanged tags: only the read of current links, nothing written
+    with count_statements() as statements:
+        response = client.patch(f'/api/items/{item_id}', json={'tags': names}, headers=auth_headers)
+    assert response.status_code == 200
+    writes = [s for s in _tag_statements(statements) if not s.lstrip().upper().startswith('SELECT')]
+    assert writes == []
+
+    # One swapped tag: one link inserted, one deleted
+    with count_statements() as statements:
+        response = client.patch(f'/api/items/{item_id}', json={'tags': names[:-1] + ['Other']}, headers=auth_headers)
+    assert sorted(t['name'].lower() for t in response.json['tags']) == sorted(names[:-1] + ['other'])
+    writes = [s for s in _tag_statements(statements) if not s.lstrip().upper().startswith('SELECT')]
+    assert len(writes) == 3  # new tag, link insert, link delete
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app import db
+from app.models.job_lease import JobLease
+from app.models.pending_upload import PendingUpload
+from app.services.upload_sweeper import LEASE_NAME, sweep_pending_uploads
+
+
+def _seed_expired(count, hours_ago=25):
+    created_at = datetime.utcnow() - timedelta(hours=hours_ago)
+    for i in range(count):
+        db.session.add(PendingUpload(public_id=f'selective-questions/old{i:03d}', user_id=1, created_at=created_at))
+    db.session.commit()
+
+
+def _all_deleted(public_ids, resource_type='image'):
+    return {'deleted': {public_id: 'deleted' for public_id in public_ids}}
+
+
+def test_sweep_deletes_in_batches(app):
+    _seed_expired(5)
+    db.session.add(PendingUpload(public_id='selective-questions/recent', user_id=1))
+    db.session.commit()
+
+    with patch('cloudinary.api.delete_resources', side_effect=_all_deleted) as mock_delete:
+        report = sweep_pending_uploads(hours=24, batch_size=2)
+
+    assert report['acquired'] is True
+    assert report['deleted'] == 5
+    assert report['failed'] == 0
+    assert report['batches'] == 3
+    # Every upload goes out with its two variants
+    assert [len(call.args[0]) for call in mock_delete.call_args_list] == [6, 6, 3]
+    assert [u.public_id for u in PendingUpload.query.all()] == ['selective-questions/recent']
+
+
+def test_sweep_keeps_rows_that_failed_to_delete(app):
+    _seed_expired(3)
+
+    def partial(public_ids, resource_type='image'):
+        originals = public_ids[::3]
+        return {'deleted': {originals[0]: 'deleted', originals[1]: 'not_found', originals[2]: 'error'}}
+
+    with patch('cloudinary.api.delete_resources', side_effect=partial):
+        report = sweep_pending_uploads(hours=24)
+
+    assert report['deleted'] == 2
+    assert report['failed'] == 1
+    assert [u.public_id for u in PendingUpload.query.all()] == ['selective-questions/old002']
+
+
+def test_sweep_skips_when_lease_is_held(app):
+    _seed_expired(1)
+    assert JobLease.acquire(LEASE_NAME, 'other-worker', 600)
+
+    with patch('cloudinary.api.delete_resources') as mock_delete:
+        report = sweep_pending_uploads(hours=24)
+
+    assert report['acquired'] is False
+    mock_delete.assert_not_called()
+    assert PendingUpload.query.count() == 1
+
+
+def test_sweep_stops_when_lease_is_taken_over(app):
+    _seed_expired(5)
+
+    def taken_over(public_ids, resource_type='image'):
+        # The lease expired mid-batch and another worker picked it up
+        db.session.execute(db.update(JobLease).where(JobLease.name == LEASE_NAME).values(
+            owner='other-worker', expires_at=datetime.utcnow() + timedelta(minutes=10)
+        ))
+        db.session.commit()
+        return _all_deleted(public_ids)
+
+    with patch('cloudinary.api.delete_resources', side_effect=taken_over) as mock_delete:
+        report = sweep_pending_uploads(hours=24, batch_size=2)
+
+    assert report['lease_lost'] is True
+    assert (report['batches'], report['deleted']) == (1, 2)
+    assert mock_delete.call_count == 1
+    assert PendingUpload.query.count() == 3
+    # Our release leaves the new holder's lease alone
+    assert not JobLease.acquire(LEASE_NAME, 'third-worker', 600)
+
+
+def test_lease_can_be_taken_over_after_expiry(app):
+    assert JobLease.acquire('job', 'a', 600)
+    assert not JobLease.acquire('job', 'b', 600)
+    JobLease.release('job', 'a')
+    assert JobLease.acquire('job', 'b', 600)
+
+
+def test_upload_does_not_sweep_inline(client, auth_headers):
+    from io import BytesIO
+    from PIL import Image
+    image = BytesIO()
+    Image.new('RGB', (10, 10)).save(image, format='JPEG')
+    image.seek(0)
+
+    with patch('cloudinary.uploader.upload') as mock_upload, \
+            patch('app.models.pending_upload.PendingUpload.cleanup_expired') as mock_cleanup:
+        mock_upload.return_value = {'secure_url': 'http://x/img.jpg', 'public_id': 'selective-questions/new'}
+        response = client.post(
+            '/api/upload',
+            data={'file': (image, 'test.jpg')},
+            headers=auth_headers,
+            content_type='multipart/form-data'
+        )
+
+    assert response.status_code == 201
+    mock_cleanup.assert_not_called()
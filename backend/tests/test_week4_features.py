@@ -11,7 +11,7 @@ class TestPendingUploadSecurity:
     
     def test_upload_ownership_protection(self, client, auth_headers, other_auth_headers):
         """Test that users cannot delete other users' pending uploads"""
-        with patch('app.routes.upload.cloudinary.uploader.destroy') as mock_destroy:
+        with patch('cloudinary.uploader.destroy') as mock_destroy:
             # User 1 uploads an image
             public_id = 'selective-questions/user1_image.jpg'
             pending_upload = PendingUpload(
@@ -47,7 +47,7 @@ class TestPendingUploadSecurity:
         db.session.commit()
         
         # Mock Cloudinary to return failure
-        with patch('app.routes.upload.cloudinary.uploader.destroy') as mock_destroy:
+        with patch('cloudinary.uploader.destroy') as mock_destroy:
             mock_destroy.return_value = {'result': 'error'}
             
             response = client.delete('/api/upload', 
@@ -71,7 +71,7 @@ class TestPendingUploadSecurity:
         db.session.add(pending_upload)
         db.session.commit()
         
-        with patch('app.routes.upload.cloudinary.uploader.destroy') as mock_destroy:
+        with patch('cloudinary.uploader.destroy') as mock_destroy:
             mock_destroy.return_value = {'result': 'ok'}
             
             response = client.delete('/api/upload', 
@@ -103,8 +103,8 @@ class TestPendingUploadSecurity:
             db.session.commit()
             
             # Mock Cloudinary
-            with patch('cloudinary.uploader.destroy') as mock_destroy:
-                mock_destroy.return_value = {'result': 'ok'}
+            with patch('cloudinary.api.delete_resources') as mock_delete:
+                mock_delete.return_value = {'deleted': {'selective-questions/old.jpg': 'deleted'}}
                 
                 # Run cleanup
                 deleted_count = PendingUpload.cleanup_expired(hours=24)
@@ -112,8 +112,11 @@ class TestPendingUploadSecurity:
                 # Should delete 1
                 assert deleted_count == 1
                 
-                # Verify Cloudinary was called for the old image
-                mock_destroy.assert_called_once_with('selective-questions/old.jpg')
+                # Verify Cloudinary bulk delete was called for the old image only
+                mock_delete.assert_called_once_with(
+                    ['selective-questions/old.jpg', 'selective-questions/old.jpg_medium', 'selective-questions/old.jpg_thumb'],
+                    resource_type='image'
+                )
                 
                 # Old should be gone, recent should remain
                 assert PendingUpload.query.filter_by(public_id='selective-questions/old.jpg').first() is None
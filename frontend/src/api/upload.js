@@ -15,8 +15,41 @@ function resolveFilename(file) {
     return `upload${ext}`
 }
 
+async function uploadDirect(file) {
+    // Signed params from the API; the image bytes go straight to storage
+    const { data: params } = await apiClient.post('/upload/signature')
+    if (file.size > params.max_file_size) {
+        throw new Error('File too large')
+    }
+
+    const formData = new FormData()
+    formData.append('file', file, resolveFilename(file))
+    // format/transformation/eager make storage normalize the file and render variants
+    const signedKeys = [
+        'api_key', 'timestamp', 'signature', 'folder', 'public_id', 'allowed_formats',
+        'format', 'transformation', 'eager'
+    ]
+    for (const key of signedKeys) {
+        formData.append(key, params[key])
+    }
+    const response = await fetch(params.upload_url, { method: 'POST', body: formData })
+    if (!response.ok) {
+        throw new Error(`Storage upload failed (${response.status})`)
+    }
+    const uploaded = await response.json()
+
+    return apiClient.post('/upload/confirm', { public_id: uploaded.public_id })
+}
+
 export default {
-    uploadImage(file) {
+    async uploadImage(file) {
+        try {
+            return await uploadDirect(file)
+        } catch (err) {
+            // Direct uploads not configured on this deployment: proxy through the API
+            if (err.response?.status !== 503) throw err
+        }
+
         const formData = new FormData()
         formData.append('file', file, resolveFilename(file))
 